@@ -0,0 +1,254 @@
+"""Contains the ArrayAutocompleteProvider class, an AutocompleteProvider that
+stores its memory in flat parallel arrays instead of nested dictionaries.
+"""
+
+import heapq
+from array import array
+from autocomplete import autocomplete_provider as auto
+
+NO_NODE = -1
+ROOT = 0
+
+try:
+    _unichr = unichr
+except NameError:  # Python 3
+    _unichr = chr
+
+
+def label_char(code):
+    """Returns the character stored under an edge label code.
+
+    :param int code: The ordinal of the character.
+    """
+    if code < 256:
+        return chr(code)
+    return _unichr(code)
+
+
+class ArrayAutocompleteProvider(auto.AutocompleteProvider):
+    """AutocompleteProvider whose memory is a trie held in parallel arrays.
+    Node i has the edge label labels[i], the confidence confidences[i] and
+    the highest confidence below it max_confidences[i]. The children of a node
+    are linked from first_child through next_sibling in alphabetical order.
+    Each node costs a few machine words instead of a MemoryNode object and two
+    dictionaries. Node 0 is the root and has no label.
+    """
+
+    def _create_memory(self):
+        """Creates the empty storage engine.
+        """
+        self.labels = array('I', [0])
+        self.first_child = array('i', [NO_NODE])
+        self.next_sibling = array('i', [NO_NODE])
+        self.confidences = array('L', [0])
+        self.max_confidences = array('L', [0])
+
+    def node_count(self):
+        """Returns the number of letter nodes in memory.
+        """
+        return len(self.labels) - 1
+
+    def iter_words(self):
+        """Generates a (word, confidence) pair for every memorized word in
+        alphabetical order.
+        """
+        return iter(self._subtree_word_counts(ROOT, ''))
+
+    def _memorize(self, word, count=1):
+        """Adds a single preprocessed word to the arrays.
+
+        :param str word: The word to be added.
+        :param int count: Number of occurrences of the word.
+        """
+        labels = self.labels
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        path = [ROOT]
+        node = ROOT
+        for letter in word:
+            code = ord(letter)
+            previous = NO_NODE
+            child = first_child[node]
+            while child != NO_NODE and labels[child] < code:
+                previous = child
+                child = next_sibling[child]
+            if child == NO_NODE or labels[child] != code:
+                new_node = len(labels)
+                labels.append(code)
+                first_child.append(NO_NODE)
+                next_sibling.append(child)
+                self.confidences.append(0)
+                self.max_confidences.append(0)
+                if previous == NO_NODE:
+                    first_child[node] = new_node
+                else:
+                    next_sibling[previous] = new_node
+                child = new_node
+            node = child
+            path.append(node)
+        self.confidences[node] += count
+        confidence = self.confidences[node]
+        max_confidences = self.max_confidences
+        for node in path:
+            if max_confidences[node] < confidence:
+                max_confidences[node] = confidence
+
+    def _bottom_node(self, fragment):
+        """Returns the index of the node at the end of the fragment path, or
+        NO_NODE if the fragment has never been seen.
+
+        :param str fragment: Normalized word fragment.
+        """
+        labels = self.labels
+        next_sibling = self.next_sibling
+        node = ROOT
+        for letter in fragment:
+            code = ord(letter)
+            node = self.first_child[node]
+            while node != NO_NODE and labels[node] < code:
+                node = next_sibling[node]
+            if node == NO_NODE or labels[node] != code:
+                return NO_NODE
+        return node
+
+    def _root_node(self):
+        """Returns the index of the root for walking the memory letter by
+        letter.
+        """
+        return ROOT
+
+    def _child_nodes(self, node):
+        """Returns (letter, child index) pairs for the children of a node, in
+        alphabetical order.
+
+        :param int node: Index of the node.
+        """
+        labels = self.labels
+        next_sibling = self.next_sibling
+        children = []
+        child = self.first_child[node]
+        while child != NO_NODE:
+            children.append((label_char(labels[child]), child))
+            child = next_sibling[child]
+        return children
+
+    def _node_counts(self, node):
+        """Returns the confidence of the word ending at a node and the highest
+        confidence at or below it.
+
+        :param int node: Index of the node.
+        """
+        return self.confidences[node], self.max_confidences[node]
+
+    def _child_node(self, node, letter):
+        """Returns the index of the child of a node reached by letter, or
+        None.
+
+        :param int node: Index of the node.
+        :param str letter: The next letter.
+        """
+        code = ord(letter)
+        labels = self.labels
+        next_sibling = self.next_sibling
+        child = self.first_child[node]
+        while child != NO_NODE and labels[child] < code:
+            child = next_sibling[child]
+        if child == NO_NODE or labels[child] != code:
+            return None
+        return child
+
+    def _word_counts(self, fragment, trace=None):
+        """Returns a (word, confidence) pair for every word starting with
+        fragment, in alphabetical order.
+
+        :param str fragment: Normalized word fragment.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        node = self._bottom_node(fragment)
+        if node in (NO_NODE, ROOT):
+            return []
+        return self._subtree_word_counts(node, fragment, trace)
+
+    def _subtree_word_counts(self, node, fragment, trace=None):
+        """Returns a (word, confidence) pair for every word at or below node,
+        in alphabetical order.
+
+        :param int node: Index of the node reached by fragment.
+        :param str fragment: The word spelled by the path to node.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        labels = self.labels
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        confidences = self.confidences
+        word_counts = []
+        if confidences[node] > 0:
+            word_counts.append((fragment, confidences[node]))
+        visited = 1
+        stack = [(first_child[node], fragment)]
+        while stack:
+            node, prefix = stack.pop()
+            if node == NO_NODE:
+                continue
+            visited += 1
+            stack.append((next_sibling[node], prefix))
+            word = prefix + label_char(labels[node])
+            if confidences[node] > 0:
+                word_counts.append((word, confidences[node]))
+            if first_child[node] != NO_NODE:
+                stack.append((first_child[node], word))
+        if trace is not None:
+            trace.record(visited, len(word_counts))
+        return word_counts
+
+    _word_counts_at = _subtree_word_counts
+
+    def _top_word_counts(self, fragment, k, trace=None):
+        """Returns (word, confidence) pairs for the k most confident words
+        starting with fragment, using the same best-first search as
+        get_top_word_counts.
+
+        :param str fragment: Normalized word fragment.
+        :param int k: Maximum number of words to return.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        node = self._bottom_node(fragment)
+        if node in (NO_NODE, ROOT):
+            return []
+        return self._top_word_counts_at(node, fragment, k, trace)
+
+    def _top_word_counts_at(self, node, fragment, k, trace=None):
+        """Returns _top_word_counts(fragment, k) given the index of the node
+        fragment leads to.
+
+        :param int node: Index of the node reached by fragment.
+        :param str fragment: Normalized, non-empty word fragment.
+        :param int k: Maximum number of words to return.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        labels = self.labels
+        next_sibling = self.next_sibling
+        confidences = self.confidences
+        max_confidences = self.max_confidences
+        visited = generated = 0
+        word_counts = []
+        heap = [(-max_confidences[node], fragment, False, node)]
+        while heap and len(word_counts) < k:
+            priority, word, is_word, node = heapq.heappop(heap)
+            if is_word:
+                word_counts.append((word, -priority))
+                continue
+            visited += 1
+            if confidences[node] > 0:
+                generated += 1
+                heapq.heappush(heap, (-confidences[node], word, True, node))
+            child = self.first_child[node]
+            while child != NO_NODE:
+                if max_confidences[child] > 0:
+                    heapq.heappush(heap, (-max_confidences[child],
+                                          word + label_char(labels[child]),
+                                          False, child))
+                child = next_sibling[child]
+        if trace is not None:
+            trace.record(visited, generated)
+        return word_counts
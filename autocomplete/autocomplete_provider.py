@@ -1,34 +1,285 @@
 """Contains the AutocompleteProvider class and helper functions.
 """
 
-import string
+import collections
+import heapq
+from autocomplete import bigram
 from autocomplete import candidate as cand
+from autocomplete import fuzzy
+from autocomplete import keystroke
+from autocomplete import precomputed
+from autocomplete import query_cache
+from autocomplete import rwlock
+from autocomplete import tokenizer
+
+try:
+    iteritems = dict.iteritems
+    itervalues = dict.itervalues
+except AttributeError:  # Python 3
+    def iteritems(memory):
+        return iter(memory.items())
+
+    def itervalues(memory):
+        return iter(memory.values())
 
 class AutocompleteProvider:
     """Provides autocomplete suggestions for word fragments. Suggestions are
     based off of previously provided passages typed by the user. 
+
+    Words are stored in nested dictionaries of MemoryNode objects. Subclasses
+    may provide a different storage engine by overriding the _memorize,
+    _word_counts and _top_word_counts methods, the _root_node,
+    _child_nodes, _child_node and _node_counts methods that walk it letter by
+    letter, and the _word_counts_at and _top_word_counts_at methods that
+    search below a node already walked to.
     """
 
-    def __init__(self):
+    def __init__(self, unicode_letters=False, cache_size=0, thread_safe=False,
+                 retention=None, bigrams=False, precomputed_k=0,
+                 precomputed_depth=None, training_log=None, delta_history=0):
         """Initalizes AutocompleteProvider object.
+
+        :param bool unicode_letters: Remove all Unicode punctuation and symbols
+        from passages and fragments instead of only ASCII punctuation.
+        :param int cache_size: Number of getWords results kept in a
+        least-recently-used cache. The cache is disabled when 0.
+        :param bool thread_safe: Guard memory with a readers-writer lock, so
+        that many threads can call getWords while another thread trains.
+        :param RetentionPolicy retention: Decays confidences and keeps memory
+        within a budget automatically while training. See
+        autocomplete.retention.
+        :param bool bigrams: Also count which words follow each other while
+        training, for getWords with previous and for nextWords. See
+        autocomplete.bigram.
+        :param int precomputed_k: Keep the precomputed_k most confident words
+        of every prefix up to date while training, so getWords with k up to
+        precomputed_k returns without searching. Costs memory for every
+        prefix. Disabled when 0. See autocomplete.precomputed.
+        :param int precomputed_depth: Only keep the words of prefixes of up to
+        precomputed_depth letters, to bound the memory they cost. Longer
+        fragments are searched.
+        :param TrainingLog training_log: Restores the memory saved in its
+        directory, then logs every change to it so that it survives a crash.
+        See autocomplete.training_log.
+        :param int delta_history: Keep the word counts of recent training, up
+        to delta_history words in all, so export_delta can send them to other
+        replicas. Disabled when 0. See autocomplete.delta.
         """
-        self.memory = {}
+        self.unicode_letters = unicode_letters
+        self.lock = rwlock.ReadWriteLock() if thread_safe else None
+        self.instrumentation = None
+        self.retention = retention
+        self.bigrams = bigram.BigramModel() if bigrams else None
+        self.version = 0  # increases whenever memory changes
+        self.applied_deltas = {}  # version applied last, by sender epoch
+        if cache_size:
+            self.cache = query_cache.QueryCache(cache_size, thread_safe)
+        else:
+            self.cache = None
+        if precomputed_k:
+            self.top_lists = precomputed.TopKLists(precomputed_k,
+                                                   precomputed_depth)
+        else:
+            self.top_lists = None
+        self._create_memory()
+        self._rebuild_top_lists()
+        self.training_log = None
+        self.deltas = None
+        if training_log is not None:
+            training_log.recover(self)
+            self.training_log = training_log
+        if delta_history:
+            # Kept from here on, so recovered training is not exported again.
+            from autocomplete import delta
+            self.deltas = delta.DeltaHistory(delta_history, self.version)
 
-    def getWords(self, fragment):
+    def getWords(self, fragment, k=None, previous=None):
         """Returns list of candidates ordered by confidence.
 
         :param str fragment: The word fragment to be autocompleted.
+        :param int k: Maximum number of candidates to return. When given, only
+        the k most confident candidates are searched for (ties are ordered
+        alphabetically) instead of scanning every word below the fragment.
+        :param str previous: The word typed before the fragment. When the
+        provider counts bigrams, the words that followed previous in training
+        come first, ordered by how often they did, which is also their
+        confidence. The other candidates follow in their usual order.
         """
-        fragment = fragment.translate(None, string.punctuation).lower()
-        try:
-            memory_node = get_bottom_node(fragment, self.memory)
-        except KeyError:  # occurs when fragment has never been seen before
+        fragment = normalize(fragment, self.unicode_letters)
+        if previous is not None and self.bigrams is not None:
+            return self._query_after(normalize(previous, self.unicode_letters),
+                                     fragment, k)
+        if self.instrumentation is not None:
+            return self.instrumentation.query(self, fragment, k)
+        if self.lock is None:
+            return self._cached_query(fragment, k)
+        with self.lock.reading():
+            return self._cached_query(fragment, k)
+
+    def getWordsBatch(self, fragments, k=None):
+        """Returns a list holding the result of getWords(fragment, k) for
+        every fragment, such as every prefix of a typed sentence. Fragments
+        are normalized once and deduplicated, the memory is locked once, and
+        fragments sharing a prefix share the walk down to it. When the
+        result of a fragment holds fewer than k words it holds every word
+        below it, so the results of its extensions are filtered from it
+        instead of searched.
+
+        :param fragments: Iterable of word fragments (str).
+        :param int k: Maximum number of candidates per fragment.
+        """
+        normalized = [normalize(fragment, self.unicode_letters)
+                      for fragment in fragments]
+        if self.instrumentation is not None:
+            return [self.instrumentation.query(self, fragment, k)
+                    for fragment in normalized]
+        if self.lock is None:
+            results = self._batch_query(normalized, k)
+        else:
+            with self.lock.reading():
+                results = self._batch_query(normalized, k)
+        return [list(results[fragment]) for fragment in normalized]
+
+    def _batch_query(self, fragments, k):
+        """Returns a dictionary of the candidates of every distinct normalized
+        fragment. Implements getWordsBatch without locking.
+        """
+        cache = self.cache
+        top_lists = self.top_lists if k is not None else None
+        Candidate = cand.Candidate
+        results = {}
+        path = [self._root_node()]  # path[i] is the node of walked[:i]
+        walked = ''
+        complete = []  # (fragment, word counts) holding every word below
+        for fragment in sorted(set(fragments)):
+            if not fragment:
+                results[fragment] = self._cached_query(fragment, k)
+                continue
+            if cache is not None:
+                candidate_list = cache.get(fragment, k)
+                if candidate_list is not None:
+                    results[fragment] = candidate_list
+                    continue
+            word_counts = None
+            if top_lists is not None:
+                word_counts = top_lists.get(fragment, k)
+            while complete and not fragment.startswith(complete[-1][0]):
+                complete.pop()
+            if word_counts is None and complete:
+                word_counts = [(word, confidence) for word, confidence
+                               in complete[-1][1] if word.startswith(fragment)]
+            elif word_counts is None:
+                # Fragments are sorted, so keep the walk shared with the last.
+                shared = 0
+                limit = min(len(walked), len(fragment), len(path) - 1)
+                while shared < limit and walked[shared] == fragment[shared]:
+                    shared += 1
+                del path[shared + 1:]
+                walked = fragment
+                node = path[-1]
+                for letter in fragment[shared:]:
+                    node = self._child_node(node, letter)
+                    if node is None:
+                        break
+                    path.append(node)
+                if node is None:
+                    word_counts = []
+                elif k is not None:
+                    word_counts = self._top_word_counts_at(node, fragment, k)
+                else:
+                    word_counts = rank_word_counts(
+                        self._word_counts_at(node, fragment))
+                if k is not None and len(word_counts) < k:
+                    complete.append((fragment, word_counts))
+            candidate_list = [Candidate(word, confidence) for word, confidence
+                              in word_counts]
+            if cache is not None:
+                cache.put(fragment, k, candidate_list)
+            results[fragment] = candidate_list
+        return results
+
+    def session(self, fragment=''):
+        """Returns a KeystrokeSession that completes a word as it is typed
+        one letter at a time, reusing the walk and the candidates of the
+        previous keystroke. See autocomplete.keystroke.
+
+        :param str fragment: The text typed so far.
+        """
+        return keystroke.KeystrokeSession(self, fragment)
+
+    def nextWords(self, previous, k=10):
+        """Returns list of candidates for the word after previous, before any
+        of its letters is typed: the words that followed previous in
+        training, ordered by how often they did, which is also their
+        confidence. Returns an empty list unless the provider counts bigrams.
+
+        :param str previous: The last word typed.
+        :param int k: Maximum number of candidates to return, or None for all.
+        """
+        if self.bigrams is None:
             return []
-        candidate_list = get_candidates(fragment, memory_node.memory)
-        if memory_node.confidence > 0:
-            candidate_list.append(cand.Candidate(fragment, 
-                                                 memory_node.confidence))
-        return sorted(candidate_list, key=lambda x: x.confidence, reverse=True)
+        previous = normalize(previous, self.unicode_letters)
+        if self.lock is None:
+            word_counts = self.bigrams.top_following(previous, k)
+        else:
+            with self.lock.reading():
+                word_counts = self.bigrams.top_following(previous, k)
+        Candidate = cand.Candidate
+        return [Candidate(word, count) for word, count in word_counts]
+
+    def _query_after(self, previous, fragment, k):
+        """Returns the candidates for a normalized fragment typed after the
+        normalized word previous: the words that followed previous, then the
+        other candidates of getWords.
+        """
+        if self.lock is None:
+            word_counts = self.bigrams.top_following(previous, k, fragment)
+        else:
+            with self.lock.reading():
+                word_counts = self.bigrams.top_following(previous, k, fragment)
+        Candidate = cand.Candidate
+        candidate_list = [Candidate(word, count)
+                          for word, count in word_counts]
+        if not fragment or (k is not None and len(candidate_list) >= k):
+            return candidate_list
+        followers = frozenset(word for word, _ in word_counts)
+        # At most len(followers) of the top k are dropped as duplicates.
+        for candidate in self.getWords(fragment, k):
+            if k is not None and len(candidate_list) >= k:
+                break
+            if candidate.getWord() not in followers:
+                candidate_list.append(candidate)
+        return candidate_list
+
+    def getFuzzyWords(self, fragment, k=10, max_edits=1, keyboard=None,
+                      max_nodes=fuzzy.MAX_NODES):
+        """Returns list of candidates whose beginning is within max_edits
+        typing mistakes of fragment, so a mistyped letter still gets
+        suggestions. Candidates are ordered by their confidence discounted for
+        every edit, see autocomplete.fuzzy. Results are not cached.
+
+        :param str fragment: The word fragment to be autocompleted.
+        :param int k: Maximum number of candidates to return, or None for all.
+        :param int max_edits: Maximum number of inserted, deleted, substituted
+        or swapped letters.
+        :param dict keyboard: Maps each key to a string of its neighbours, such
+        as autocomplete.fuzzy.QWERTY, so that hitting a neighbouring key costs
+        half an edit.
+        :param int max_nodes: Maximum number of nodes searched, which bounds
+        the latency of a query. The best candidates found within the budget
+        are returned.
+        """
+        fragment = normalize(fragment, self.unicode_letters)
+        if self.lock is None:
+            word_costs = fuzzy.top_word_costs(self, fragment, k, max_edits,
+                                              keyboard, max_nodes)
+        else:
+            with self.lock.reading():
+                word_costs = fuzzy.top_word_costs(self, fragment, k, max_edits,
+                                                  keyboard, max_nodes)
+        Candidate = cand.Candidate
+        return [Candidate(word, confidence) for word, confidence, _
+                in word_costs]
 
     def train(self, passage):
         """Trains the algorithm with the provided passage.
@@ -36,47 +287,818 @@ class AutocompleteProvider:
         :param str passage: Contains words that the autocomplete algorithm will
         use to train.
         """
-        word_list = preprocess(passage)
-        for word in word_list:
-            self.memory = memorize(self.memory, word)
+        word_list = preprocess(passage, self.unicode_letters)
+        pair_counts = None
+        if self.bigrams is not None:
+            pair_counts = bigram.count_pairs(word_list)
+        self._learn(collections.Counter(word_list), pair_counts)
+
+    def train_many(self, passages):
+        """Trains the algorithm with a batch of passages. Occurrences of each
+        word are counted over the whole batch first, so every distinct word is
+        memorized only once.
+
+        :param passages: Iterable of passages (str).
+        """
+        word_counts = collections.Counter()
+        pair_counts = None
+        if self.bigrams is not None:
+            pair_counts = collections.Counter()
+        for passage in passages:
+            word_list = preprocess(passage, self.unicode_letters)
+            word_counts.update(word_list)
+            if pair_counts is not None:
+                bigram.count_pairs(word_list, pair_counts)
+        self._learn(word_counts, pair_counts)
+
+    def train_counts(self, word_counts):
+        """Trains the algorithm with precomputed word counts, e.g. a Counter
+        built from a corpus. Words are tokenized the same way as passages in
+        train, so a key holding several words adds its count to each of them,
+        and words with a count below one are ignored.
+
+        :param word_counts: Mapping of word (str) to number of occurrences.
+        """
+        normalized_counts = collections.Counter()
+        for key, count in word_counts.items():
+            if count > 0:
+                for word in preprocess(key, self.unicode_letters):
+                    normalized_counts[word] += count
+        self._learn(normalized_counts)
+
+    def train_stream(self, chunks, batch_size=100000):
+        """Trains the algorithm with text arriving as an iterable of strings,
+        such as the lines of a file or blocks read from a socket. Words may be
+        split across consecutive chunks. Counts are memorized whenever
+        batch_size distinct words (or word pairs) are pending, so memory use
+        stays bounded regardless of the length of the stream.
+
+        :param chunks: Iterable of consecutive pieces of text (str).
+        :param int batch_size: Number of distinct words to count before they
+        are memorized.
+        """
+        word_counts = collections.Counter()
+        pair_counts = None
+        if self.bigrams is not None:
+            pair_counts = collections.Counter()
+        last_word = []
+        for word_list in stream_preprocess(chunks, self.unicode_letters):
+            word_counts.update(word_list)
+            if pair_counts is not None:
+                # The stream is one text, so pairs span chunk boundaries.
+                bigram.count_pairs(last_word + word_list, pair_counts)
+                last_word = word_list[-1:] or last_word
+            if (len(word_counts) >= batch_size or
+                    pair_counts is not None and
+                    len(pair_counts) >= batch_size):
+                self._learn(word_counts, pair_counts)
+                word_counts = collections.Counter()
+                if pair_counts is not None:
+                    pair_counts = collections.Counter()
+        if word_counts:
+            self._learn(word_counts, pair_counts)
+
+    def train_file(self, path, chunk_size=65536, batch_size=100000):
+        """Trains the algorithm with the text of a file, reading chunk_size
+        characters at a time.
+
+        :param str path: Path of the text file.
+        :param int chunk_size: Number of characters read at a time.
+        :param int batch_size: Number of distinct words to count before they
+        are memorized.
+        """
+        with open(path) as passage_file:
+            self.train_stream(read_chunks(passage_file, chunk_size),
+                              batch_size)
+
+    def _learn(self, word_counts, pair_counts=None):
+        """Memorizes normalized words with their number of occurrences. All
+        training methods funnel through here.
+
+        :param word_counts: Mapping of normalized word (str) to a positive
+        number of occurrences.
+        :param pair_counts: Mapping of pairs of consecutive normalized words to
+        their number of occurrences, added to the bigrams if they are counted.
+        """
+        if self.instrumentation is not None:
+            self.instrumentation.learn(self, word_counts, pair_counts)
+        else:
+            self._locked_learn(word_counts, pair_counts)
+
+    def _locked_learn(self, word_counts, pair_counts=None):
+        """Implements _learn without instrumentation.
+        """
+        if self.lock is None:
+            self._learn_unlocked(word_counts, pair_counts)
+        else:
+            with self.lock.writing():
+                self._learn_unlocked(word_counts, pair_counts)
+
+    def _learn_unlocked(self, word_counts, pair_counts=None):
+        """Implements _learn without locking.
+        """
+        retention = self.retention
+        if retention is not None:
+            tokens = sum(word_counts.values())
+            retention.before_learning(self, tokens)
+        training_log = self.training_log
+        if training_log is not None:
+            training_log.log_counts(word_counts)
+        cache = self.cache
+        top_lists = self.top_lists
+        for word, count in word_counts.items():
+            self._memorize(word, count)
+            if cache is not None:
+                cache.invalidate(word)
+            if top_lists is not None:
+                top_lists.update(word, self._confidence(word))
+        if pair_counts and self.bigrams is not None:
+            self.bigrams.add(pair_counts)
+        self.version += 1
+        if self.deltas is not None:
+            self.deltas.record(self.version, word_counts)
+        if training_log is not None:
+            training_log.after_change(self)
+        if retention is not None:
+            retention.after_learning(self, tokens)
+
+    def train_parallel(self, passages, processes=None, chunk_size=1000):
+        """Trains the algorithm with a batch of passages, counting words in a
+        pool of worker processes. See autocomplete.parallel.
+
+        :param passages: Iterable of passages (str).
+        :param int processes: Number of worker processes. Defaults to the
+        number of CPUs.
+        :param int chunk_size: Number of passages sent to a worker at a time.
+        """
+        from autocomplete import parallel
+        parallel.train_parallel(self, passages, processes, chunk_size)
+
+    def merge(self, other):
+        """Adds the memory of another provider to this one, summing the
+        confidences of words memorized by both. When both providers use the
+        dictionary engine their memories are merged node by node.
+
+        :param AutocompleteProvider other: The provider to be merged in. It is
+        not modified.
+        """
+        if self.lock is None:
+            self._merge_unlocked(other)
+        else:
+            with self.lock.writing():
+                self._merge_unlocked(other)
+
+    def _merge_unlocked(self, other):
+        """Implements merge without locking.
+        """
+        if self.retention is not None:
+            self.retention.before_learning(self, 0)
+        other_counts = None
+        if self.training_log is not None or self.deltas is not None:
+            other_counts = dict(other.iter_words())
+        if self.training_log is not None:
+            self.training_log.log_counts(other_counts)
+        self._merge_memory(other)
+        if self.bigrams is not None and other.bigrams is not None:
+            self.bigrams.merge(other.bigrams)
+        if self.cache is not None:
+            self.cache.clear()
+        self._rebuild_top_lists()
+        self.version += 1
+        if self.deltas is not None:
+            self.deltas.record(self.version, other_counts)
+        if self.training_log is not None:
+            self.training_log.after_change(self)
+        if self.retention is not None:
+            self.retention.after_learning(self, 0, check_budget=True)
+
+    def export_delta(self, since_version=None):
+        """Returns a delta holding the word counts this provider was trained
+        or merged with after since_version, for apply_delta on another
+        provider. Read the version it ends at, the since_version of the next
+        export, with autocomplete.delta.decode. Throws ValueError without
+        delta_history or if the history no longer reaches back to
+        since_version.
+
+        :param int since_version: A version of this provider, such as the end
+        of the previous delta. By default the delta starts where the history
+        starts, as the first delta of a new epoch must.
+        """
+        if self.deltas is None:
+            raise ValueError('deltas are only kept with delta_history')
+        if self.lock is None:
+            return self._export_delta_unlocked(since_version)
+        with self.lock.reading():
+            return self._export_delta_unlocked(since_version)
+
+    def _export_delta_unlocked(self, since_version):
+        """Implements export_delta without locking.
+        """
+        from autocomplete import delta
+        deltas = self.deltas
+        if since_version is None:
+            since_version = deltas.start_version
+        word_counts = deltas.counts_since(since_version, self.version)
+        return delta.encode(deltas.epoch, deltas.start_version, since_version,
+                            self.version, word_counts, self.unicode_letters)
+
+    def apply_delta(self, blob):
+        """Adds the word counts of a delta exported by another provider, as
+        training would, and returns the number of distinct words. They are
+        not kept for export_delta, so deltas are not sent back. Throws
+        ValueError unless the delta starts where the last one applied from
+        the same sender epoch ended, or where the history of a new epoch
+        starts, so a delta is not applied twice and a delta computed before
+        its sender restarted is rejected. Which deltas were applied is not
+        saved by a training log.
+
+        :param bytes blob: A delta made by export_delta.
+        """
+        from autocomplete import delta
+        epoch, start_version, since_version, version, word_counts = \
+            delta.decode(blob)
+        if self.lock is None:
+            self._apply_delta_unlocked(epoch, start_version, since_version,
+                                       version, word_counts)
+        else:
+            with self.lock.writing():
+                self._apply_delta_unlocked(epoch, start_version,
+                                           since_version, version, word_counts)
+        return len(word_counts)
+
+    def _apply_delta_unlocked(self, epoch, start_version, since_version,
+                              version, word_counts):
+        """Implements apply_delta without locking.
+        """
+        applied_version = self.applied_deltas.get(epoch, start_version)
+        if since_version != applied_version:
+            raise ValueError('the delta starts after version %d of its '
+                             'sender, but version %d was applied last' %
+                             (since_version, applied_version))
+        deltas = self.deltas
+        self.deltas = None
+        try:
+            self._learn_unlocked(word_counts)
+        finally:
+            self.deltas = deltas
+        self.applied_deltas[epoch] = version
+
+    def decay(self, factor):
+        """Multiplies the confidence of every word by factor, rounding down,
+        so that old training counts less than recent training. Words whose
+        confidence drops to zero are forgotten and their branches removed.
+        Returns the number of words forgotten.
+
+        :param float factor: Decay factor between 0 and 1.
+        """
+        if not 0 <= factor <= 1:
+            raise ValueError('decay factor must be between 0 and 1')
+        if self.lock is None:
+            return self._decay_unlocked(factor)
+        with self.lock.writing():
+            return self._decay_unlocked(factor)
+
+    def _decay_unlocked(self, factor):
+        """Implements decay without locking.
+        """
+        if self.training_log is not None:
+            self.training_log.log_decay(factor)
+        removed = self._rescale(factor)
+        if self.bigrams is not None:
+            self.bigrams.rescale(factor)
+        if self.cache is not None:
+            self.cache.clear()
+        self._rebuild_top_lists()
+        self.version += 1
+        if self.training_log is not None:
+            self.training_log.after_change(self)
+        return removed
+
+    def prune(self, min_confidence=1, max_words=None):
+        """Forgets the words with a confidence below min_confidence and, with
+        max_words, every word but the max_words most confident ones (ties are
+        kept alphabetically). Branches left without words are removed.
+        Returns the number of words forgotten.
+
+        :param int min_confidence: Lowest confidence of a word that is kept.
+        :param int max_words: Maximum number of words kept.
+        """
+        if self.lock is None:
+            return self._prune_unlocked(min_confidence, max_words)
+        with self.lock.writing():
+            return self._prune_unlocked(min_confidence, max_words)
+
+    def _prune_unlocked(self, min_confidence=1, max_words=None):
+        """Implements prune without locking.
+        """
+        if self.training_log is not None:
+            self.training_log.log_prune(min_confidence, max_words)
+        forget = frozenset()
+        if max_words is not None:
+            ranked = rank_word_counts(self.iter_words())
+            forget = frozenset(word for word, _ in ranked[max_words:])
+        removed = self._rescale(1, min_confidence, forget)
+        if self.bigrams is not None and removed:
+            self.bigrams.rescale(1, frozenset(word for word, _
+                                              in self.iter_words()))
+        if self.cache is not None:
+            self.cache.clear()
+        if removed:
+            self._rebuild_top_lists()
+        self.version += 1
+        if self.training_log is not None:
+            self.training_log.after_change(self)
+        return removed
+
+    def node_count(self):
+        """Returns the number of letter nodes in memory.
+        """
+        count = 0
+        stack = [self.memory]
+        while stack:
+            memory = stack.pop()
+            count += len(memory)
+            stack.extend(node.memory for node in itervalues(memory)
+                         if node.memory)
+        return count
+
+    def cache_stats(self):
+        """Returns the hit, miss, eviction and invalidation counters of the
+        getWords cache, or None when the cache is disabled.
+        """
+        if self.cache is None:
+            return None
+        return self.cache.stats()
+
+    def instrument(self, callback=None, profile=False):
+        """Starts recording latency histograms and work counters for getWords
+        and training calls, and returns the autocomplete.instrumentation
+        Instrumentation object holding them. Until this is called, a provider
+        only checks that instrumentation is disabled.
+
+        :param callback: Called with a dictionary describing every getWords
+        and training call.
+        :param bool profile: Run every call under a cProfile profiler, see
+        Instrumentation.profile_stats.
+        """
+        from autocomplete import instrumentation
+        self.instrumentation = instrumentation.Instrumentation(
+            callback, profile, self.lock is not None)
+        return self.instrumentation
+
+    def stop_instrumenting(self):
+        """Stops recording getWords and training calls.
+        """
+        self.instrumentation = None
+
+    def stats(self):
+        """Returns a dictionary describing the memory (number of words, letter
+        nodes and the depth of the deepest word), the cache, retention and
+        bigram counters, the memory used by precomputed top-k lists, the
+        training log and delta history counters and, when instrumentation is
+        enabled, the recorded calls. Walks every memorized word, so it is not
+        meant for the request path.
+        """
+        if self.lock is None:
+            return self._stats()
+        with self.lock.reading():
+            return self._stats()
+
+    def _stats(self):
+        """Implements stats without locking.
+        """
+        word_count = 0
+        depth = 0
+        for word, _ in self.iter_words():
+            word_count += 1
+            if len(word) > depth:
+                depth = len(word)
+        instrumentation = self.instrumentation
+        return {'words': word_count,
+                'nodes': self.node_count(),
+                'depth': depth,
+                'cache': self.cache_stats(),
+                'retention': (self.retention.stats()
+                              if self.retention is not None else None),
+                'bigrams': (self.bigrams.stats()
+                            if self.bigrams is not None else None),
+                'precomputed': (self.top_lists.stats()
+                                if self.top_lists is not None else None),
+                'training_log': (self.training_log.stats()
+                                 if self.training_log is not None else None),
+                'deltas': (self.deltas.stats()
+                           if self.deltas is not None else None),
+                'calls': (instrumentation.stats()
+                          if instrumentation is not None else None)}
+
+    def save(self, path):
+        """Writes the memory to a compact binary snapshot file. Bigram counts
+        are not saved. See the autocomplete.snapshot module for the format.
+
+        :param str path: Path of the snapshot file.
+        """
+        from autocomplete import snapshot
+        if self.lock is None:
+            snapshot.save(self, path)
+        else:
+            with self.lock.reading():
+                snapshot.save(self, path)
+
+    @classmethod
+    def load(cls, path, mmap=False, **options):
+        """Returns a provider holding the memory saved in a snapshot file. With
+        mmap the snapshot is served read-only straight from a memory-mapped
+        file instead of being loaded into a new provider of this class.
+
+        :param str path: Path of the snapshot file.
+        :param bool mmap: Serve the snapshot from a memory-mapped file.
+        :param options: Other keyword arguments of the provider constructor,
+        such as cache_size.
+        """
+        from autocomplete import snapshot
+        return snapshot.load(path, mmap, cls, **options)
+
+    def iter_words(self):
+        """Generates a (word, confidence) pair for every memorized word.
+        """
+        return iter_word_counts('', self.memory)
+
+    def _locked_query(self, fragment, k=None, trace=None):
+        """Returns the candidates for a normalized fragment under the read
+        lock. Used by instrumentation; getWords inlines it.
+        """
+        if self.lock is None:
+            return self._cached_query(fragment, k, trace)
+        with self.lock.reading():
+            return self._cached_query(fragment, k, trace)
+
+    def _cached_query(self, fragment, k=None, trace=None):
+        """Returns the candidates for a normalized fragment, from the cache
+        when possible.
+
+        :param str fragment: Normalized word fragment.
+        :param int k: Maximum number of candidates to return, or None for all.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        cache = self.cache
+        if cache is None:
+            return self._query(fragment, k, trace)
+        candidate_list = cache.get(fragment, k)
+        if candidate_list is None:
+            candidate_list = self._query(fragment, k, trace)
+            cache.put(fragment, k, candidate_list)
+        elif trace is not None:
+            trace.cache_hit = True
+        return list(candidate_list)
+
+    def _query(self, fragment, k=None, trace=None):
+        """Returns the candidates for a normalized fragment, bypassing the
+        cache.
+
+        :param str fragment: Normalized word fragment.
+        :param int k: Maximum number of candidates to return, or None for all.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        if k is not None:
+            word_counts = None
+            if self.top_lists is not None:
+                word_counts = self.top_lists.get(fragment, k)
+            if word_counts is None:
+                word_counts = self._top_word_counts(fragment, k, trace)
+        else:
+            word_counts = rank_word_counts(self._word_counts(fragment, trace))
+        # Candidates are only built for the results, after ranking.
+        Candidate = cand.Candidate
+        return [Candidate(word, confidence)
+                for word, confidence in word_counts]
+
+    def _rebuild_top_lists(self):
+        """Recomputes the precomputed top-k lists from every word, after the
+        memory was replaced or confidences were lowered.
+        """
+        if self.top_lists is not None:
+            self.top_lists.rebuild(self.iter_words())
+
+    def _create_memory(self):
+        """Creates the empty storage engine.
+        """
+        self.memory = {}
+
+    def _memorize(self, word, count=1):
+        """Adds a single preprocessed word to the storage engine.
+
+        :param str word: The word to be added.
+        :param int count: Number of occurrences of the word.
+        """
+        self.memory = memorize(self.memory, word, count)
+
+    def _merge_memory(self, other):
+        """Adds the memory of other to the storage engine. Engines without a
+        structural merge memorize the words of other one at a time.
+
+        :param AutocompleteProvider other: The provider to be merged in.
+        """
+        memory = getattr(self, 'memory', None)
+        other_memory = getattr(other, 'memory', None)
+        if isinstance(memory, dict) and isinstance(other_memory, dict):
+            merge_memory(memory, other_memory)
+        else:
+            for word, confidence in other.iter_words():
+                self._memorize(word, confidence)
 
+    def _rescale(self, factor=1, min_confidence=1, forget=frozenset()):
+        """Multiplies every confidence by factor, rounding down, and forgets
+        the words whose confidence falls below min_confidence or that are in
+        forget. Returns the number of words forgotten. Engines without an
+        in-place rescale are rebuilt from the surviving words.
+
+        :param float factor: Decay factor between 0 and 1.
+        :param int min_confidence: Lowest confidence of a word that is kept.
+        :param forget: Set of words to forget.
+        """
+        if isinstance(getattr(self, 'memory', None), dict):
+            return rescale_memory(self.memory, factor, min_confidence, forget)
+        kept = []
+        removed = 0
+        for word, confidence in self.iter_words():
+            if factor != 1:
+                confidence = int(confidence * factor)
+            if confidence < min_confidence or word in forget:
+                removed += 1
+            else:
+                kept.append((word, confidence))
+        self._create_memory()
+        for word, confidence in kept:
+            self._memorize(word, confidence)
+        return removed
+
+    def _root_node(self):
+        """Returns the root of the memory for walking it letter by letter with
+        _child_nodes and _node_counts. Each engine has its own kind of node.
+        """
+        return MemoryNode(self.memory, 0)
+
+    def _child_nodes(self, node):
+        """Returns (letter, child node) pairs for the children of a node.
+
+        :param node: A node from _root_node or _child_nodes.
+        """
+        return iteritems(node.memory) if node.memory else ()
+
+    def _node_counts(self, node):
+        """Returns the confidence of the word ending at a node and the highest
+        confidence at or below it.
+
+        :param node: A node from _root_node or _child_nodes.
+        """
+        return node.confidence, node.max_confidence
+
+    def _child_node(self, node, letter):
+        """Returns the child of a node reached by letter, or None.
+
+        :param node: A node from _root_node or _child_node.
+        :param str letter: The next letter.
+        """
+        return node.memory.get(letter) if node.memory else None
+
+    def _confidence(self, word):
+        """Returns the confidence of a memorized word, or 0. Works for every
+        engine through _child_node.
+
+        :param str word: Normalized word.
+        """
+        node = self._root_node()
+        for letter in word:
+            node = self._child_node(node, letter)
+            if node is None:
+                return 0
+        return self._node_counts(node)[0]
+
+    def _word_counts(self, fragment, trace=None):
+        """Returns an unordered list of (word, confidence) pairs for every
+        word starting with fragment, including the fragment itself when it is
+        a memorized word.
+
+        :param str fragment: Normalized word fragment.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        if not fragment:
+            return []
+        try:
+            memory_node = get_bottom_node(fragment, self.memory)
+        except KeyError:  # occurs when fragment has never been seen before
+            return []
+        return self._word_counts_at(memory_node, fragment, trace)
+
+    def _word_counts_at(self, memory_node, fragment, trace=None):
+        """Returns _word_counts(fragment) given the node fragment leads to,
+        so callers that already walked to it do not walk again.
+
+        :param memory_node: The node at the end of the fragment path, from
+        _child_node.
+        :param str fragment: Normalized, non-empty word fragment.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        word_counts = list(iter_word_counts(fragment, memory_node.memory,
+                                            trace))
+        if memory_node.confidence > 0:
+            word_counts.append((fragment, memory_node.confidence))
+        if trace is not None:  # the bottom node itself
+            trace.record(1, 1 if memory_node.confidence > 0 else 0)
+        return word_counts
+
+    def _top_word_counts(self, fragment, k, trace=None):
+        """Returns (word, confidence) pairs for the k most confident words
+        starting with fragment, ordered by confidence and then alphabetically.
+
+        :param str fragment: Normalized word fragment.
+        :param int k: Maximum number of words to return.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        if not fragment:
+            return []
+        try:
+            memory_node = get_bottom_node(fragment, self.memory)
+        except KeyError:
+            return []
+        return get_top_word_counts(fragment, memory_node, k, trace)
+
+    def _top_word_counts_at(self, memory_node, fragment, k, trace=None):
+        """Returns _top_word_counts(fragment, k) given the node fragment leads
+        to.
+
+        :param memory_node: The node at the end of the fragment path, from
+        _child_node.
+        :param str fragment: Normalized, non-empty word fragment.
+        :param int k: Maximum number of words to return.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        return get_top_word_counts(fragment, memory_node, k, trace)
 
-class MemoryNode:
+
+class MemoryNode(object):
     """Used by AutocompleteProvider to store the confidence and next memorizied
-    letters of the key (a letter).
+    letters of the key (a letter). The max_confidence attribute holds the
+    highest confidence of any word ending at or below the node. Instances have
+    slots instead of a __dict__, since there is one per memorized letter.
     """
 
+    __slots__ = ('memory', 'confidence', 'max_confidence')
+
     def __init__(self, memory=None, confidence=None):
         """Initalizes MemoryNode object.
         """
         self.memory = memory
         self.confidence = confidence
+        self.max_confidence = confidence or 0
+        if memory:
+            for node in itervalues(memory):
+                if node.max_confidence > self.max_confidence:
+                    self.max_confidence = node.max_confidence
 
     def __eq__(self, other):
         """Determines if two instances are equal. Overrides the default 
         implementation.
         """
         if isinstance(self, other.__class__):
-            return self.__dict__ == other.__dict__
+            return (self.confidence == other.confidence and
+                    self.max_confidence == other.max_confidence and
+                    self.memory == other.memory)
         return False
 
+    def __ne__(self, other):
+        return not self == other
 
-def get_candidates(fragment, memory):
+
+def get_candidates(fragment, memory, trace=None):
     """Iterates through memory and returns a list of candidate words that have 
     positive confidence. 
 
     :param str fragment: The word prefix that procedes the letter keys in the 
     memory dictionary.
     :param dict memory: contains memory of words.
+    :param QueryTrace trace: Collects the work done, when instrumented.
+    """
+    Candidate = cand.Candidate
+    return [Candidate(word, confidence) for word, confidence
+            in iter_word_counts(fragment, memory, trace)]
+
+
+def iter_candidates(fragment, memory, trace=None):
+    """Generates the candidate words in memory that have positive confidence,
+    in the same depth-first order as get_candidates.
+
+    :param str fragment: The word prefix that procedes the letter keys in the 
+    memory dictionary.
+    :param dict memory: contains memory of words.
+    :param QueryTrace trace: Collects the work done once the generator is
+    exhausted, when instrumented.
+    """
+    Candidate = cand.Candidate
+    for word, confidence in iter_word_counts(fragment, memory, trace):
+        yield Candidate(word, confidence)
+
+
+def iter_word_counts(fragment, memory, trace=None):
+    """Generates a (word, confidence) pair for every word in memory that has
+    positive confidence, depth-first. Uses an explicit stack of nodes instead
+    of recursion, so arbitrarily long words do not hit the recursion limit,
+    and follows a chain of only children without touching the stack. This is
+    the traversal behind getWords, get_candidates and iter_words.
+
+    :param str fragment: The word prefix that procedes the letter keys in the 
+    memory dictionary.
+    :param dict memory: contains memory of words.
+    :param QueryTrace trace: Collects the work done once the generator is
+    exhausted, when instrumented.
+    """
+    stack = [(fragment + letter, node)
+             for letter, node in list(memory.items())[::-1]]
+    push = stack.append
+    pop = stack.pop
+    visited = len(stack)
+    generated = 0
+    while stack:
+        word, node = pop()
+        while True:
+            confidence = node.confidence
+            if confidence > 0:
+                generated += 1
+                yield word, confidence
+            children = node.memory
+            if not children:
+                break
+            visited += len(children)
+            if len(children) == 1:
+                (letter, node), = children.items()
+                word += letter
+                continue
+            # Later siblings wait on the stack; the first is visited next.
+            children = list(children.items())
+            for letter, child in children[:0:-1]:
+                push((word + letter, child))
+            letter, node = children[0]
+            word += letter
+    if trace is not None:
+        trace.record(visited, generated)
+
+
+def get_top_candidates(fragment, memory_node, k, trace=None):
+    """Returns the k candidates below memory_node with the highest confidence,
+    ordered by confidence and then alphabetically.
+
+    :param str fragment: The word fragment that leads to memory_node.
+    :param MemoryNode memory_node: The node at the end of the fragment path.
+    :param int k: Maximum number of candidates to return.
+    :param QueryTrace trace: Collects the work done, when instrumented.
+    """
+    return [cand.Candidate(word, confidence) for word, confidence
+            in get_top_word_counts(fragment, memory_node, k, trace)]
+
+
+def get_top_word_counts(fragment, memory_node, k, trace=None):
+    """Returns (word, confidence) pairs for the k words below memory_node with
+    the highest confidence, ordered by confidence and then alphabetically.
+    Uses a best-first search guided by max_confidence so only the branches
+    that can still contribute to the result are expanded.
+
+    :param str fragment: The word fragment that leads to memory_node.
+    :param MemoryNode memory_node: The node at the end of the fragment path.
+    :param int k: Maximum number of words to return.
+    :param QueryTrace trace: Collects the work done, when instrumented.
     """
-    candidate_list = []
-    for letter, node in memory.iteritems():
-        new_fragment = fragment + letter
+    visited = generated = 0
+    word_counts = []
+    # Entries are (-priority, word, is_word, node). A node's word is a prefix
+    # of every word below it, so equal priorities expand nodes before emitting
+    # alphabetically larger words.
+    heap = [(-memory_node.max_confidence, fragment, False, memory_node)]
+    while heap and len(word_counts) < k:
+        priority, word, is_word, node = heapq.heappop(heap)
+        if is_word:
+            word_counts.append((word, -priority))
+            continue
+        visited += 1
         if node.confidence > 0:
-            candidate_list.append(cand.Candidate(new_fragment, node.confidence))
-        if node.memory:
-            candidate_list += get_candidates(new_fragment, node.memory)
-    return candidate_list
+            generated += 1
+            heapq.heappush(heap, (-node.confidence, word, True, None))
+        for letter, child in iteritems(node.memory):
+            if child.max_confidence > 0:
+                heapq.heappush(heap, (-child.max_confidence, word + letter,
+                                      False, child))
+    if trace is not None:
+        trace.record(visited, generated)
+    return word_counts
+
+
+def rank_word_counts(word_counts):
+    """Returns (word, confidence) pairs ordered by confidence and then
+    alphabetically, the order of the k most confident words, so full lists
+    do not depend on the order the memory is walked in.
+
+    :param word_counts: Iterable of (word, confidence) pairs.
+    """
+    return sorted(word_counts, key=lambda x: (-x[1], x[0]))
 
 
 def get_bottom_node(fragment, memory):
@@ -93,27 +1115,171 @@ def get_bottom_node(fragment, memory):
     return memory_node
 
 
-def memorize(memory, word):
+def memorize(memory, word, count=1):
     """Adds a single word to memory.
 
     :param dict memory: memory dictionary that the word will be added to.
     :param str word: the word fragment to be added to memory.
+    :param int count: number of occurrences of the word.
     """
-    letter = word[0]
-    word = word[1:]
-    memory_node = memory.get(letter, MemoryNode({}, 0))
-    if word:
-        memory_node.memory = memorize(memory_node.memory, word)
-    else:
-        memory_node.confidence += 1
-    memory[letter] = memory_node
+    path = []
+    node_memory = memory
+    for letter in word:
+        memory_node = node_memory.get(letter)
+        if memory_node is None:
+            memory_node = node_memory[letter] = MemoryNode({}, 0)
+        path.append(memory_node)
+        node_memory = memory_node.memory
+    memory_node.confidence += count
+    confidence = memory_node.confidence
+    for memory_node in path:
+        if memory_node.max_confidence < confidence:
+            memory_node.max_confidence = confidence
     return memory
 
 
-def preprocess(passage):
+def merge_memory(memory, other_memory):
+    """Adds the confidences in other_memory to memory node by node, creating
+    the nodes memory lacks, and updates max_confidence on every node touched.
+    other_memory is not modified. Returns memory.
+
+    :param dict memory: memory dictionary that is merged into.
+    :param dict other_memory: memory dictionary that is merged in.
+    """
+    touched = []
+    stack = [(memory, other_memory)]
+    while stack:
+        node_memory, other_node_memory = stack.pop()
+        for letter, other_node in iteritems(other_node_memory):
+            memory_node = node_memory.get(letter)
+            if memory_node is None:
+                memory_node = node_memory[letter] = MemoryNode({}, 0)
+            memory_node.confidence += other_node.confidence
+            touched.append(memory_node)
+            if other_node.memory:
+                stack.append((memory_node.memory, other_node.memory))
+    for memory_node in reversed(touched):  # children before their parents
+        max_confidence = memory_node.confidence
+        for node in itervalues(memory_node.memory):
+            if node.max_confidence > max_confidence:
+                max_confidence = node.max_confidence
+        memory_node.max_confidence = max_confidence
+    return memory
+
+
+def rescale_memory(memory, factor=1, min_confidence=1, forget=frozenset()):
+    """Multiplies every confidence in memory by factor, rounding down, and
+    forgets the words whose confidence falls below min_confidence or that are
+    in forget. Nodes left without words below them are removed and
+    max_confidence is recomputed. Returns the number of words forgotten.
+
+    :param dict memory: memory dictionary that is rescaled.
+    :param float factor: Decay factor between 0 and 1.
+    :param int min_confidence: Lowest confidence of a word that is kept.
+    :param forget: Set of words to forget.
+    """
+    removed = 0
+    order = []
+    stack = [('', memory)]
+    while stack:
+        prefix, node_memory = stack.pop()
+        order.append((prefix, node_memory))
+        for letter, node in iteritems(node_memory):
+            if node.memory:
+                stack.append((prefix + letter, node.memory))
+    for prefix, node_memory in reversed(order):  # children before parents
+        for letter in list(node_memory):
+            node = node_memory[letter]
+            confidence = node.confidence
+            if confidence > 0:
+                if factor != 1:
+                    confidence = int(confidence * factor)
+                if confidence < min_confidence or (forget and
+                                                   prefix + letter in forget):
+                    confidence = 0
+                    removed += 1
+                node.confidence = confidence
+            max_confidence = confidence
+            for child in itervalues(node.memory):
+                if child.max_confidence > max_confidence:
+                    max_confidence = child.max_confidence
+            if max_confidence > 0:
+                node.max_confidence = max_confidence
+            else:
+                del node_memory[letter]
+    return removed
+
+
+def normalize(fragment, unicode_letters=False):
+    """Returns the fragment in lowercase without punctuation.
+
+    :param str fragment: The word fragment to be normalized.
+    :param bool unicode_letters: Remove all Unicode punctuation and symbols
+    instead of only ASCII punctuation.
+    """
+    return tokenizer.normalize(fragment, unicode_letters)
+
+
+def preprocess(passage, unicode_letters=False):
     """Preprocesses a passage for training in the AutocompleteProvider class. 
     Returns a list of lowercase words without punctuation.
 
     :param str passage: The passage of words to be preprocessed.
+    :param bool unicode_letters: Remove all Unicode punctuation and symbols
+    instead of only ASCII punctuation.
+    """
+    return tokenizer.tokenize(passage, unicode_letters)
+
+
+def stream_preprocess(chunks, unicode_letters=False, max_word_length=65536):
+    """Generates a list of preprocessed words for each chunk of text. A word
+    that runs over the end of a chunk is held back and joined with the start
+    of the next chunk. Only the new chunk is searched for whitespace, and a
+    held back word longer than max_word_length characters is preprocessed
+    without waiting for its end, so text without whitespace takes linear time
+    and bounded memory.
+
+    :param chunks: Iterable of consecutive pieces of text (str).
+    :param bool unicode_letters: Remove all Unicode punctuation and symbols
+    instead of only ASCII punctuation.
+    :param int max_word_length: Number of characters held back at most.
+    """
+    carry = []  # pieces of the word running over the end of the last chunk
+    carried = 0
+    empty = ''
+    for chunk in chunks:
+        if not chunk:
+            continue
+        empty = chunk[:0]
+        if chunk[-1:].isspace():
+            end = len(chunk)
+        else:  # rsplit searches from the end, splitting like preprocess
+            end = len(chunk) - len(chunk.rsplit(None, 1)[-1])
+        if not end:
+            carry.append(chunk)
+            carried += len(chunk)
+            if carried > max_word_length:
+                yield preprocess(empty.join(carry), unicode_letters)
+                carry = []
+                carried = 0
+            continue
+        carry.append(chunk[:end])
+        yield preprocess(empty.join(carry), unicode_letters)
+        carry = [chunk[end:]]
+        carried = len(chunk) - end
+    if carried:
+        yield preprocess(empty.join(carry), unicode_letters)
+
+
+def read_chunks(passage_file, chunk_size=65536):
+    """Generates consecutive chunks of at most chunk_size characters read
+    from an open file.
+
+    :param passage_file: File object opened for reading.
+    :param int chunk_size: Number of characters read at a time.
     """
-    return passage.translate(None, string.punctuation).lower().split()
+    while True:
+        chunk = passage_file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,81 @@
+"""Compares getWordsBatch with one getWords call per fragment when every
+prefix of every word typed in a few passages is completed, as when replaying
+keystrokes.
+
+Run with `python -m autocomplete.benchmarks.batch_benchmark`.
+"""
+
+import argparse
+import timeit
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import radix_autocomplete_provider as radix
+from autocomplete.benchmarks import corpus
+
+ENGINES = [('dict', auto.AutocompleteProvider),
+           ('radix', radix.RadixAutocompleteProvider),
+           ('array', array_auto.ArrayAutocompleteProvider)]
+
+
+def typed_prefixes(passages):
+    """Returns every prefix of every word of passages, in typing order.
+
+    :param list passages: The typed passages.
+    """
+    return [word[:length] for passage in passages for word in passage.split()
+            for length in range(1, len(word) + 1)]
+
+
+def compare(token_count=200000, vocabulary_size=20000, typed_words=2000,
+            ks=(10, None), repeat=3):
+    """Trains each engine on a Zipf corpus and returns a list of result
+    dictionaries, one per (engine, k) pair, with the best seconds taken by
+    per-fragment calls and by one batch call over the same fragments.
+
+    :param int token_count: Number of training words.
+    :param int vocabulary_size: Number of distinct training words.
+    :param int typed_words: Number of words whose prefixes are completed.
+    :param tuple ks: Values of k to measure.
+    :param int repeat: Number of timings to take the best of.
+    """
+    passages = corpus.zipf_passages(token_count, vocabulary_size)
+    typed = corpus.zipf_passages(typed_words, vocabulary_size, seed=1)
+    fragments = typed_prefixes(typed)
+    results = []
+    for name, provider_class in ENGINES:
+        alg = provider_class()
+        alg.train_many(passages)
+        for k in ks:
+            single = min(timeit.repeat(
+                lambda: [alg.getWords(fragment, k) for fragment in fragments],
+                repeat=repeat, number=1))
+            batch = min(timeit.repeat(
+                lambda: alg.getWordsBatch(fragments, k),
+                repeat=repeat, number=1))
+            results.append({'engine': name, 'k': k,
+                            'fragments': len(fragments),
+                            'distinct': len(set(fragments)),
+                            'single_seconds': single,
+                            'batch_seconds': batch})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=200000)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--typed', type=int, default=2000)
+    args = parser.parse_args()
+    print('%6s %5s %9s %9s %10s %10s %7s' % (
+        'engine', 'k', 'fragments', 'distinct', 'single ms', 'batch ms',
+        'speedup'))
+    for result in compare(args.tokens, args.vocabulary, args.typed):
+        print('%6s %5s %9d %9d %10.1f %10.1f %6.1fx' % (
+            result['engine'], result['k'], result['fragments'],
+            result['distinct'], 1000 * result['single_seconds'],
+            1000 * result['batch_seconds'],
+            result['single_seconds'] / result['batch_seconds']))
+
+
+if __name__ == '__main__':
+    main()
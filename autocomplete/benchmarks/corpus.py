@@ -0,0 +1,81 @@
+"""Contains helpers for building benchmark corpora and measuring the memory
+used by autocomplete providers.
+"""
+
+import bisect
+import random
+import sys
+
+SYLLABLES = ['a', 'e', 'i', 'o', 'u', 'an', 'ar', 'at', 'co', 'de', 'en',
+             'er', 'ing', 'ion', 'le', 'ma', 'ne', 'or', 'pro', 're', 'st',
+             'th', 'ti', 'to', 'un', 'ver']
+
+
+def synthetic_words(count, seed=0):
+    """Returns a list of count distinct pseudo-words built from common
+    syllables, so that words share prefixes like a natural vocabulary.
+
+    :param int count: Number of distinct words to generate.
+    :param int seed: Seed of the random number generator.
+    """
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < count:
+        length = rng.randint(1, 5)
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(length)))
+    return sorted(words)
+
+
+def zipf_passages(token_count, vocabulary_size, exponent=1.0,
+                  words_per_passage=100, seed=0):
+    """Returns a list of passages whose words follow a Zipf distribution: the
+    word of frequency rank r is drawn with probability proportional to
+    1 / r ** exponent, as in natural language text.
+
+    :param int token_count: Total number of words in all passages.
+    :param int vocabulary_size: Number of distinct words to draw from.
+    :param float exponent: Exponent of the Zipf distribution.
+    :param int words_per_passage: Number of words in each passage.
+    :param int seed: Seed of the random number generator.
+    """
+    rng = random.Random(seed)
+    vocabulary = synthetic_words(vocabulary_size, seed)
+    rng.shuffle(vocabulary)  # ranks must not follow alphabetical order
+    cumulative = []
+    total = 0.0
+    for rank in range(1, vocabulary_size + 1):
+        total += 1.0 / rank ** exponent
+        cumulative.append(total)
+    tokens = [vocabulary[bisect.bisect(cumulative, rng.random() * total)]
+              for _ in range(token_count)]
+    return [' '.join(tokens[i:i + words_per_passage])
+            for i in range(0, token_count, words_per_passage)]
+
+
+def deep_getsizeof(obj):
+    """Returns the approximate number of bytes used by obj and every object
+    reachable from it through containers and instance attributes. Objects
+    shared between several references are counted once.
+
+    :param obj: The object to measure.
+    """
+    seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        if hasattr(obj, '__dict__'):
+            stack.append(obj.__dict__)
+        for name in getattr(type(obj), '__slots__', ()):
+            if hasattr(obj, name):
+                stack.append(getattr(obj, name))
+    return size
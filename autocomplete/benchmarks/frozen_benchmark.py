@@ -0,0 +1,97 @@
+"""Compares the frozen automaton with the trained engines: memory use, how
+long it takes to build and to load from disk, and query latency.
+
+Run with `python -m autocomplete.benchmarks.frozen_benchmark`.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import timeit
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import frozen_autocomplete_provider as frozen
+from autocomplete.benchmarks import corpus
+
+
+def compare(word_count, query_count=1000, k=10, seed=0):
+    """Trains the dictionary and array engines on the same synthetic
+    vocabulary, freezes the dictionary engine and returns a list of result
+    dictionaries, one per engine.
+
+    :param int word_count: Number of distinct words in the vocabulary.
+    :param int query_count: Number of prefix queries to time.
+    :param int k: Number of candidates requested by the top-k queries.
+    :param int seed: Seed of the random number generator.
+    """
+    rng = random.Random(seed)
+    words = corpus.synthetic_words(word_count, seed)
+    word_counts = dict((word, rng.randint(1, 1000)) for word in words)
+    prefixes = []
+    for _ in range(query_count):
+        word = rng.choice(words)
+        prefixes.append(word[:rng.randint(1, len(word))])
+    trained = auto.AutocompleteProvider()
+    trained.train_counts(word_counts)
+    array_trained = array_auto.ArrayAutocompleteProvider()
+    array_trained.train_counts(word_counts)
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'model')
+        build_seconds = timeit.timeit(
+            lambda: frozen.FrozenAutocompleteProvider.from_provider(trained),
+            number=1)
+        engines = [('dict', trained, auto.AutocompleteProvider, None),
+                   ('array', array_trained,
+                    array_auto.ArrayAutocompleteProvider, None),
+                   ('frozen',
+                    frozen.FrozenAutocompleteProvider.from_provider(trained),
+                    frozen.FrozenAutocompleteProvider, build_seconds)]
+        results = []
+        for name, alg, provider_class, seconds in engines:
+            alg.save(path)
+            load_seconds = timeit.timeit(lambda: provider_class.load(path),
+                                         number=1)
+            full_seconds = timeit.timeit(
+                lambda: [alg.getWords(p) for p in prefixes], number=1)
+            top_seconds = timeit.timeit(
+                lambda: [alg.getWords(p, k) for p in prefixes], number=1)
+            size = corpus.deep_getsizeof(alg)
+            results.append({'engine': name,
+                            'nodes': alg.node_count(),
+                            'bytes': size,
+                            'bytes_per_word': float(size) / word_count,
+                            'build_ms': (1e3 * seconds if seconds is not None
+                                         else None),
+                            'file_bytes': os.path.getsize(path),
+                            'load_ms': 1e3 * load_seconds,
+                            'query_us': 1e6 * full_seconds / query_count,
+                            'top_k_query_us': 1e6 * top_seconds / query_count})
+        return results
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--words', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+    print('%-6s %9s %12s %8s %9s %12s %9s %9s %9s' % (
+        'engine', 'nodes', 'bytes', 'B/word', 'build ms', 'file bytes',
+        'load ms', 'query us', 'top-k us'))
+    for result in compare(args.words, args.queries, args.k):
+        build_ms = result['build_ms']
+        print('%-6s %9d %12d %8.1f %9s %12d %9.1f %9.1f %9.1f' % (
+            result['engine'], result['nodes'], result['bytes'],
+            result['bytes_per_word'],
+            '-' if build_ms is None else '%.1f' % build_ms,
+            result['file_bytes'], result['load_ms'], result['query_us'],
+            result['top_k_query_us']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Measures the latency of getFuzzyWords on mistyped prefixes for several
+node budgets, and how often the budget changes the result.
+
+Run with `python -m autocomplete.benchmarks.fuzzy_benchmark`.
+"""
+
+import argparse
+import random
+import timeit
+from autocomplete import autocomplete_provider as auto
+from autocomplete import fuzzy
+from autocomplete.benchmarks import corpus
+from autocomplete.benchmarks import suite
+
+
+def mistype(word, rng):
+    """Returns word with one letter replaced by a neighbouring key, deleted
+    or swapped with the next letter.
+    """
+    index = rng.randrange(len(word))
+    operation = rng.randrange(3)
+    if operation == 0:
+        near = fuzzy.QWERTY.get(word[index], word[index])
+        return word[:index] + rng.choice(near) + word[index + 1:]
+    if operation == 1 and len(word) > 1:
+        return word[:index] + word[index + 1:]
+    if index + 1 < len(word):
+        return (word[:index] + word[index + 1] + word[index] +
+                word[index + 2:])
+    return word
+
+
+def compare(word_count, query_count=500, k=10, max_edits=(1, 2),
+            budgets=(1000, 5000, 20000), seed=0):
+    """Trains a provider on a synthetic vocabulary and returns a list of
+    result dictionaries, one per (max_edits, budget) pair.
+
+    :param int word_count: Number of distinct words in the vocabulary.
+    :param int query_count: Number of mistyped prefixes to time.
+    :param int k: Number of candidates requested.
+    :param tuple max_edits: Edit limits to measure.
+    :param tuple budgets: Node budgets to measure.
+    :param int seed: Seed of the random number generator.
+    """
+    rng = random.Random(seed)
+    words = corpus.synthetic_words(word_count, seed)
+    alg = auto.AutocompleteProvider()
+    alg.train_counts(dict((word, rng.randint(1, 1000)) for word in words))
+    fragments = []
+    for _ in range(query_count):
+        word = rng.choice(words)
+        fragments.append(mistype(word[:rng.randint(2, max(2, len(word)))],
+                                 rng))
+    results = []
+    for edits in max_edits:
+        exact = [alg.getFuzzyWords(f, k, edits, fuzzy.QWERTY, 10 ** 9)
+                 for f in fragments]
+        for budget in budgets:
+            latencies = []
+            same = 0
+            for fragment, expected in zip(fragments, exact):
+                start = timeit.default_timer()
+                output = alg.getFuzzyWords(fragment, k, edits, fuzzy.QWERTY,
+                                           budget)
+                latencies.append(1e6 * (timeit.default_timer() - start))
+                same += output == expected
+            result = {'max_edits': edits, 'max_nodes': budget,
+                      'exact_fraction': float(same) / query_count}
+            result.update(suite.percentiles(latencies))
+            results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--words', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+    print('%5s %9s %9s %9s %9s %7s' % ('edits', 'max nodes', 'p50 us',
+                                        'p99 us', 'max us', 'exact'))
+    for result in compare(args.words, args.queries, args.k):
+        print('%5d %9d %9.0f %9.0f %9.0f %6.1f%%' % (
+            result['max_edits'], result['max_nodes'], result['p50'],
+            result['p99'], result['max'], 100 * result['exact_fraction']))
+
+
+if __name__ == '__main__':
+    main()
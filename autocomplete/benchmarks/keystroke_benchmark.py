@@ -0,0 +1,93 @@
+"""Compares a keystroke session with one getWords call per keystroke when
+replaying the typing of a few passages, letter by letter.
+
+Run with `python -m autocomplete.benchmarks.keystroke_benchmark`.
+"""
+
+import argparse
+import timeit
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import radix_autocomplete_provider as radix
+from autocomplete.benchmarks import corpus
+from autocomplete.benchmarks import suite
+
+ENGINES = [('dict', auto.AutocompleteProvider),
+           ('radix', radix.RadixAutocompleteProvider),
+           ('array', array_auto.ArrayAutocompleteProvider)]
+
+
+def replay_words(alg, words, k):
+    """Returns the microseconds taken by each keystroke when every prefix is
+    queried with getWords.
+    """
+    latencies = []
+    timer = timeit.default_timer
+    for word in words:
+        for length in range(1, len(word) + 1):
+            start = timer()
+            alg.getWords(word[:length], k)
+            latencies.append(1e6 * (timer() - start))
+    return latencies
+
+
+def replay_session(alg, words, k):
+    """Returns the microseconds taken by each keystroke when the letters are
+    pushed to a session.
+    """
+    latencies = []
+    timer = timeit.default_timer
+    session = alg.session()
+    for word in words:
+        session.clear()
+        for letter in word:
+            start = timer()
+            session.push(letter)
+            session.suggestions(k)
+            latencies.append(1e6 * (timer() - start))
+    return latencies
+
+
+def compare(token_count=200000, vocabulary_size=20000, typed_words=2000,
+            ks=(10, None)):
+    """Trains each engine on a Zipf corpus and returns a list of result
+    dictionaries, one per (engine, k, method), with keystroke latency
+    percentiles.
+
+    :param int token_count: Number of training words.
+    :param int vocabulary_size: Number of distinct training words.
+    :param int typed_words: Number of words typed.
+    :param tuple ks: Values of k to measure.
+    """
+    passages = corpus.zipf_passages(token_count, vocabulary_size)
+    words = ' '.join(corpus.zipf_passages(typed_words, vocabulary_size,
+                                          seed=1)).split()
+    results = []
+    for name, provider_class in ENGINES:
+        alg = provider_class()
+        alg.train_many(passages)
+        for k in ks:
+            for method, replay in [('getWords', replay_words),
+                                   ('session', replay_session)]:
+                result = {'engine': name, 'k': k, 'method': method}
+                result.update(suite.percentiles(replay(alg, words, k)))
+                results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=200000)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--typed', type=int, default=2000)
+    args = parser.parse_args()
+    print('%6s %5s %9s %9s %9s %9s' % ('engine', 'k', 'method', 'mean us',
+                                        'p50 us', 'p99 us'))
+    for result in compare(args.tokens, args.vocabulary, args.typed):
+        print('%6s %5s %9s %9.1f %9.1f %9.1f' % (
+            result['engine'], result['k'], result['method'], result['mean'],
+            result['p50'], result['p99']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Compares serving a user from an overlay on a shared base with serving them
+from a full provider of their own: memory per user and top-k query latency.
+
+Run with `python -m autocomplete.benchmarks.overlay_benchmark`.
+"""
+
+import argparse
+import random
+import timeit
+from autocomplete import autocomplete_provider as auto
+from autocomplete import frozen_autocomplete_provider as frozen
+from autocomplete import overlay_autocomplete_provider as overlay
+from autocomplete.benchmarks import corpus
+from autocomplete.benchmarks import suite
+
+
+def personal_passages(passages, token_count, personal_words, seed=0):
+    """Returns passages mixing words drawn from the shared passages, so they
+    follow the same Zipf distribution, with words of the user's own, such as
+    names, that the base has never seen.
+    """
+    rng = random.Random(seed)
+    shared = ' '.join(passages).split()
+    own = ['%sx%d' % (rng.choice(shared), i) for i in range(personal_words)]
+    tokens = [rng.choice(own) if rng.random() < 0.2 else rng.choice(shared)
+              for _ in range(token_count)]
+    return [' '.join(tokens[i:i + 100]) for i in range(0, token_count, 100)]
+
+
+def latencies(alg, prefixes, k):
+    """Returns the microseconds taken by each getWords query.
+    """
+    timer = timeit.default_timer
+    result = []
+    for fragment in prefixes:
+        start = timer()
+        alg.getWords(fragment, k)
+        result.append(1e6 * (timer() - start))
+    return result
+
+
+def compare(token_count=200000, vocabulary_size=20000, user_tokens=5000,
+            personal_words=200, query_count=1200, k=10):
+    """Returns a list of result dictionaries, one per way of serving a user.
+
+    :param int token_count: Number of shared training words.
+    :param int vocabulary_size: Number of distinct shared words.
+    :param int user_tokens: Number of words the user typed.
+    :param int personal_words: Number of the user's own distinct words.
+    :param int query_count: Number of prefixes queried.
+    :param int k: Number of candidates requested.
+    """
+    passages = corpus.zipf_passages(token_count, vocabulary_size)
+    personal = personal_passages(passages, user_tokens, personal_words)
+    prefixes = []
+    for fragments in suite.query_prefixes(personal, query_count // 6,
+                                          6).values():
+        prefixes.extend(fragments)
+    base = auto.AutocompleteProvider()
+    base.train_many(passages)
+    full = auto.AutocompleteProvider()
+    full.train_many(passages + personal)
+    servers = [('full provider', full, corpus.deep_getsizeof(full.memory))]
+    for name, shared in [('overlay on dict', base),
+                         ('overlay on frozen',
+                          frozen.FrozenAutocompleteProvider.from_provider(
+                              base))]:
+        alg = overlay.OverlayAutocompleteProvider(shared)
+        alg.train_many(personal)
+        servers.append((name, alg, corpus.deep_getsizeof(alg.memory)))
+    results = []
+    for name, alg, size in servers:
+        result = {'server': name, 'bytes_per_user': size}
+        result.update(suite.percentiles(latencies(alg, prefixes, k)))
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=200000)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--user-tokens', type=int, default=5000)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+    print('%18s %14s %9s %9s' % ('server', 'bytes per user', 'p50 us',
+                                 'p99 us'))
+    for result in compare(args.tokens, args.vocabulary, args.user_tokens,
+                          k=args.k):
+        print('%18s %14d %9.1f %9.1f' % (
+            result['server'], result['bytes_per_user'], result['p50'],
+            result['p99']))
+
+
+if __name__ == '__main__':
+    main()
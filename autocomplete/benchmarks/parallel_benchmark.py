@@ -0,0 +1,58 @@
+"""Measures training throughput of train_parallel for increasing numbers of
+worker processes.
+
+Run with `python -m autocomplete.benchmarks.parallel_benchmark`.
+"""
+
+import argparse
+import multiprocessing
+import timeit
+from autocomplete import autocomplete_provider as auto
+from autocomplete.benchmarks import tokenizer_benchmark
+
+
+def compare(passage_count, words_per_passage=100, process_counts=None,
+            seed=0):
+    """Returns a list of (processes, tokens per second) pairs, with 0 worker
+    processes standing for train_many in the calling process.
+
+    :param int passage_count: Number of passages in the corpus.
+    :param int words_per_passage: Number of words in each passage.
+    :param list process_counts: Numbers of worker processes to measure.
+    Defaults to powers of two up to the number of CPUs.
+    :param int seed: Seed of the random number generator.
+    """
+    if process_counts is None:
+        process_counts = [1]
+        while process_counts[-1] * 2 <= multiprocessing.cpu_count():
+            process_counts.append(process_counts[-1] * 2)
+    text = tokenizer_benchmark.synthetic_passage(
+        passage_count * words_per_passage, seed).split(' ')
+    passages = [' '.join(text[i:i + words_per_passage])
+                for i in range(0, len(text), words_per_passage)]
+    results = []
+    for processes in [0] + list(process_counts):
+        alg = auto.AutocompleteProvider()
+        if processes:
+            seconds = timeit.timeit(
+                lambda: alg.train_parallel(passages, processes), number=1)
+        else:
+            seconds = timeit.timeit(lambda: alg.train_many(passages),
+                                    number=1)
+        results.append((processes, len(text) / seconds))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--passages', type=int, default=20000)
+    parser.add_argument('--processes', type=int, nargs='*')
+    args = parser.parse_args()
+    print('%-10s %14s' % ('processes', 'tokens/s'))
+    for processes, throughput in compare(args.passages,
+                                         process_counts=args.processes):
+        print('%-10s %14.0f' % (processes or 'inline', throughput))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Measures what precomputed top-k lists cost and save: the extra memory per
+distinct word, the training throughput, and the latency of top-k getWords
+queries, for several list depths.
+
+Run with `python -m autocomplete.benchmarks.precomputed_benchmark`.
+"""
+
+import argparse
+import timeit
+from autocomplete import autocomplete_provider as auto
+from autocomplete.benchmarks import corpus
+from autocomplete.benchmarks import suite
+
+
+def measure(passages, token_count, prefixes, k, **options):
+    """Trains a provider with options and returns a result dictionary.
+    """
+    alg = auto.AutocompleteProvider(**options)
+    seconds = timeit.timeit(lambda: alg.train_many(passages), number=1)
+    timer = timeit.default_timer
+    latencies = []
+    for fragment in prefixes:
+        start = timer()
+        alg.getWords(fragment, k)
+        latencies.append(1e6 * (timer() - start))
+    stats = alg.stats()
+    result = {'depth': options.get('precomputed_depth'),
+              'precomputed': bool(options.get('precomputed_k')),
+              'tokens_per_second': token_count / seconds,
+              'extra_bytes_per_word': (
+                  float(stats['precomputed']['bytes']) / stats['words']
+                  if stats['precomputed'] else 0.0)}
+    result.update(suite.percentiles(latencies))
+    return result
+
+
+def compare(token_count=200000, vocabulary_size=20000, query_count=2000,
+            k=10, depths=(None, 4, 2)):
+    """Returns a list of result dictionaries: one without precomputed lists
+    and one per depth.
+
+    :param int token_count: Number of training words.
+    :param int vocabulary_size: Number of distinct training words.
+    :param int query_count: Number of prefixes queried per length.
+    :param int k: Number of candidates requested, also the list length.
+    :param tuple depths: Values of precomputed_depth to measure.
+    """
+    passages = corpus.zipf_passages(token_count, vocabulary_size)
+    prefixes = []
+    for fragments in suite.query_prefixes(passages, query_count // 6,
+                                          6).values():
+        prefixes.extend(fragments)
+    results = [measure(passages, token_count, prefixes, k)]
+    for depth in depths:
+        results.append(measure(passages, token_count, prefixes, k,
+                               precomputed_k=k, precomputed_depth=depth))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=200000)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+    print('%11s %6s %12s %10s %9s %9s' % ('precomputed', 'depth',
+                                          'extra B/word', 'tokens/s',
+                                          'p50 us', 'p99 us'))
+    for result in compare(args.tokens, args.vocabulary, args.queries,
+                          args.k):
+        print('%11s %6s %12.0f %10.0f %9.1f %9.1f' % (
+            result['precomputed'], result['depth'],
+            result['extra_bytes_per_word'], result['tokens_per_second'],
+            result['p50'], result['p99']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Compares the memory use and query latency of the letter-per-node dictionary
+trie, the radix trie and the array trie.
+
+Run with `python -m autocomplete.benchmarks.radix_benchmark`.
+"""
+
+import argparse
+import random
+import timeit
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import radix_autocomplete_provider as radix
+from autocomplete.benchmarks import corpus
+
+PROVIDERS = [('dict', auto.AutocompleteProvider),
+             ('radix', radix.RadixAutocompleteProvider),
+             ('array', array_auto.ArrayAutocompleteProvider)]
+
+
+def compare(word_count, query_count=1000, k=10, seed=0):
+    """Trains each provider on the same synthetic vocabulary and returns a list
+    of result dictionaries, one per provider.
+
+    :param int word_count: Number of distinct words in the vocabulary.
+    :param int query_count: Number of prefix queries to time.
+    :param int k: Number of candidates requested by the top-k queries.
+    :param int seed: Seed of the random number generator.
+    """
+    rng = random.Random(seed)
+    words = corpus.synthetic_words(word_count, seed)
+    passage = ' '.join(words)
+    prefixes = []
+    for _ in range(query_count):
+        word = rng.choice(words)
+        prefixes.append(word[:rng.randint(1, len(word))])
+    results = []
+    for name, provider_class in PROVIDERS:
+        alg = provider_class()
+        train_seconds = timeit.timeit(lambda: alg.train(passage), number=1)
+        full_seconds = timeit.timeit(
+            lambda: [alg.getWords(p) for p in prefixes], number=1)
+        top_seconds = timeit.timeit(
+            lambda: [alg.getWords(p, k) for p in prefixes], number=1)
+        node_count = alg.node_count()
+        size = corpus.deep_getsizeof(alg)
+        results.append({'engine': name,
+                        'nodes': node_count,
+                        'bytes': size,
+                        'bytes_per_word': float(size) / word_count,
+                        'train_us_per_word': 1e6 * train_seconds / word_count,
+                        'query_us': 1e6 * full_seconds / query_count,
+                        'top_k_query_us': 1e6 * top_seconds / query_count})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--words', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+    print('%-6s %9s %12s %10s %14s %10s %10s' % (
+        'engine', 'nodes', 'bytes', 'B/word', 'train us/word', 'query us',
+        'top-k us'))
+    for result in compare(args.words, args.queries, args.k):
+        print('%-6s %9d %12d %10.1f %14.2f %10.1f %10.1f' % (
+            result['engine'], result['nodes'], result['bytes'],
+            result['bytes_per_word'], result['train_us_per_word'],
+            result['query_us'], result['top_k_query_us']))
+
+
+if __name__ == '__main__':
+    main()
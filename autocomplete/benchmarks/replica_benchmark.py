@@ -0,0 +1,134 @@
+"""Runs replicas in separate processes that each train on their own share of
+a corpus and exchange deltas after every round, then checks that they all
+converged on a provider trained on the whole corpus. Compares the size of
+the deltas with that of a full snapshot, and the time a replica takes to
+apply the deltas it receives with the time it would take to train on the
+passages of the other replicas instead.
+
+Run with `python -m autocomplete.benchmarks.replica_benchmark`.
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import timeit
+from autocomplete import autocomplete_provider as auto
+from autocomplete import delta
+from autocomplete.benchmarks import corpus
+
+
+def replica(index, rounds, inbox, outbox, delta_history):
+    """Trains a provider round by round in a replica process. After each
+    round it sends the delta of its own training to outbox and applies the
+    deltas of every other replica from inbox. Finally it sends its words.
+
+    :param int index: Number of the replica.
+    :param list rounds: Lists of passages (str), one per round.
+    :param inbox: Queue of the deltas of the other replicas.
+    :param outbox: Queue shared by the replicas, read by the coordinator.
+    :param int delta_history: delta_history of the provider.
+    """
+    alg = auto.AutocompleteProvider(delta_history=delta_history)
+    version = 0
+    for passages in rounds:
+        for passage in passages:
+            alg.train(passage)
+        blob = alg.export_delta(version)
+        version = delta.decode(blob)[3]
+        outbox.put((index, blob))
+        for blob in inbox.get():
+            alg.apply_delta(blob)
+    outbox.put((index, sorted(alg.iter_words())))
+
+
+def run(replica_count=4, token_count=200000, vocabulary_size=20000,
+        round_count=5, delta_history=10 ** 6):
+    """Returns a result dictionary: whether every replica converged on the
+    whole corpus, the mean bytes a replica sends per round, the bytes of a
+    snapshot of the whole corpus, and the seconds replica 0 takes to apply
+    the deltas it receives or to train on the passages of the others. The
+    seconds are measured one after the other in this process, so that the
+    replicas do not compete for processors.
+
+    :param int replica_count: Number of replica processes.
+    :param int token_count: Number of training words in all.
+    :param int vocabulary_size: Number of distinct training words.
+    :param int round_count: Number of rounds of training and exchange.
+    :param int delta_history: delta_history of the replicas.
+    """
+    passages = corpus.zipf_passages(token_count, vocabulary_size)
+    shares = [[passages[i] for i in range(index, len(passages),
+                                          replica_count * round_count)]
+              for index in range(replica_count * round_count)]
+    outbox = multiprocessing.Queue()
+    inboxes = [multiprocessing.Queue() for _ in range(replica_count)]
+    processes = [multiprocessing.Process(
+        target=replica, args=(index, shares[index::replica_count],
+                              inboxes[index], outbox, delta_history))
+        for index in range(replica_count)]
+    for process in processes:
+        process.start()
+    received = []  # the deltas sent to replica 0
+    delta_bytes = 0
+    try:
+        for _ in range(round_count):
+            blobs = dict(outbox.get() for _ in range(replica_count))
+            delta_bytes += sum(len(blob) for blob in blobs.values())
+            received.extend(blob for sender, blob in sorted(blobs.items())
+                            if sender)
+            for index, inbox in enumerate(inboxes):
+                inbox.put([blob for sender, blob in sorted(blobs.items())
+                           if sender != index])
+        replica_words = dict(outbox.get() for _ in range(replica_count))
+    finally:
+        for process in processes:
+            process.join()
+    whole = auto.AutocompleteProvider()
+    whole.train_many(passages)
+    expected = sorted(whole.iter_words())
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'model.snapshot')
+        whole.save(path)
+        snapshot_bytes = os.path.getsize(path)
+    finally:
+        shutil.rmtree(directory)
+    alg = auto.AutocompleteProvider()
+    apply_seconds = timeit.timeit(
+        lambda: [alg.apply_delta(blob) for blob in received], number=1)
+    other_passages = [passage for index, share in enumerate(shares)
+                      if index % replica_count for passage in share]
+    alg = auto.AutocompleteProvider()
+    train_seconds = timeit.timeit(
+        lambda: [alg.train(passage) for passage in other_passages], number=1)
+    return {'converged': all(words == expected
+                             for words in replica_words.values()),
+            'delta_bytes_per_round': float(delta_bytes) / (
+                replica_count * round_count),
+            'snapshot_bytes': snapshot_bytes,
+            'apply_seconds': apply_seconds,
+            'train_seconds': train_seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--replicas', type=int, default=4)
+    parser.add_argument('--tokens', type=int, default=200000)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    result = run(args.replicas, args.tokens, args.vocabulary, args.rounds)
+    print('converged: %s' % result['converged'])
+    print('delta bytes per replica and round: %.0f' %
+          result['delta_bytes_per_round'])
+    print('snapshot bytes: %d' % result['snapshot_bytes'])
+    print('seconds to apply the deltas of the others: %.3f' %
+          result['apply_seconds'])
+    print('seconds to train on the passages of the others: %.3f' %
+          result['train_seconds'])
+
+
+if __name__ == '__main__':
+    main()
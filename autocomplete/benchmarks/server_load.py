@@ -0,0 +1,130 @@
+"""Load generator for the autocomplete server. Opens several connections,
+sends getWords requests for prefixes of synthetic words as fast as the server
+answers them and reports the p50 and p99 latency and the queries per second.
+Requires Python 3.7 or newer.
+
+Run with `python -m autocomplete.benchmarks.server_load --port 8765`, or with
+--local to start a server in the same process.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from autocomplete import autocomplete_provider as auto
+from autocomplete import server
+from autocomplete.benchmarks import corpus
+
+
+def percentile(sorted_values, fraction):
+    """Returns the value below which the given fraction of sorted_values lie.
+
+    :param list sorted_values: Values in ascending order.
+    :param float fraction: Fraction between 0 and 1.
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def run_connection(host, port, fragments, k, deadline, latencies,
+                         pipeline=1):
+    """Sends requests on one connection until deadline, keeping pipeline
+    requests in flight, and appends the latency of every answer to latencies.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    sent = {}
+    next_id = 0
+
+    def send():
+        nonlocal next_id
+        request = {'id': next_id, 'op': 'getWords',
+                   'fragment': random.choice(fragments), 'k': k}
+        sent[next_id] = time.perf_counter()
+        next_id += 1
+        writer.write(json.dumps(request).encode('utf-8') + b'\n')
+
+    for _ in range(pipeline):
+        send()
+    while sent:
+        response = json.loads((await reader.readline()).decode('utf-8'))
+        latencies.append(time.perf_counter() - sent.pop(response['id']))
+        if time.perf_counter() < deadline:
+            send()
+    writer.close()
+
+
+async def run_load(host, port, connections=8, duration=5.0, k=10,
+                   pipeline=1, fragments=None):
+    """Returns a dictionary with the number of queries, the queries per second
+    and the p50 and p99 latency in milliseconds.
+
+    :param str host: Host of the server.
+    :param int port: Port of the server.
+    :param int connections: Number of concurrent connections.
+    :param float duration: Seconds to send requests for.
+    :param int k: Number of candidates requested per query.
+    :param int pipeline: Requests kept in flight per connection.
+    :param list fragments: Fragments to query. Defaults to prefixes of
+    synthetic words.
+    """
+    if fragments is None:
+        fragments = [word[:2] for word in corpus.synthetic_words(1000)]
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*[
+        run_connection(host, port, fragments, k, deadline, latencies,
+                       pipeline)
+        for _ in range(connections)])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {'queries': len(latencies),
+            'qps': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000}
+
+
+async def run_local(word_count, **options):
+    """Starts a server trained on synthetic words on a free port in this
+    process and runs the load against it.
+    """
+    provider = auto.AutocompleteProvider(thread_safe=True)
+    provider.train(' '.join(corpus.synthetic_words(word_count)))
+    autocomplete_server = server.AutocompleteServer(provider)
+    listener = await autocomplete_server.start('127.0.0.1', 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        return await run_load('127.0.0.1', port, **options)
+    finally:
+        listener.close()
+        await autocomplete_server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--local', action='store_true',
+                        help='start a server trained on synthetic words')
+    parser.add_argument('--words', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=8)
+    parser.add_argument('--pipeline', type=int, default=1)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+    options = dict(connections=args.connections, duration=args.duration,
+                   k=args.k, pipeline=args.pipeline)
+    if args.local:
+        result = asyncio.run(run_local(args.words, **options))
+    else:
+        result = asyncio.run(run_load(args.host, args.port, **options))
+    print('%d queries, %.0f queries/s, p50 %.2f ms, p99 %.2f ms' % (
+        result['queries'], result['qps'], result['p50_ms'],
+        result['p99_ms']))
+
+
+if __name__ == '__main__':
+    main()
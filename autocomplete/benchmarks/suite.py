@@ -0,0 +1,261 @@
+"""Reproducible benchmark suite for the autocomplete engines. Trains each
+engine on a synthetic Zipf-distributed corpus and measures training
+throughput, getWords latency by prefix length and by result-set size, and
+memory footprint. Results are written as JSON so that runs of different
+versions can be compared.
+
+Run with `python -m autocomplete.benchmarks.suite --output results.json`, and
+add `--baseline old.json` to print the change against an earlier run.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import radix_autocomplete_provider as radix
+from autocomplete.benchmarks import corpus
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+ENGINES = {'dict': auto.AutocompleteProvider,
+           'radix': radix.RadixAutocompleteProvider,
+           'array': array_auto.ArrayAutocompleteProvider}
+
+RESULT_SIZES = [(1, 1), (2, 10), (11, 100), (101, 1000), (1001, None)]
+
+
+def percentiles(values):
+    """Returns a dictionary with the count, mean, p50, p90, p99 and maximum of
+    values.
+
+    :param list values: The measured values.
+    """
+    values = sorted(values)
+    if not values:
+        return {'count': 0}
+
+    def at(fraction):
+        return values[min(int(fraction * len(values)), len(values) - 1)]
+    return {'count': len(values),
+            'mean': sum(values) / float(len(values)),
+            'p50': at(0.50),
+            'p90': at(0.90),
+            'p99': at(0.99),
+            'max': values[-1]}
+
+
+def size_label(size):
+    """Returns the label of the RESULT_SIZES bucket holding size.
+
+    :param int size: Number of candidates returned by a query.
+    """
+    for low, high in RESULT_SIZES:
+        if high is None:
+            return '%d+' % low
+        if size <= high:
+            return str(low) if low == high else '%d-%d' % (low, high)
+
+
+def query_prefixes(passages, query_count, max_prefix_length, seed=0):
+    """Returns a dictionary mapping each prefix length to query_count prefixes
+    of words sampled from passages, so frequent words are queried more often.
+
+    :param list passages: The training passages.
+    :param int query_count: Number of prefixes per length.
+    :param int max_prefix_length: Longest prefix length to sample.
+    :param int seed: Seed of the random number generator.
+    """
+    rng = random.Random(seed)
+    words = ' '.join(passages).split()
+    prefixes = {}
+    for length in range(1, max_prefix_length + 1):
+        long_words = [word for word in words if len(word) >= length]
+        if long_words:
+            prefixes[length] = [rng.choice(long_words)[:length]
+                                for _ in range(query_count)]
+    return prefixes
+
+
+def measure_training(provider_class, passages, token_count, repeat):
+    """Returns the best training throughput in tokens per second and the last
+    trained provider.
+    """
+    best = None
+    for _ in range(repeat):
+        alg = provider_class()
+        seconds = timeit.timeit(lambda: [alg.train(p) for p in passages],
+                                number=1)
+        if best is None or seconds < best:
+            best = seconds
+    return token_count / best, alg
+
+
+def measure_memory(provider_class, passages):
+    """Returns the bytes held by a trained provider and the peak bytes
+    allocated while training it, traced with tracemalloc. Without tracemalloc
+    the held bytes are estimated by walking the provider and the peak is None.
+    """
+    if tracemalloc is None:
+        alg = provider_class()
+        for passage in passages:
+            alg.train(passage)
+        return corpus.deep_getsizeof(alg), None
+    tracemalloc.start()
+    try:
+        alg = provider_class()
+        for passage in passages:
+            alg.train(passage)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return current, peak
+
+
+def measure_queries(alg, prefixes, k):
+    """Returns getWords latencies in microseconds grouped by prefix length and
+    by result-set size.
+
+    :param AutocompleteProvider alg: A trained provider.
+    :param dict prefixes: Prefixes by length, from query_prefixes.
+    :param int k: Number of candidates to request, or None for all.
+    """
+    timer = timeit.default_timer
+    by_length = {}
+    by_size = {}
+    for length, fragments in sorted(prefixes.items()):
+        latencies = []
+        for fragment in fragments:
+            start = timer()
+            result = alg.getWords(fragment, k)
+            latency = 1e6 * (timer() - start)
+            latencies.append(latency)
+            by_size.setdefault(size_label(len(result)), []).append(latency)
+        by_length[str(length)] = percentiles(latencies)
+    return {'by_prefix_length': by_length,
+            'by_result_size': dict((label, percentiles(latencies))
+                                   for label, latencies in by_size.items())}
+
+
+def run(token_count=200000, vocabulary_size=20000, exponent=1.0,
+        query_count=200, max_prefix_length=6, k=10, engines=None, repeat=3,
+        seed=0):
+    """Runs the benchmark suite and returns its results as a dictionary that
+    can be serialized as JSON.
+
+    :param int token_count: Number of words in the training corpus.
+    :param int vocabulary_size: Number of distinct words in the vocabulary.
+    :param float exponent: Exponent of the Zipf distribution.
+    :param int query_count: Number of queries per prefix length.
+    :param int max_prefix_length: Longest prefix length to query.
+    :param int k: Number of candidates requested by the top-k queries.
+    :param list engines: Names of the ENGINES to run. Defaults to all.
+    :param int repeat: Number of training runs; the fastest is reported.
+    :param int seed: Seed of the random number generator.
+    """
+    passages = corpus.zipf_passages(token_count, vocabulary_size, exponent,
+                                    seed=seed)
+    distinct_words = len(set(' '.join(passages).split()))
+    prefixes = query_prefixes(passages, query_count, max_prefix_length, seed)
+    results = {'python': platform.python_version(),
+               'platform': platform.platform(),
+               'parameters': {'tokens': token_count,
+                              'vocabulary': vocabulary_size,
+                              'exponent': exponent,
+                              'queries_per_length': query_count,
+                              'max_prefix_length': max_prefix_length,
+                              'k': k,
+                              'repeat': repeat,
+                              'seed': seed},
+               'distinct_words': distinct_words,
+               'engines': {}}
+    for name in engines or sorted(ENGINES):
+        provider_class = ENGINES[name]
+        tokens_per_second, alg = measure_training(provider_class, passages,
+                                                  token_count, repeat)
+        held_bytes, peak_bytes = measure_memory(provider_class, passages)
+        results['engines'][name] = {
+            'train_tokens_per_second': tokens_per_second,
+            'nodes': alg.node_count(),
+            'bytes': held_bytes,
+            'peak_bytes': peak_bytes,
+            'bytes_per_word': float(held_bytes) / distinct_words,
+            'getWords_us': measure_queries(alg, prefixes, None),
+            'top_k_getWords_us': measure_queries(alg, prefixes, k)}
+    return results
+
+
+def compare(results, baseline):
+    """Returns a list of (engine, metric, baseline value, new value, ratio)
+    tuples for the headline metrics present in both runs.
+
+    :param dict results: Results of the new run.
+    :param dict baseline: Results of an earlier run.
+    """
+    rows = []
+    for engine in sorted(results['engines']):
+        old = baseline['engines'].get(engine)
+        if old is None:
+            continue
+        new = results['engines'][engine]
+        metrics = [('train_tokens_per_second',
+                    old['train_tokens_per_second'],
+                    new['train_tokens_per_second']),
+                   ('bytes_per_word', old['bytes_per_word'],
+                    new['bytes_per_word'])]
+        for key in ['getWords_us', 'top_k_getWords_us']:
+            for length in sorted(new[key]['by_prefix_length'], key=int):
+                old_stats = old[key]['by_prefix_length'].get(length)
+                new_stats = new[key]['by_prefix_length'][length]
+                if old_stats and old_stats['count'] and new_stats['count']:
+                    metrics.append(('%s p50 len %s' % (key, length),
+                                    old_stats['p50'], new_stats['p50']))
+        for metric, old_value, new_value in metrics:
+            ratio = new_value / old_value if old_value else None
+            rows.append((engine, metric, old_value, new_value, ratio))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=200000)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--exponent', type=float, default=1.0)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--max-prefix-length', type=int, default=6)
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--engines', nargs='*', choices=sorted(ENGINES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--baseline', help='compare with an earlier run')
+    args = parser.parse_args()
+    results = run(args.tokens, args.vocabulary, args.exponent, args.queries,
+                  args.max_prefix_length, args.k, args.engines, args.repeat,
+                  args.seed)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        print('%-6s %-36s %12s %12s %7s' % ('engine', 'metric', 'baseline',
+                                            'new', 'ratio'))
+        for engine, metric, old_value, new_value, ratio in compare(results,
+                                                                   baseline):
+            print('%-6s %-36s %12.1f %12.1f %7s' % (
+                engine, metric, old_value, new_value,
+                '%.2f' % ratio if ratio is not None else '-'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Compares the throughput of the tokenizer with the translate, lower and
+split passes it replaced.
+
+Run with `python -m autocomplete.benchmarks.tokenizer_benchmark`.
+"""
+
+import argparse
+import random
+import string
+import timeit
+from autocomplete import tokenizer
+from autocomplete.benchmarks import corpus
+
+DELETE_PUNCTUATION = dict((ord(char), None) for char in string.punctuation)
+
+
+def legacy_preprocess(passage):
+    """Returns the words of passage using three separate passes: one to
+    remove punctuation, one to lowercase and one to split. Reference
+    implementation of tokenizer.tokenize.
+
+    :param passage: The passage to be preprocessed (str, bytes or unicode).
+    """
+    if isinstance(passage, bytes):
+        return passage.translate(None, tokenizer.BYTES_PUNCTUATION).lower() \
+                      .split()
+    return passage.translate(DELETE_PUNCTUATION).lower().split()
+
+
+def synthetic_passage(word_count, seed=0):
+    """Returns a passage of capitalized words followed by occasional
+    punctuation.
+
+    :param int word_count: Number of words in the passage.
+    :param int seed: Seed of the random number generator.
+    """
+    rng = random.Random(seed)
+    words = corpus.synthetic_words(10000, seed)
+    marks = ['', '', '', ',', '.', '!', '?']
+    return ' '.join(rng.choice(words).capitalize() + rng.choice(marks)
+                    for _ in range(word_count))
+
+
+def compare(word_count, repeat=3, seed=0):
+    """Returns the throughput in MB/s of legacy_preprocess and of
+    tokenizer.tokenize on byte strings and on text strings.
+
+    :param int word_count: Number of words in the benchmark passage.
+    :param int repeat: Number of timing runs; the fastest is reported.
+    :param int seed: Seed of the random number generator.
+    """
+    passage = synthetic_passage(word_count, seed)
+    passages = {'bytes': passage.encode('ascii'),
+                'text': passage.encode('ascii').decode('ascii')}
+    megabytes = len(passage) / 1e6
+    results = {}
+    for kind, text in sorted(passages.items()):
+        for name, function in [('legacy', legacy_preprocess),
+                               ('tokenizer', tokenizer.tokenize)]:
+            seconds = min(timeit.repeat(lambda: function(text), number=1,
+                                        repeat=repeat))
+            results[(kind, name)] = megabytes / seconds
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--words', type=int, default=1000000)
+    args = parser.parse_args()
+    results = compare(args.words)
+    print('%-6s %-10s %8s' % ('input', 'method', 'MB/s'))
+    for (kind, name), throughput in sorted(results.items()):
+        print('%-6s %-10s %8.1f' % (kind, name, throughput))
+
+
+if __name__ == '__main__':
+    main()
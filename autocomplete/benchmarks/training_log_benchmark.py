@@ -0,0 +1,105 @@
+"""Measures what a training log costs and saves: the throughput of online
+training, one train call per passage, with fsync after every record or in
+batches, and the time to recover a provider from a snapshot and log tails of
+several sizes, against retraining from the raw text.
+
+Run with `python -m autocomplete.benchmarks.training_log_benchmark`.
+"""
+
+import argparse
+import shutil
+import tempfile
+import timeit
+from autocomplete import autocomplete_provider as auto
+from autocomplete import training_log
+from autocomplete.benchmarks import corpus
+
+
+def training_throughput(passages, token_count, directory, **log_options):
+    """Returns the tokens per second of training one passage per train call,
+    with a training log made with log_options or without one if they are
+    empty.
+    """
+    log = None
+    if log_options:
+        log = training_log.TrainingLog(directory, **log_options)
+    alg = auto.AutocompleteProvider(training_log=log)
+    seconds = timeit.timeit(lambda: [alg.train(p) for p in passages],
+                            number=1)
+    if log is not None:
+        log.close()
+    return token_count / seconds
+
+
+def recovery_seconds(passages, tail_passages, directory):
+    """Returns the seconds taken to recover a provider trained on passages
+    whose last tail_passages passages were logged after the latest
+    compaction.
+    """
+    log = training_log.TrainingLog(directory, compact_bytes=None)
+    alg = auto.AutocompleteProvider(training_log=log)
+    split = len(passages) - tail_passages
+    alg.train_many(passages[:split])
+    log.compact(alg)
+    for passage in passages[split:]:
+        alg.train(passage)
+    log.close()
+    start = timeit.default_timer()
+    log = training_log.TrainingLog(directory)
+    auto.AutocompleteProvider(training_log=log)
+    seconds = timeit.default_timer() - start
+    log.close()
+    return seconds
+
+
+def compare(token_count=200000, vocabulary_size=20000,
+            tails=(0, 100, 1000)):
+    """Returns a list of training result dictionaries and a list of recovery
+    result dictionaries.
+
+    :param int token_count: Number of training words.
+    :param int vocabulary_size: Number of distinct training words.
+    :param tuple tails: Numbers of passages logged after the snapshot.
+    """
+    passages = corpus.zipf_passages(token_count, vocabulary_size)
+    directory = tempfile.mkdtemp()
+    try:
+        training = []
+        for name, options in [('no log', {}),
+                              ('sync every record', {'sync_records': 1}),
+                              ('sync every 100 records', {}),
+                              ('sync every 1000 records',
+                               {'sync_records': 1000, 'sync_seconds': 10})]:
+            shutil.rmtree(directory, ignore_errors=True)
+            training.append({'log': name, 'tokens_per_second':
+                             training_throughput(passages, token_count,
+                                                 directory, **options)})
+        recovery = [{'source': 'retraining from text', 'seconds':
+                     timeit.timeit(lambda: auto.AutocompleteProvider()
+                                   .train_many(passages), number=1)}]
+        for tail in tails:
+            shutil.rmtree(directory, ignore_errors=True)
+            recovery.append({'source': 'snapshot + %d records' % tail,
+                             'seconds': recovery_seconds(passages, tail,
+                                                         directory)})
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return training, recovery
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=200000)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    args = parser.parse_args()
+    training, recovery = compare(args.tokens, args.vocabulary)
+    print('%24s %10s' % ('log', 'tokens/s'))
+    for result in training:
+        print('%24s %10.0f' % (result['log'], result['tokens_per_second']))
+    print('%24s %10s' % ('recovery from', 'ms'))
+    for result in recovery:
+        print('%24s %10.1f' % (result['source'], 1e3 * result['seconds']))
+
+
+if __name__ == '__main__':
+    main()
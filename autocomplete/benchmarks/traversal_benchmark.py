@@ -0,0 +1,127 @@
+"""Compares the iterative memorize function and the iterative traversal
+behind getWords with the recursive implementations they replaced. Queries are
+timed through getWords, so ranking and building the candidates are included.
+
+Run with `python -m autocomplete.benchmarks.traversal_benchmark`.
+"""
+
+import argparse
+import timeit
+from autocomplete import autocomplete_provider as auto
+from autocomplete.benchmarks import corpus
+
+
+def recursive_memorize(memory, word):
+    """Adds a single word to memory by recursing once per letter. Reference
+    implementation of auto.memorize.
+
+    :param dict memory: memory dictionary that the word will be added to.
+    :param str word: the word fragment to be added to memory.
+    """
+    letter = word[0]
+    word = word[1:]
+    memory_node = memory.get(letter, auto.MemoryNode({}, 0))
+    if word:
+        memory_node.memory = recursive_memorize(memory_node.memory, word)
+        child_max = memory_node.memory[word[0]].max_confidence
+    else:
+        memory_node.confidence += 1
+        child_max = memory_node.confidence
+    if child_max > memory_node.max_confidence:
+        memory_node.max_confidence = child_max
+    memory[letter] = memory_node
+    return memory
+
+
+def recursive_word_counts(fragment, memory, word_counts):
+    """Appends a (word, confidence) pair for every word in memory to
+    word_counts by recursing once per letter, and returns it. Reference
+    implementation of auto.iter_word_counts.
+
+    :param str fragment: The word prefix that procedes the letter keys in the
+    memory dictionary.
+    :param dict memory: contains memory of words.
+    :param list word_counts: The list the pairs are appended to.
+    """
+    for letter, node in memory.items():
+        word = fragment + letter
+        if node.confidence > 0:
+            word_counts.append((word, node.confidence))
+        if node.memory:
+            recursive_word_counts(word, node.memory, word_counts)
+    return word_counts
+
+
+class RecursiveAutocompleteProvider(auto.AutocompleteProvider):
+    """AutocompleteProvider that collects the words below a fragment with
+    recursive_word_counts, so getWords can be timed with either traversal.
+    """
+
+    def _word_counts_at(self, memory_node, fragment, trace=None):
+        """Returns _word_counts(fragment) given the node fragment leads to.
+        """
+        word_counts = recursive_word_counts(fragment, memory_node.memory, [])
+        if memory_node.confidence > 0:
+            word_counts.append((fragment, memory_node.confidence))
+        return word_counts
+
+
+def compare(word_count, repeat=3, seed=0):
+    """Times both implementations on the same synthetic vocabulary. Returns a
+    dictionary with the microseconds per memorized word and per getWords
+    query of each implementation, and whether both built the same memory and
+    answered the same candidates.
+
+    :param int word_count: Number of distinct words in the vocabulary.
+    :param int repeat: Number of timing runs; the fastest is reported.
+    :param int seed: Seed of the random number generator.
+    """
+    words = corpus.synthetic_words(word_count, seed)
+    prefixes = sorted(set(word[:2] for word in words))
+
+    def train(memorize_function):
+        memory = {}
+        for word in words:
+            memory = memorize_function(memory, word)
+        return memory
+
+    def query(provider):
+        return [provider.getWords(prefix) for prefix in prefixes]
+
+    recursive_memory = train(recursive_memorize)
+    iterative_memory = train(auto.memorize)
+    providers = {}
+    for name, provider_class in [
+            ('recursive', RecursiveAutocompleteProvider),
+            ('iterative', auto.AutocompleteProvider)]:
+        providers[name] = provider_class()
+        providers[name].memory = iterative_memory
+    results = {'same_memory': recursive_memory == iterative_memory,
+               'same_candidates': (query(providers['recursive']) ==
+                                   query(providers['iterative']))}
+    for name, memorize_function in [('recursive', recursive_memorize),
+                                    ('iterative', auto.memorize)]:
+        train_seconds = min(timeit.repeat(
+            lambda: train(memorize_function), number=1, repeat=repeat))
+        query_seconds = min(timeit.repeat(
+            lambda: query(providers[name]), number=1, repeat=repeat))
+        results[name] = {
+            'memorize_us_per_word': 1e6 * train_seconds / len(words),
+            'query_us': 1e6 * query_seconds / len(prefixes)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--words', type=int, default=50000)
+    args = parser.parse_args()
+    results = compare(args.words)
+    print('%-10s %20s %14s' % ('', 'memorize us/word', 'getWords us'))
+    for name in ['recursive', 'iterative']:
+        print('%-10s %20.2f %14.1f' % (
+            name, results[name]['memorize_us_per_word'],
+            results[name]['query_us']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Contains the BigramModel class, which counts how often each word follows
+another so that AutocompleteProvider can rank suggestions by the previous word
+and predict the next word before any letter is typed.
+"""
+
+import collections
+import heapq
+
+
+class BigramModel:
+    """Counts pairs of consecutive words. Words are numbered in the order
+    they are first seen and pairs are stored as integer ids, so memory grows
+    with the number of distinct pairs observed rather than with the length of
+    the words. followers maps the id of a word to a dictionary of the ids of
+    the words that followed it and their counts.
+    """
+
+    def __init__(self):
+        """Initalizes BigramModel object.
+        """
+        self.word_ids = {}
+        self.words = []
+        self.followers = {}
+
+    def __len__(self):
+        """Returns the number of distinct pairs.
+        """
+        return sum(len(counts) for counts in self.followers.values())
+
+    def add(self, pair_counts):
+        """Adds pair counts.
+
+        :param pair_counts: Mapping of (previous word, word) to a positive
+        number of occurrences.
+        """
+        word_ids = self.word_ids
+        words = self.words
+        followers = self.followers
+        for (previous, word), count in pair_counts.items():
+            previous_id = word_ids.get(previous)
+            if previous_id is None:
+                previous_id = word_ids[previous] = len(words)
+                words.append(previous)
+            word_id = word_ids.get(word)
+            if word_id is None:
+                word_id = word_ids[word] = len(words)
+                words.append(word)
+            counts = followers.get(previous_id)
+            if counts is None:
+                counts = followers[previous_id] = {}
+            counts[word_id] = counts.get(word_id, 0) + count
+
+    def merge(self, other):
+        """Adds the pair counts of another model.
+
+        :param BigramModel other: The model to be merged in. It is not
+        modified.
+        """
+        self.add(dict(other.iter_pairs()))
+
+    def iter_pairs(self):
+        """Generates ((previous word, word), count) for every pair.
+        """
+        words = self.words
+        for previous_id, counts in self.followers.items():
+            previous = words[previous_id]
+            for word_id, count in counts.items():
+                yield (previous, words[word_id]), count
+
+    def following(self, previous, fragment=''):
+        """Returns an unordered list of (word, count) pairs for the words
+        that followed previous and start with fragment.
+
+        :param str previous: Normalized previous word.
+        :param str fragment: Normalized word fragment.
+        """
+        previous_id = self.word_ids.get(previous)
+        if previous_id is None:
+            return []
+        words = self.words
+        word_counts = [(words[word_id], count) for word_id, count
+                       in self.followers.get(previous_id, {}).items()]
+        if fragment:
+            word_counts = [(word, count) for word, count in word_counts
+                           if word.startswith(fragment)]
+        return word_counts
+
+    def top_following(self, previous, k=None, fragment=''):
+        """Returns (word, count) pairs for the k words that most often
+        followed previous and start with fragment, ordered by count and then
+        alphabetically.
+
+        :param str previous: Normalized previous word.
+        :param int k: Maximum number of words to return, or None for all.
+        :param str fragment: Normalized word fragment.
+        """
+        word_counts = self.following(previous, fragment)
+        if k is None:
+            return sorted(word_counts, key=lambda x: (-x[1], x[0]))
+        return heapq.nsmallest(k, word_counts, key=lambda x: (-x[1], x[0]))
+
+    def rescale(self, factor=1, keep=None):
+        """Multiplies every count by factor, rounding down, and forgets the
+        pairs whose count drops to zero or, with keep, that contain a word not
+        in keep. Word ids are renumbered so forgotten words free their ids.
+
+        :param float factor: Decay factor between 0 and 1.
+        :param keep: Set of the words that may still appear in pairs.
+        """
+        pair_counts = collections.Counter()
+        for pair, count in self.iter_pairs():
+            if factor != 1:
+                count = int(count * factor)
+            if count > 0 and (keep is None or
+                              (pair[0] in keep and pair[1] in keep)):
+                pair_counts[pair] = count
+        self.word_ids = {}
+        self.words = []
+        self.followers = {}
+        self.add(pair_counts)
+
+    def stats(self):
+        """Returns a dictionary with the number of words with an id and the
+        number of distinct pairs.
+        """
+        return {'words': len(self.words), 'pairs': len(self)}
+
+
+def count_pairs(word_list, pair_counts=None):
+    """Returns a Counter of the pairs of consecutive words in word_list.
+
+    :param list word_list: Preprocessed words in passage order.
+    :param Counter pair_counts: Counter to add the pairs to, if given.
+    """
+    if pair_counts is None:
+        pair_counts = collections.Counter()
+    pair_counts.update(zip(word_list, word_list[1:]))
+    return pair_counts
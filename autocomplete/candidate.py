@@ -1,10 +1,13 @@
 """Contains the Candidate class.
 """
 
-class Candidate:
-    """Stores a candidate word and the confidence for autocomplete.
+class Candidate(object):
+    """Stores a candidate word and the confidence for autocomplete. Instances
+    have slots instead of a __dict__, since getWords creates one per result.
     """
 
+    __slots__ = ('word', 'confidence')
+
     def __init__(self, word=None, confidence=None):
         """Initalizes Candidate object.
 
@@ -29,9 +32,13 @@ class Candidate:
         implementation.
         """
         if isinstance(self, other.__class__):
-            return self.__dict__ == other.__dict__
+            return (self.word == other.word and
+                    self.confidence == other.confidence)
         return False
 
+    def __ne__(self, other):
+        return not self == other
+
     def __str__(self):
         return self.word + ' (' + str(self.confidence) + ')'
 
@@ -0,0 +1,154 @@
+"""Contains the DeltaHistory class and functions to serialize the word counts
+a provider was trained with since a version, so that replicas trained on
+different passages can exchange them instead of whole models.
+
+Every change to the memory of a provider increases its version. A provider
+made with delta_history keeps the word counts of its recent training batches
+and merges, tagged with the version they produced, and export_delta sums
+those after a version. apply_delta memorizes a delta like a training batch,
+except that it is not kept in the history of the receiving provider: a delta
+only carries what its sender was trained on, so replicas that all send their
+deltas to all others converge on the sum of everything any of them was
+trained on, without counts being echoed back. Decays and prunes are not
+exported, as each replica applies its own retention.
+
+Versions start again from 0, or from the version a training log recovers,
+whenever a provider is made, so every delta history also has a random epoch.
+A receiver remembers the version it applied last from every epoch and only
+applies a delta that starts there, or at the start of the history of an epoch
+it has not seen. A delta computed from the version a replica had before it
+restarted is rejected instead of silently missing or repeating counts.
+
+Delta: magic (4 bytes), format version (uint16), flags (uint16), epoch
+(uint64), version the history of the epoch starts after (uint64), version the
+delta starts after (uint64), version it ends at (uint64), then the counts in
+the format of training log records, compressed with zlib.
+All integers are little-endian.
+"""
+
+import collections
+import os
+import struct
+import zlib
+from autocomplete import training_log
+
+MAGIC = b'ACTD'
+VERSION = 3
+UNICODE_LETTERS_FLAG = 1
+HEADER = struct.Struct('<4sHHQQQQ')
+
+
+def new_epoch():
+    """Returns a random 64-bit epoch for a new delta history.
+    """
+    return struct.unpack('<Q', os.urandom(8))[0]
+
+
+class DeltaHistory:
+    """Word counts of the recent training batches of a provider, tagged with
+    the provider version each produced. The oldest batches are dropped once
+    more than max_words words are kept, after which deltas can no longer
+    start before them. Each history has a new random epoch.
+    """
+
+    def __init__(self, max_words, version=0):
+        """Initalizes DeltaHistory object. Throws ValueError if max_words is
+        not positive.
+
+        :param int max_words: Maximum number of word counts kept, summed over
+        the batches.
+        :param int version: The provider version when keeping starts.
+        """
+        if max_words < 1:
+            raise ValueError('max_words must be at least 1')
+        self.max_words = max_words
+        self.batches = collections.deque()  # (version, word counts) pairs
+        self.words = 0
+        self.epoch = new_epoch()
+        self.start_version = version
+        self.oldest_version = version  # every batch after it is kept
+
+    def record(self, version, word_counts):
+        """Keeps the word counts of a batch. The mapping is kept, not copied,
+        so it must not be changed afterwards.
+
+        :param int version: The provider version after the batch.
+        :param word_counts: Mapping of normalized word (str) to its count.
+        """
+        if not word_counts:
+            return
+        self.batches.append((version, word_counts))
+        self.words += len(word_counts)
+        while self.words > self.max_words:
+            self.oldest_version, dropped = self.batches.popleft()
+            self.words -= len(dropped)
+
+    def counts_since(self, since_version, version):
+        """Returns a Counter summing the batches after since_version. Throws
+        ValueError if some of them were dropped or since_version is ahead of
+        the provider.
+
+        :param int since_version: Version the delta starts after.
+        :param int version: The current provider version.
+        """
+        if since_version < self.oldest_version:
+            raise ValueError('the delta history starts after version %d' %
+                             self.oldest_version)
+        if since_version > version:
+            raise ValueError('version %d is ahead of the provider, which is '
+                             'at version %d' % (since_version, version))
+        word_counts = collections.Counter()
+        for batch_version, batch_counts in reversed(self.batches):
+            if batch_version <= since_version:
+                break
+            word_counts.update(batch_counts)
+        return word_counts
+
+    def stats(self):
+        """Returns a dictionary with the numbers of batches and word counts
+        kept and the oldest version a delta can start after.
+        """
+        return {'batches': len(self.batches),
+                'words': self.words,
+                'epoch': self.epoch,
+                'start_version': self.start_version,
+                'oldest_version': self.oldest_version}
+
+
+def encode(epoch, start_version, since_version, version, word_counts,
+           unicode_letters=False):
+    """Returns a delta holding word counts.
+
+    :param int epoch: Epoch of the delta history of the sender.
+    :param int start_version: Version the history of the epoch starts after.
+    :param int since_version: Version the delta starts after.
+    :param int version: Version the delta ends at.
+    :param word_counts: Mapping of normalized word (str) to its count.
+    :param bool unicode_letters: Whether the words are Unicode.
+    """
+    flags = UNICODE_LETTERS_FLAG if unicode_letters else 0
+    return HEADER.pack(MAGIC, VERSION, flags, epoch, start_version,
+                       since_version, version) + \
+        zlib.compress(training_log.encode_counts(word_counts))
+
+
+def decode(blob):
+    """Returns the (epoch, version the history of the epoch starts after,
+    version the delta starts after, version it ends at, word counts) of a
+    delta. Throws ValueError if blob is not a delta.
+
+    :param bytes blob: A delta made by encode or export_delta.
+    """
+    if len(blob) < HEADER.size:
+        raise ValueError('not an autocomplete delta')
+    (magic, format_version, flags, epoch, start_version, since_version,
+     version) = HEADER.unpack_from(blob, 0)
+    if magic != MAGIC or format_version != VERSION:
+        raise ValueError('not an autocomplete delta')
+    try:
+        payload = zlib.decompress(blob[HEADER.size:])
+    except zlib.error:
+        raise ValueError('corrupt autocomplete delta')
+    word_counts = training_log.parse_counts(
+        payload, bool(flags & UNICODE_LETTERS_FLAG))
+    return epoch, start_version, since_version, version, word_counts
@@ -0,0 +1,506 @@
+"""Contains the FrozenAutocompleteProvider class, a read-only
+AutocompleteProvider compiled into a minimal acyclic automaton (DAWG).
+
+A trie shares the prefixes of words; the automaton also shares their
+suffixes, so words such as "training" and "testing" end in the same states.
+Confidences cannot be stored on shared states, so every word is numbered by
+its alphabetical rank and the confidences are kept in an array indexed by
+rank. Each edge stores how many words of its source state come before it, so
+the rank of a word is the sum of the edges on its path.
+"""
+
+import collections
+import heapq
+import struct
+import sys
+from array import array
+from autocomplete import autocomplete_provider as auto
+from autocomplete.array_autocomplete_provider import label_char
+
+MAGIC = b'ACTF'
+VERSION = 1
+UNICODE_LETTERS_FLAG = 1
+HEADER = struct.Struct('<4sHHIIIBB')
+TYPECODES = ['B', 'I', 'I', 'I', 'I', 'L', 'L']  # field order of save
+
+
+class FrozenAutocompleteProvider(auto.AutocompleteProvider):
+    """Read-only AutocompleteProvider backed by a minimal acyclic automaton
+    in parallel arrays. State s is final when finals[s] is 1, and its edges
+    are edge_labels, edge_targets and edge_offsets from first_edge[s] to
+    first_edge[s + 1], sorted by label. bounds[s] is the highest confidence
+    of any word passing through s; since states are shared by different
+    prefixes it is an upper bound for the words below any one prefix, which
+    is all the top-k search needs. counts[r] is the confidence of the word of
+    alphabetical rank r.
+
+    Build one from a trained provider with from_provider, or from a file of
+    word counts with from_file. Ties are ordered alphabetically.
+    """
+
+    def __init__(self, word_counts=(), **options):
+        """Initalizes FrozenAutocompleteProvider object and compiles the
+        automaton.
+
+        :param word_counts: Mapping of word (str) to number of occurrences, or
+        an iterable of (word, count) pairs. Words are normalized the same way
+        as fragments in getWords, and counts below one are ignored.
+        :param options: Other keyword arguments of the AutocompleteProvider
+        constructor, such as cache_size.
+        """
+        auto.AutocompleteProvider.__init__(self, **options)
+        if hasattr(word_counts, 'items'):
+            word_counts = word_counts.items()
+        normalized_counts = collections.Counter()
+        for word, count in word_counts:
+            word = auto.normalize(word, self.unicode_letters)
+            if word and count > 0:
+                normalized_counts[word] += count
+        self._compile(sorted(normalized_counts.items()))
+
+    @classmethod
+    def from_provider(cls, provider, **options):
+        """Returns a FrozenAutocompleteProvider holding the words of a trained
+        provider.
+
+        :param AutocompleteProvider provider: The provider to be frozen.
+        :param options: Other keyword arguments of the AutocompleteProvider
+        constructor, such as cache_size.
+        """
+        options.setdefault('unicode_letters', provider.unicode_letters)
+        return cls(provider.iter_words(), **options)
+
+    @classmethod
+    def from_file(cls, path, **options):
+        """Returns a FrozenAutocompleteProvider holding the words of a word
+        count file, which has one word and its count per line separated by
+        whitespace. Throws ValueError if a line is malformed.
+
+        :param str path: Path of the word count file.
+        :param options: Other keyword arguments of the AutocompleteProvider
+        constructor, such as cache_size.
+        """
+        return cls(read_word_counts(path), **options)
+
+    def _create_memory(self):
+        """Creates an automaton with a single non-final root state.
+        """
+        self._compile([])
+
+    def _compile(self, word_counts):
+        """Builds the automaton arrays from (word, count) pairs sorted by
+        word.
+
+        :param list word_counts: Sorted (word, count) pairs of distinct words.
+        """
+        (self.finals, self.first_edge, self.edge_labels, self.edge_targets,
+         self.edge_offsets) = build_automaton(word for word, _ in word_counts)
+        self.root = len(self.finals) - 1
+        self.counts = array('L', [count for _, count in word_counts])
+        self.bounds = array('L', [0] * len(self.finals))
+        self._compute_bounds(word_counts)
+        self._rebuild_top_lists()
+
+    def _compute_bounds(self, word_counts):
+        """Sets bounds[s] to the highest confidence of a word passing through
+        state s by walking the path of every word.
+
+        :param list word_counts: Sorted (word, count) pairs of distinct words.
+        """
+        bounds = self.bounds
+        for word, count in word_counts:
+            state = self.root
+            if count > bounds[state]:
+                bounds[state] = count
+            for letter in word:
+                state = self.edge_targets[find_edge(
+                    self.first_edge, self.edge_labels, state, ord(letter))]
+                if count > bounds[state]:
+                    bounds[state] = count
+
+    def node_count(self):
+        """Returns the number of states in the automaton, not counting the
+        root.
+        """
+        return len(self.finals) - 1
+
+    def edge_count(self):
+        """Returns the number of edges in the automaton.
+        """
+        return len(self.edge_labels)
+
+    def iter_words(self):
+        """Generates a (word, confidence) pair for every word in alphabetical
+        order.
+        """
+        return iter(self._subtree_word_counts(self.root, 0, ''))
+
+    def save(self, path):
+        """Writes the automaton to a file that load reads back without
+        rebuilding it.
+
+        :param str path: Path of the file.
+        """
+        fields = [self.finals, self.first_edge, self.edge_labels,
+                  self.edge_targets, self.edge_offsets, self.counts,
+                  self.bounds]
+        flags = UNICODE_LETTERS_FLAG if self.unicode_letters else 0
+        with open(path, 'wb') as frozen_file:
+            frozen_file.write(HEADER.pack(
+                MAGIC, VERSION, flags, len(self.finals), len(self.edge_labels),
+                len(self.counts), array('L').itemsize,
+                sys.byteorder == 'little'))
+            for field in fields:
+                field.tofile(frozen_file)
+
+    @classmethod
+    def load(cls, path, mmap=False, **options):
+        """Returns the FrozenAutocompleteProvider saved in a file by save. A
+        snapshot written by AutocompleteProvider.save is compiled instead.
+        Throws ValueError if the file was saved on a platform with a different
+        word size or byte order.
+
+        :param str path: Path of the file.
+        :param bool mmap: Not supported; the arrays are read into memory.
+        :param options: Other keyword arguments of the AutocompleteProvider
+        constructor, such as cache_size.
+        """
+        if mmap:
+            raise ValueError('frozen automata are read into memory')
+        with open(path, 'rb') as frozen_file:
+            header = frozen_file.read(HEADER.size)
+            if header[:len(MAGIC)] != MAGIC:
+                from autocomplete import snapshot
+                frozen_file.seek(0)
+                snapshot_provider = snapshot.MappedAutocompleteProvider(
+                    frozen_file.read())
+                return cls.from_provider(snapshot_provider, **options)
+            if len(header) < HEADER.size:
+                raise ValueError('truncated frozen automaton')
+            (_, version, flags, state_count, edge_count, word_count, itemsize,
+             little_endian) = HEADER.unpack(header)
+            if version != VERSION:
+                raise ValueError('unsupported frozen automaton version')
+            if (itemsize != array('L').itemsize or
+                    bool(little_endian) != (sys.byteorder == 'little')):
+                raise ValueError('frozen automaton was saved on a different '
+                                 'platform')
+            sizes = [state_count, state_count + 1, edge_count, edge_count,
+                     edge_count, word_count, state_count]
+            fields = []
+            for typecode, size in zip(TYPECODES, sizes):
+                field = array(typecode)
+                try:
+                    field.fromfile(frozen_file, size)
+                except EOFError:
+                    raise ValueError('truncated frozen automaton')
+                fields.append(field)
+        options.setdefault('unicode_letters',
+                           bool(flags & UNICODE_LETTERS_FLAG))
+        provider = cls(**options)
+        (provider.finals, provider.first_edge, provider.edge_labels,
+         provider.edge_targets, provider.edge_offsets, provider.counts,
+         provider.bounds) = fields
+        provider.root = state_count - 1
+        provider._rebuild_top_lists()
+        return provider
+
+    def _memorize(self, word, count=1):
+        """Frozen automata are read-only. Throws TypeError.
+        """
+        raise TypeError('a frozen automaton cannot be trained')
+
+    def _rescale(self, factor=1, min_confidence=1, forget=frozenset()):
+        """Frozen automata are read-only. Throws TypeError.
+        """
+        raise TypeError('a frozen automaton cannot be decayed or pruned')
+
+    def _bottom_state(self, fragment):
+        """Returns the state at the end of the fragment path and the rank of
+        the first word below it, or (None, 0) if the fragment has never been
+        seen.
+
+        :param str fragment: Normalized word fragment.
+        """
+        first_edge = self.first_edge
+        edge_labels = self.edge_labels
+        state = self.root
+        index = 0
+        for letter in fragment:
+            edge = find_edge(first_edge, edge_labels, state, ord(letter))
+            if edge < 0:
+                return None, 0
+            index += self.edge_offsets[edge]
+            state = self.edge_targets[edge]
+        return state, index
+
+    def _root_node(self):
+        """Returns the root for walking the automaton letter by letter. A node
+        is a (state, rank of the first word below it) pair, since states are
+        shared by several prefixes.
+        """
+        return self.root, 0
+
+    def _child_nodes(self, node):
+        """Returns (letter, child node) pairs for the edges of a node, in
+        alphabetical order.
+
+        :param tuple node: A (state, rank) pair.
+        """
+        state, index = node
+        edge_labels = self.edge_labels
+        edge_targets = self.edge_targets
+        edge_offsets = self.edge_offsets
+        return [(label_char(edge_labels[edge]),
+                 (edge_targets[edge], index + edge_offsets[edge]))
+                for edge in range(self.first_edge[state],
+                                  self.first_edge[state + 1])]
+
+    def _node_counts(self, node):
+        """Returns the confidence of the word ending at a node and an upper
+        bound of the confidences below it.
+
+        :param tuple node: A (state, rank) pair.
+        """
+        state, index = node
+        confidence = self.counts[index] if self.finals[state] else 0
+        return confidence, self.bounds[state]
+
+    def _child_node(self, node, letter):
+        """Returns the child of a node reached by letter, or None.
+
+        :param tuple node: A (state, rank) pair.
+        :param str letter: The next letter.
+        """
+        state, index = node
+        edge = find_edge(self.first_edge, self.edge_labels, state, ord(letter))
+        if edge < 0:
+            return None
+        return self.edge_targets[edge], index + self.edge_offsets[edge]
+
+    def _word_counts_at(self, node, fragment, trace=None):
+        """Returns _word_counts(fragment) given the node fragment leads to.
+
+        :param tuple node: A (state, rank) pair from _child_node.
+        :param str fragment: Normalized, non-empty word fragment.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        state, index = node
+        return self._subtree_word_counts(state, index, fragment, trace)
+
+    def _word_counts(self, fragment, trace=None):
+        """Returns a (word, confidence) pair for every word starting with
+        fragment, in alphabetical order.
+
+        :param str fragment: Normalized word fragment.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        if not fragment:
+            return []
+        state, index = self._bottom_state(fragment)
+        if state is None:
+            return []
+        return self._subtree_word_counts(state, index, fragment, trace)
+
+    def _subtree_word_counts(self, state, index, fragment, trace=None):
+        """Returns a (word, confidence) pair for every word below state, in
+        alphabetical order.
+
+        :param int state: The state reached by fragment.
+        :param int index: Rank of the first word below state.
+        :param str fragment: The word spelled by the path to state.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        finals = self.finals
+        first_edge = self.first_edge
+        edge_labels = self.edge_labels
+        edge_targets = self.edge_targets
+        edge_offsets = self.edge_offsets
+        counts = self.counts
+        visited = 0
+        word_counts = []
+        stack = [(state, index, fragment)]
+        while stack:
+            state, index, word = stack.pop()
+            visited += 1
+            if finals[state]:
+                word_counts.append((word, counts[index]))
+            for edge in range(first_edge[state + 1] - 1, first_edge[state] - 1,
+                              -1):
+                stack.append((edge_targets[edge], index + edge_offsets[edge],
+                              word + label_char(edge_labels[edge])))
+        if trace is not None:
+            trace.record(visited, len(word_counts))
+        return word_counts
+
+    def _top_word_counts(self, fragment, k, trace=None):
+        """Returns (word, confidence) pairs for the k most confident words
+        starting with fragment, using the same best-first search as
+        get_top_word_counts. The bounds of shared states may overestimate,
+        which only delays their expansion.
+
+        :param str fragment: Normalized word fragment.
+        :param int k: Maximum number of words to return.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        if not fragment:
+            return []
+        state, index = self._bottom_state(fragment)
+        if state is None:
+            return []
+        return self._top_word_counts_at((state, index), fragment, k, trace)
+
+    def _top_word_counts_at(self, node, fragment, k, trace=None):
+        """Returns _top_word_counts(fragment, k) given the node fragment leads
+        to.
+
+        :param tuple node: A (state, rank) pair from _child_node.
+        :param str fragment: Normalized, non-empty word fragment.
+        :param int k: Maximum number of words to return.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        state, index = node
+        finals = self.finals
+        first_edge = self.first_edge
+        edge_labels = self.edge_labels
+        edge_targets = self.edge_targets
+        edge_offsets = self.edge_offsets
+        counts = self.counts
+        bounds = self.bounds
+        visited = generated = 0
+        word_counts = []
+        heap = [(-bounds[state], fragment, False, state, index)]
+        while heap and len(word_counts) < k:
+            priority, word, is_word, state, index = heapq.heappop(heap)
+            if is_word:
+                word_counts.append((word, -priority))
+                continue
+            visited += 1
+            if finals[state]:
+                generated += 1
+                heapq.heappush(heap, (-counts[index], word, True, state,
+                                      index))
+            for edge in range(first_edge[state], first_edge[state + 1]):
+                target = edge_targets[edge]
+                heapq.heappush(heap, (-bounds[target],
+                                      word + label_char(edge_labels[edge]),
+                                      False, target,
+                                      index + edge_offsets[edge]))
+        if trace is not None:
+            trace.record(visited, generated)
+        return word_counts
+
+
+def build_automaton(words):
+    """Returns the arrays (finals, first_edge, edge_labels, edge_targets,
+    edge_offsets) of the minimal acyclic automaton accepting words, using the
+    incremental construction of Daciuk et al. for sorted input: after each
+    word, the states of the previous word that are no longer on the common
+    prefix are replaced by an equivalent registered state or registered
+    themselves. States are numbered children first, so the root is the last
+    state.
+
+    :param words: Iterable of distinct words in sorted order.
+    """
+    finals = array('B')
+    first_edge = array('I')
+    edge_labels = array('I')
+    edge_targets = array('I')
+    register = {}
+
+    def freeze(node):
+        """Returns the number of the registered state equivalent to node,
+        whose edges all lead to registered states.
+        """
+        signature = (node[0], tuple(node[1]))
+        state = register.get(signature)
+        if state is None:
+            state = register[signature] = len(finals)
+            finals.append(node[0])
+            first_edge.append(len(edge_labels))
+            for code, target in node[1]:
+                edge_labels.append(code)
+                edge_targets.append(target)
+        return state
+
+    def freeze_path(path, depth):
+        """Freezes the nodes of path below depth, deepest first.
+        """
+        while len(path) > depth + 1:
+            node = path.pop()
+            parent_edges = path[-1][1]
+            parent_edges[-1] = (parent_edges[-1][0], freeze(node))
+
+    root = [0, []]  # [final, [(label code, child node or state)]]
+    path = [root]
+    previous = ''
+    for word in words:
+        if word <= previous and previous:
+            raise ValueError('words must be distinct and sorted')
+        common = 0
+        limit = min(len(word), len(previous))
+        while common < limit and word[common] == previous[common]:
+            common += 1
+        freeze_path(path, common)
+        node = path[-1]
+        for letter in word[common:]:
+            child = [0, []]
+            node[1].append((ord(letter), child))
+            path.append(child)
+            node = child
+        node[0] = 1
+        previous = word
+    freeze_path(path, 0)
+    freeze(root)
+    first_edge.append(len(edge_labels))
+    # Count the words below every state; children come before parents.
+    words_below = array('L', [0] * len(finals))
+    edge_offsets = array('I', [0] * len(edge_labels))
+    for state in range(len(finals)):
+        below = finals[state]
+        for edge in range(first_edge[state], first_edge[state + 1]):
+            edge_offsets[edge] = below
+            below += words_below[edge_targets[edge]]
+        words_below[state] = below
+    return finals, first_edge, edge_labels, edge_targets, edge_offsets
+
+
+def find_edge(first_edge, edge_labels, state, code):
+    """Returns the index of the edge of state labelled code, found by binary
+    search over the sorted labels, or -1 if there is none.
+
+    :param array first_edge: First edge of every state.
+    :param array edge_labels: Label code of every edge.
+    :param int state: The source state.
+    :param int code: The ordinal of the letter.
+    """
+    low = first_edge[state]
+    high = first_edge[state + 1]
+    while low < high:
+        middle = (low + high) // 2
+        label = edge_labels[middle]
+        if label < code:
+            low = middle + 1
+        elif label > code:
+            high = middle
+        else:
+            return middle
+    return -1
+
+
+def read_word_counts(path):
+    """Generates (word, count) pairs from a file with one word and its count
+    per line separated by whitespace. Blank lines are skipped. Throws
+    ValueError if a line is malformed.
+
+    :param str path: Path of the word count file.
+    """
+    with open(path) as count_file:
+        for line_number, line in enumerate(count_file, 1):
+            fields = line.split()
+            if not fields:
+                continue
+            if len(fields) != 2:
+                raise ValueError('line %d of %s is not "word count"' %
+                                 (line_number, path))
+            yield fields[0], int(fields[1])
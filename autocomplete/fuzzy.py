@@ -0,0 +1,171 @@
+"""Contains the typo-tolerant completion used by
+AutocompleteProvider.getFuzzyWords.
+
+The search walks the memory of any engine letter by letter through the
+_root_node, _child_nodes and _node_counts methods, carrying the row of an
+edit distance table between the fragment and the path walked so far. A word
+matches when the fragment is within max_edits of one of its prefixes, and
+branches whose rows have grown past max_edits are pruned. Insertions,
+deletions, substitutions and transpositions of adjacent letters cost one
+edit; with a keyboard layout, substituting a neighbouring key costs
+ADJACENT_COST instead.
+
+Words are ranked by confidence * edit_penalty ** cost, where cost is the
+smallest number of edits matching the fragment to a prefix of the word, so an
+exact completion only loses to a typo match that is much more common. The
+search is best-first like get_top_word_counts and stops once it has computed
+the rows of max_nodes nodes, which bounds its latency whatever the size of
+the memory.
+"""
+
+import heapq
+
+ADJACENT_COST = 0.5
+EDIT_PENALTY = 0.1
+MAX_NODES = 5000
+
+
+def keyboard_neighbours(rows):
+    """Returns a dictionary mapping each key to a string of the keys next to
+    it on a keyboard whose rows are staggered like a typewriter, so a key
+    touches two keys of the row above and two of the row below.
+
+    :param list rows: The letters of each row from top to bottom.
+    """
+    neighbours = {}
+    for row_index, row in enumerate(rows):
+        for index, letter in enumerate(row):
+            near = set()
+            for other_index in (index - 1, index + 1):
+                if 0 <= other_index < len(row):
+                    near.add(row[other_index])
+            if row_index > 0:
+                above = rows[row_index - 1]
+                near.update(above[i] for i in (index, index + 1)
+                            if 0 <= i < len(above))
+            if row_index + 1 < len(rows):
+                below = rows[row_index + 1]
+                near.update(below[i] for i in (index - 1, index)
+                            if 0 <= i < len(below))
+            neighbours[letter] = ''.join(sorted(near))
+    return neighbours
+
+
+QWERTY = keyboard_neighbours(['qwertyuiop', 'asdfghjkl', 'zxcvbnm'])
+
+
+def next_row(row, previous_row, fragment, letter, previous_letter, keyboard,
+             adjacent_cost=ADJACENT_COST):
+    """Returns the edit distance row of a path extended by letter, given the
+    rows of the path and of the path without its last letter.
+
+    :param list row: Row of the path: row[j] is the cost of matching the path
+    to fragment[:j].
+    :param list previous_row: Row of the path without its last letter, or
+    None at the root.
+    :param str fragment: Normalized word fragment.
+    :param str letter: The letter added to the path.
+    :param str previous_letter: The last letter of the path, or None at the
+    root.
+    :param dict keyboard: Maps each key to a string of its neighbours, or None.
+    :param float adjacent_cost: Cost of substituting a neighbouring key.
+    """
+    near = keyboard.get(letter, '') if keyboard else ''
+    left = row[0] + 1
+    new_row = [left]
+    diagonal = row[0]
+    for j in range(1, len(row)):
+        typed = fragment[j - 1]
+        above = row[j]
+        if typed == letter:
+            cost = diagonal
+        elif typed in near:
+            cost = diagonal + adjacent_cost
+        else:
+            cost = diagonal + 1
+        if above + 1 < cost:
+            cost = above + 1
+        if left + 1 < cost:
+            cost = left + 1
+        if (j > 1 and typed == previous_letter and fragment[j - 2] == letter
+                and previous_row is not None and
+                previous_row[j - 2] + 1 < cost):
+            cost = previous_row[j - 2] + 1
+        new_row.append(cost)
+        left = cost
+        diagonal = above
+    return new_row
+
+
+def top_word_costs(provider, fragment, k=10, max_edits=1, keyboard=None,
+                   max_nodes=MAX_NODES, edit_penalty=EDIT_PENALTY,
+                   adjacent_cost=ADJACENT_COST, trace=None):
+    """Returns (word, confidence, cost) triples for the k best words whose
+    prefixes are within max_edits of fragment, ordered by
+    confidence * edit_penalty ** cost and then alphabetically. When the
+    search computes the rows of max_nodes nodes before finding k words, the
+    best words found so far are returned.
+
+    :param AutocompleteProvider provider: The provider whose memory is
+    searched. The caller holds its read lock.
+    :param str fragment: Normalized word fragment.
+    :param int k: Maximum number of words to return, or None for all.
+    :param int max_edits: Maximum edit cost of a match.
+    :param dict keyboard: Maps each key to a string of its neighbours, such as
+    QWERTY, or None to make every substitution cost one edit.
+    :param int max_nodes: Maximum number of nodes whose rows are computed.
+    :param float edit_penalty: Factor the score is multiplied by per edit.
+    :param float adjacent_cost: Cost of substituting a neighbouring key.
+    :param QueryTrace trace: Collects the work done, when instrumented.
+    """
+    if not fragment:
+        return []
+    child_nodes = provider._child_nodes
+    node_counts = provider._node_counts
+    root = provider._root_node()
+    root_row = list(range(len(fragment) + 1))
+    # Node entries are (-priority, word, False, node, row, previous_row,
+    # match) where match is the lowest cost of matching fragment to a prefix
+    # of word; word entries are (-score, word, True, cost, confidence).
+    heap = [(-node_counts(root)[1], '', False, root, root_row, None,
+             root_row[-1])]
+    word_costs = []
+    visited = generated = 0
+    while heap and (k is None or len(word_costs) < k):
+        entry = heapq.heappop(heap)
+        if entry[2]:
+            word_costs.append((entry[1], entry[4], entry[3]))
+            continue
+        if visited >= max_nodes:
+            break
+        _, word, _, node, row, previous_row, match = entry
+        confidence, _ = node_counts(node)
+        if confidence > 0 and match <= max_edits:
+            generated += 1
+            heapq.heappush(heap, (-confidence * edit_penalty ** match, word,
+                                  True, match, confidence))
+        previous_letter = word[-1] if word else None
+        # Later rows never drop below the smallest entry of the last two.
+        row_bound = min(match, min(row))
+        for letter, child in child_nodes(node):
+            visited += 1
+            child_row = next_row(row, previous_row, fragment, letter,
+                                 previous_letter, keyboard, adjacent_cost)
+            child_match = min(match, child_row[-1])
+            bound = min(row_bound, min(child_row))
+            if bound > max_edits:
+                continue
+            _, max_confidence = node_counts(child)
+            if max_confidence > 0:
+                heapq.heappush(heap, (-max_confidence * edit_penalty ** bound,
+                                      word + letter, False, child, child_row,
+                                      row, child_match))
+    if k is None or len(word_costs) < k:
+        # Out of budget: add the words already scored, best first.
+        for entry in sorted(entry for entry in heap if entry[2]):
+            if k is not None and len(word_costs) >= k:
+                break
+            word_costs.append((entry[1], entry[4], entry[3]))
+    if trace is not None:
+        trace.record(visited, generated)
+    return word_costs
@@ -0,0 +1,236 @@
+"""Contains the Instrumentation class that records what getWords and training
+calls of an AutocompleteProvider cost. Instrumentation is opt-in: a provider
+only checks whether it is enabled, so an uninstrumented provider pays a single
+attribute test per call.
+"""
+
+import cProfile
+import pstats
+import threading
+import timeit
+
+
+class Histogram:
+    """Latency histogram with power-of-two microsecond buckets: bucket i
+    counts the calls that took less than 2 ** i microseconds, and at least
+    2 ** (i - 1).
+    """
+
+    def __init__(self):
+        """Initalizes Histogram object.
+        """
+        self.buckets = [0] * 40
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds):
+        """Adds one measurement.
+
+        :param float seconds: The measured latency.
+        """
+        microseconds = seconds * 1e6
+        self.buckets[min(int(microseconds).bit_length(), 39)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def percentile(self, fraction):
+        """Returns the upper bound in microseconds of the bucket holding the
+        given fraction of measurements, or 0 without measurements.
+
+        :param float fraction: Fraction between 0 and 1.
+        """
+        if not self.count:
+            return 0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return 2 ** index
+        return 2 ** (len(self.buckets) - 1)
+
+    def summary(self):
+        """Returns a dictionary with the count, mean, p50, p90, p99 and
+        maximum in microseconds and the non-empty buckets keyed by their upper
+        bound.
+        """
+        return {'count': self.count,
+                'mean_us': 1e6 * self.total / self.count if self.count else 0,
+                'p50_us': self.percentile(0.50),
+                'p90_us': self.percentile(0.90),
+                'p99_us': self.percentile(0.99),
+                'max_us': 1e6 * self.maximum,
+                'buckets_us': dict((2 ** index, bucket_count) for index,
+                                   bucket_count in enumerate(self.buckets)
+                                   if bucket_count)}
+
+
+class QueryTrace:
+    """Collects the work done by the storage engine for one query. Engines
+    receive a trace only while instrumentation is enabled.
+    """
+
+    def __init__(self):
+        """Initalizes QueryTrace object.
+        """
+        self.nodes_visited = 0
+        self.candidates_generated = 0
+        self.cache_hit = False
+
+    def record(self, nodes_visited, candidates_generated):
+        """Adds the work of one search.
+
+        :param int nodes_visited: Number of nodes visited below the fragment.
+        :param int candidates_generated: Number of candidates produced before
+        the result was cut to k.
+        """
+        self.nodes_visited += nodes_visited
+        self.candidates_generated += candidates_generated
+
+
+class Instrumentation:
+    """Records latency histograms and work counters for the getWords and
+    training calls of one provider, and optionally profiles them with
+    cProfile or reports every call to a callback.
+    """
+
+    def __init__(self, callback=None, profile=False, thread_safe=False):
+        """Initalizes Instrumentation object.
+
+        :param callback: Called with a dictionary describing every getWords
+        and training call, e.g. to forward it to a metrics system.
+        :param bool profile: Run every call under a cProfile profiler. The
+        profiler only sees the thread it was enabled in, so use it from one
+        thread at a time.
+        :param bool thread_safe: Guard the counters with a mutex.
+        """
+        self.callback = callback
+        self.profiler = cProfile.Profile() if profile else None
+        self.mutex = threading.Lock() if thread_safe else None
+        self.query_latency = Histogram()
+        self.train_latency = Histogram()
+        self.nodes_visited = 0
+        self.candidates_generated = 0
+        self.candidates_returned = 0
+        self.cache_hits = 0
+        self.words_trained = 0
+        self.tokens_trained = 0
+
+    def query(self, provider, fragment, k):
+        """Runs a getWords query for a normalized fragment and records it.
+        Returns the candidates.
+
+        :param AutocompleteProvider provider: The instrumented provider.
+        :param str fragment: Normalized word fragment.
+        :param int k: Maximum number of candidates to return, or None for all.
+        """
+        trace = QueryTrace()
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.enable()
+        start = timeit.default_timer()
+        try:
+            candidate_list = provider._locked_query(fragment, k, trace)
+        finally:
+            seconds = timeit.default_timer() - start
+            if profiler is not None:
+                profiler.disable()
+        event = {'op': 'getWords',
+                 'fragment': fragment,
+                 'k': k,
+                 'seconds': seconds,
+                 'nodes_visited': trace.nodes_visited,
+                 'candidates_generated': trace.candidates_generated,
+                 'candidates_returned': len(candidate_list),
+                 'cache_hit': trace.cache_hit}
+        if self.mutex is None:
+            self._add_query(event)
+        else:
+            with self.mutex:
+                self._add_query(event)
+        if self.callback is not None:
+            self.callback(event)
+        return candidate_list
+
+    def learn(self, provider, word_counts, pair_counts=None):
+        """Memorizes word counts with provider._locked_learn and records the
+        call.
+
+        :param AutocompleteProvider provider: The instrumented provider.
+        :param word_counts: Mapping of normalized word to occurrences.
+        :param pair_counts: Mapping of pairs of consecutive words to
+        occurrences, or None.
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.enable()
+        start = timeit.default_timer()
+        try:
+            provider._locked_learn(word_counts, pair_counts)
+        finally:
+            seconds = timeit.default_timer() - start
+            if profiler is not None:
+                profiler.disable()
+        event = {'op': 'train',
+                 'seconds': seconds,
+                 'words': len(word_counts),
+                 'tokens': sum(word_counts.values())}
+        if self.mutex is None:
+            self._add_training(event)
+        else:
+            with self.mutex:
+                self._add_training(event)
+        if self.callback is not None:
+            self.callback(event)
+
+    def _add_query(self, event):
+        """Adds a getWords event to the counters.
+        """
+        self.query_latency.add(event['seconds'])
+        self.nodes_visited += event['nodes_visited']
+        self.candidates_generated += event['candidates_generated']
+        self.candidates_returned += event['candidates_returned']
+        self.cache_hits += event['cache_hit']
+
+    def _add_training(self, event):
+        """Adds a training event to the counters.
+        """
+        self.train_latency.add(event['seconds'])
+        self.words_trained += event['words']
+        self.tokens_trained += event['tokens']
+
+    def stats(self):
+        """Returns a dictionary with the latency histograms and work counters.
+        Training throughput counts the time spent memorizing, after passages
+        have been tokenized.
+        """
+        queries = self.query_latency.count
+        train_seconds = self.train_latency.total
+        return {'queries': queries,
+                'query_latency': self.query_latency.summary(),
+                'nodes_visited': self.nodes_visited,
+                'nodes_visited_per_query': (
+                    float(self.nodes_visited) / queries if queries else 0),
+                'candidates_generated': self.candidates_generated,
+                'candidates_returned': self.candidates_returned,
+                'cache_hits': self.cache_hits,
+                'train_calls': self.train_latency.count,
+                'train_latency': self.train_latency.summary(),
+                'words_trained': self.words_trained,
+                'tokens_trained': self.tokens_trained,
+                'train_tokens_per_second': (
+                    self.tokens_trained / train_seconds
+                    if train_seconds else 0)}
+
+    def profile_stats(self, sort='cumulative'):
+        """Returns the cProfile results as a pstats.Stats object, or None when
+        profiling is disabled.
+
+        :param str sort: Key the statistics are sorted by.
+        """
+        if self.profiler is None:
+            return None
+        return pstats.Stats(self.profiler).sort_stats(sort)
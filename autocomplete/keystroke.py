@@ -0,0 +1,170 @@
+"""Contains the KeystrokeSession class returned by
+AutocompleteProvider.session, which completes a word as it is typed.
+
+A keyboard asks for suggestions after every keystroke: "t", "th", "thi",
+"thin". Calling getWords each time normalizes the whole fragment again, walks
+down from the root and searches below the fragment from scratch. A session
+keeps the node reached by every prefix of the fragment, so a keystroke walks
+one letter down and a backspace walks none. It also keeps the candidates it
+found for each prefix. The words of a prefix's top k that start with a
+longer fragment are the most confident words of that fragment, so when there
+are k of them, or when the top k of the prefix held fewer than k words and
+therefore every word below it, the candidates of the longer fragment are
+filtered from it instead of searched.
+
+The saved nodes and candidates describe the memory at the time they were
+found. When the provider is trained, merged, decayed or pruned its version
+changes, and the session walks its fragment again on its next call.
+"""
+
+from autocomplete import candidate as cand
+from autocomplete import tokenizer
+
+
+class KeystrokeSession:
+    """Completes the fragment typed so far, one keystroke at a time. Gives
+    the same candidates as getWords(session.fragment, k). A session is meant
+    for a single typist and is not thread-safe itself, but any number of
+    sessions may share a thread-safe provider.
+    """
+
+    def __init__(self, provider, fragment=''):
+        """Initalizes KeystrokeSession object.
+
+        :param AutocompleteProvider provider: The provider to complete from.
+        :param str fragment: The text typed so far.
+        """
+        self.provider = provider
+        self.fragment = ''
+        self.version = None
+        self.lengths = []  # normalized length of each character pushed
+        self.path = []  # path[i] is the node of fragment[:i] or None
+        self.results = []  # results[i] maps k to the word counts of depth i
+        self.push(fragment)
+
+    def __len__(self):
+        """Returns the number of characters pushed and not popped.
+        """
+        return len(self.lengths)
+
+    def push(self, text):
+        """Types one or more characters at the end of the fragment. Each
+        character can be removed again with pop.
+
+        :param str text: The characters typed.
+        """
+        provider = self.provider
+        unicode_letters = provider.unicode_letters
+        letters = []
+        for character in text:
+            letter = tokenizer.normalize(character, unicode_letters)
+            self.lengths.append(len(letter))
+            letters.append(letter)
+        letters = ''.join(letters)
+        if provider.lock is None:
+            self._walk(letters)
+        else:
+            with provider.lock.reading():
+                self._walk(letters)
+
+    def pop(self):
+        """Removes the last character pushed, like a backspace. Throws
+        IndexError when nothing is left to remove.
+        """
+        length = self.lengths.pop()
+        if length:
+            self.fragment = self.fragment[:-length]
+            del self.path[-length:]
+            del self.results[-length:]
+
+    def clear(self):
+        """Removes every character, as when a word is finished.
+        """
+        del self.lengths[:]
+        self.fragment = ''
+        del self.path[1:]
+        del self.results[1:]
+
+    def suggestions(self, k=10):
+        """Returns list of candidates for the fragment ordered by confidence,
+        like getWords(session.fragment, k).
+
+        :param int k: Maximum number of candidates to return, or None for all.
+        """
+        provider = self.provider
+        if not self.fragment or provider.instrumentation is not None:
+            return provider.getWords(self.fragment, k)
+        if provider.lock is None:
+            word_counts = self._word_counts(k)
+        else:
+            with provider.lock.reading():
+                word_counts = self._word_counts(k)
+        Candidate = cand.Candidate
+        return [Candidate(word, confidence)
+                for word, confidence in word_counts]
+
+    def _walk(self, letters):
+        """Walks letters down from the end of the fragment and appends them
+        to it. The caller holds the read lock.
+        """
+        if self.version != self.provider.version:
+            letters = self.fragment + letters
+            self.fragment = ''
+            self.version = self.provider.version
+            self.path = [self.provider._root_node()]
+            self.results = [{}]
+        child_node = self.provider._child_node
+        path = self.path
+        node = path[-1]
+        for letter in letters:
+            if node is not None:
+                node = child_node(node, letter)
+            path.append(node)
+            self.results.append({})
+        self.fragment += letters
+
+    def _word_counts(self, k):
+        """Returns the (word, confidence) pairs of the fragment, found from
+        the saved node or filtered from the saved words of a shorter
+        fragment. The caller holds the read lock.
+        """
+        self._walk('')
+        depth = len(self.fragment)
+        results = self.results
+        word_counts = results[depth].get(k)
+        if word_counts is not None:
+            return word_counts
+        fragment = self.fragment
+        top_lists = self.provider.top_lists
+        if top_lists is not None and k is not None:
+            word_counts = top_lists.get(fragment, k)
+            if word_counts is not None:
+                results[depth][k] = word_counts
+                return word_counts
+        node = self.path[depth]
+        if node is None:
+            word_counts = []
+        elif k is None:
+            # Imported here, as autocomplete_provider imports this module.
+            from autocomplete import autocomplete_provider as auto
+            word_counts = auto.rank_word_counts(
+                self.provider._word_counts_at(node, fragment))
+        else:
+            # The words of the closest shorter fragment that start with this
+            # one are its most confident words. They are all of its top k if
+            # there are k of them or if they are all the words below it.
+            shorter_counts = None
+            for shorter in range(depth - 1, 0, -1):
+                shorter_counts = results[shorter].get(k)
+                if shorter_counts is not None:
+                    break
+            if shorter_counts is not None:
+                word_counts = [(word, confidence) for word, confidence
+                               in shorter_counts if word.startswith(fragment)]
+                if len(shorter_counts) == k and len(word_counts) < k:
+                    word_counts = None
+            if word_counts is None:
+                word_counts = self.provider._top_word_counts_at(node,
+                                                                fragment, k)
+        results[depth][k] = word_counts
+        return word_counts
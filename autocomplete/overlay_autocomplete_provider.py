@@ -0,0 +1,278 @@
+"""Contains the OverlayAutocompleteProvider class, which personalizes a shared
+base provider with the words of a single user.
+
+Serving many users with a full provider each duplicates the common
+vocabulary once per user. An overlay references a base provider of any
+engine and memorizes only what its user typed, in a private trie of the
+dictionary engine, so the memory of a user grows with their personal
+vocabulary. The confidence of a word is
+
+    base_weight * (confidence in base) + weight * (confidence in overlay)
+
+Queries walk both tries at once, letter by letter, through the _root_node,
+_child_node, _child_nodes and _node_counts methods of the base engine. Below
+a node that only one of them has, the search is handed to that engine's own
+search, so a fragment the user never typed a word for is answered at the
+speed of the base engine.
+
+The base is only read. It should not be trained while overlays are serving,
+which also makes a frozen automaton or a memory-mapped snapshot a good base.
+Training, merging, decaying and pruning an overlay only change its own counts.
+"""
+
+import heapq
+from autocomplete import autocomplete_provider as auto
+
+
+class OverlayAutocompleteProvider(auto.AutocompleteProvider):
+    """AutocompleteProvider that adds the words of one user to a shared base
+    provider. Nodes are (base node, own node) pairs, where either side is
+    None when that memory has no such prefix.
+    """
+
+    def __init__(self, base, weight=1, base_weight=1, **options):
+        """Initalizes OverlayAutocompleteProvider object. Throws ValueError if
+        a weight is not positive.
+
+        :param AutocompleteProvider base: The shared provider.
+        :param weight: Multiplies the confidences the user trained.
+        :param base_weight: Multiplies the confidences of the base.
+        :param options: Other keyword arguments of the AutocompleteProvider
+        constructor, such as cache_size. unicode_letters defaults to that of
+        the base, so fragments are normalized the same way.
+        """
+        if weight <= 0 or base_weight <= 0:
+            raise ValueError('weights must be positive')
+        self.base = base
+        self.weight = weight
+        self.base_weight = base_weight
+        options.setdefault('unicode_letters', base.unicode_letters)
+        auto.AutocompleteProvider.__init__(self, **options)
+
+    def iter_words(self):
+        """Generates a (word, confidence) pair for every word of the base or
+        the overlay, with weighted confidences.
+        """
+        return iter(self._word_counts_at(self._root_node(), ''))
+
+    def iter_own_words(self):
+        """Generates a (word, confidence) pair for every word the user
+        trained, without the base and weights. Train a new overlay with
+        train_counts(dict(iter_own_words())) to restore it.
+        """
+        return auto.iter_word_counts('', self.memory)
+
+    def _root_node(self):
+        """Returns the pair of roots for walking both memories letter by
+        letter.
+        """
+        return (self.base._root_node(),
+                auto.AutocompleteProvider._root_node(self))
+
+    def _child_nodes(self, node):
+        """Returns (letter, child pair) pairs for the children of either side
+        of a node pair, in alphabetical order.
+
+        :param tuple node: A (base node, own node) pair.
+        """
+        base_node, own_node = node
+        children = {}
+        if base_node is not None:
+            for letter, child in self.base._child_nodes(base_node):
+                children[letter] = (child, None)
+        if own_node is not None:
+            for letter, child in auto.AutocompleteProvider._child_nodes(
+                    self, own_node):
+                children[letter] = (children.get(letter, (None,))[0], child)
+        return sorted(children.items())
+
+    def _child_node(self, node, letter):
+        """Returns the child pair of a node pair reached by letter, or None.
+
+        :param tuple node: A (base node, own node) pair.
+        :param str letter: The next letter.
+        """
+        base_node, own_node = node
+        if base_node is not None:
+            base_node = self.base._child_node(base_node, letter)
+        if own_node is not None:
+            own_node = auto.AutocompleteProvider._child_node(self, own_node,
+                                                             letter)
+        if base_node is None and own_node is None:
+            return None
+        return base_node, own_node
+
+    def _node_counts(self, node):
+        """Returns the weighted confidence of the word ending at a node pair
+        and an upper bound of the weighted confidences below it.
+
+        :param tuple node: A (base node, own node) pair.
+        """
+        base_node, own_node = node
+        confidence = max_confidence = 0
+        if base_node is not None:
+            base_confidence, base_max = self.base._node_counts(base_node)
+            confidence = self.base_weight * base_confidence
+            max_confidence = self.base_weight * base_max
+        if own_node is not None:
+            confidence += self.weight * own_node.confidence
+            max_confidence += self.weight * own_node.max_confidence
+        return confidence, max_confidence
+
+    def _word_counts(self, fragment, trace=None):
+        """Returns a (word, confidence) pair for every word starting with
+        fragment.
+
+        :param str fragment: Normalized word fragment.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        if not fragment:
+            return []
+        node = self._bottom_pair(fragment)
+        if node is None:
+            return []
+        return self._word_counts_at(node, fragment, trace)
+
+    def _word_counts_at(self, node, fragment, trace=None):
+        """Returns _word_counts(fragment) given the node pair fragment leads
+        to.
+
+        :param tuple node: A (base node, own node) pair from _child_node.
+        :param str fragment: Normalized word fragment.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        visited = 0
+        word_counts = []
+        stack = [(fragment, node)]
+        while stack:
+            word, node = stack.pop()
+            base_node, own_node = node
+            if own_node is None or base_node is None:
+                word_counts.extend(self._side_word_counts(node, word))
+                continue
+            visited += 1
+            confidence, _ = self._node_counts(node)
+            if confidence > 0:
+                word_counts.append((word, confidence))
+            for letter, child in reversed(self._child_nodes(node)):
+                stack.append((word + letter, child))
+        if trace is not None:
+            trace.record(visited, len(word_counts))
+        return word_counts
+
+    def _top_word_counts(self, fragment, k, trace=None):
+        """Returns (word, confidence) pairs for the k most confident words
+        starting with fragment, ordered by confidence and then alphabetically.
+
+        :param str fragment: Normalized word fragment.
+        :param int k: Maximum number of words to return.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        if not fragment:
+            return []
+        node = self._bottom_pair(fragment)
+        if node is None:
+            return []
+        return self._top_word_counts_at(node, fragment, k, trace)
+
+    def _top_word_counts_at(self, node, fragment, k, trace=None):
+        """Returns _top_word_counts(fragment, k) given the node pair fragment
+        leads to. The best-first search of get_top_word_counts runs over node
+        pairs; a pair with one side missing adds the best words of the other
+        side's own search instead of being expanded.
+
+        :param tuple node: A (base node, own node) pair from _child_node.
+        :param str fragment: Normalized word fragment.
+        :param int k: Maximum number of words to return.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        base_child_nodes = self.base._child_nodes
+        base_node_counts = self.base._node_counts
+        base_weight = self.base_weight
+        weight = self.weight
+        heappush = heapq.heappush
+        visited = generated = 0
+        word_counts = []
+        heap = [(-self._node_counts(node)[1], fragment, False, node)]
+        while heap and len(word_counts) < k:
+            priority, word, is_word, node = heapq.heappop(heap)
+            if is_word:
+                word_counts.append((word, -priority))
+                continue
+            base_node, own_node = node
+            if own_node is None or base_node is None:
+                # Only the words still missing can come from this subtree.
+                for side_word, confidence in self._side_word_counts(
+                        node, word, k - len(word_counts)):
+                    generated += 1
+                    heappush(heap, (-confidence, side_word, True, None))
+                continue
+            visited += 1
+            confidence, _ = self._node_counts(node)
+            if confidence > 0:
+                generated += 1
+                heappush(heap, (-confidence, word, True, None))
+            # Children are expanded inline rather than through _child_nodes,
+            # whose sorted pairs only matter to the order of full scans.
+            own_memory = own_node.memory or {}
+            own_letters = set(own_memory)
+            for letter, base_child in base_child_nodes(base_node):
+                own_child = own_memory.get(letter)
+                max_confidence = base_weight * base_node_counts(base_child)[1]
+                if own_child is not None:
+                    own_letters.discard(letter)
+                    max_confidence += weight * own_child.max_confidence
+                if max_confidence > 0:
+                    heappush(heap, (-max_confidence, word + letter, False,
+                                    (base_child, own_child)))
+            for letter in own_letters:
+                own_child = own_memory[letter]
+                if own_child.max_confidence > 0:
+                    heappush(heap, (-weight * own_child.max_confidence,
+                                    word + letter, False, (None, own_child)))
+        if trace is not None:
+            trace.record(visited, generated)
+        return word_counts
+
+    def _bottom_pair(self, fragment):
+        """Returns the node pair at the end of the fragment path, or None if
+        neither memory has the fragment.
+
+        :param str fragment: Normalized word fragment.
+        """
+        node = self._root_node()
+        for letter in fragment:
+            node = self._child_node(node, letter)
+            if node is None:
+                return None
+        return node
+
+    def _side_word_counts(self, node, fragment, k=None):
+        """Returns the weighted (word, confidence) pairs below a node pair
+        with a single side, found by the search of that side's engine: the k
+        most confident in order, or all of them when k is None.
+
+        :param tuple node: A (base node, own node) pair with one side None.
+        :param str fragment: The word spelled by the path to node.
+        :param int k: Maximum number of words to return, or None for all.
+        """
+        base_node, own_node = node
+        if own_node is None:
+            weight = self.base_weight
+            if k is None:
+                word_counts = self.base._word_counts_at(base_node, fragment)
+            else:
+                word_counts = self.base._top_word_counts_at(base_node,
+                                                            fragment, k)
+        else:
+            weight = self.weight
+            if k is None:
+                word_counts = auto.AutocompleteProvider._word_counts_at(
+                    self, own_node, fragment)
+            else:
+                word_counts = auto.AutocompleteProvider._top_word_counts_at(
+                    self, own_node, fragment, k)
+        if weight == 1:
+            return word_counts
+        return [(word, weight * confidence) for word, confidence
+                in word_counts]
@@ -0,0 +1,134 @@
+"""Contains functions to train an AutocompleteProvider with a pool of worker
+processes. Each worker tokenizes and counts the words (and, for providers
+counting bigrams, the pairs of consecutive words) of its share of the corpus;
+the parent sums the partial count tables and memorizes every distinct word
+once.
+"""
+
+import collections
+import functools
+import itertools
+import multiprocessing
+from autocomplete import autocomplete_provider as auto
+from autocomplete import bigram
+
+
+def count_words(passages, unicode_letters=False, bigrams=False):
+    """Returns a Counter of the preprocessed words of passages, or with
+    bigrams a (word Counter, pair Counter) pair. Runs in a worker process.
+
+    :param list passages: Passages (str) to be counted.
+    :param bool unicode_letters: Remove all Unicode punctuation and symbols
+    instead of only ASCII punctuation.
+    :param bool bigrams: Also count pairs of consecutive words.
+    """
+    word_counts = collections.Counter()
+    pair_counts = collections.Counter()
+    for passage in passages:
+        word_list = auto.preprocess(passage, unicode_letters)
+        word_counts.update(word_list)
+        if bigrams:
+            bigram.count_pairs(word_list, pair_counts)
+    if bigrams:
+        return word_counts, pair_counts
+    return word_counts
+
+
+def count_file_words(path, unicode_letters=False, chunk_size=65536,
+                     bigrams=False):
+    """Returns a Counter of the preprocessed words of a text file, read in
+    chunks, or with bigrams a (word Counter, pair Counter) pair. Runs in a
+    worker process.
+
+    :param str path: Path of the text file.
+    :param bool unicode_letters: Remove all Unicode punctuation and symbols
+    instead of only ASCII punctuation.
+    :param int chunk_size: Number of characters read at a time.
+    :param bool bigrams: Also count pairs of consecutive words.
+    """
+    word_counts = collections.Counter()
+    pair_counts = collections.Counter()
+    last_word = []
+    with open(path) as passage_file:
+        chunks = auto.read_chunks(passage_file, chunk_size)
+        for word_list in auto.stream_preprocess(chunks, unicode_letters):
+            word_counts.update(word_list)
+            if bigrams:
+                bigram.count_pairs(last_word + word_list, pair_counts)
+                last_word = word_list[-1:] or last_word
+    if bigrams:
+        return word_counts, pair_counts
+    return word_counts
+
+
+def iter_batches(iterable, batch_size):
+    """Generates consecutive lists of at most batch_size items.
+
+    :param iterable: The items to be batched.
+    :param int batch_size: Maximum number of items per list.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def train_parallel(provider, passages, processes=None, chunk_size=1000):
+    """Trains provider with passages, counting words in a pool of worker
+    processes.
+
+    :param AutocompleteProvider provider: The provider to be trained.
+    :param passages: Iterable of passages (str).
+    :param int processes: Number of worker processes. Defaults to the number
+    of CPUs.
+    :param int chunk_size: Number of passages sent to a worker at a time.
+    """
+    worker = functools.partial(count_words,
+                               unicode_letters=provider.unicode_letters,
+                               bigrams=provider.bigrams is not None)
+    _train_from_pool(provider, worker, iter_batches(passages, chunk_size),
+                     processes)
+
+
+def train_files_parallel(provider, paths, processes=None, chunk_size=65536):
+    """Trains provider with the text of several files, counting the words of
+    each file in a pool of worker processes.
+
+    :param AutocompleteProvider provider: The provider to be trained.
+    :param paths: Iterable of text file paths.
+    :param int processes: Number of worker processes. Defaults to the number
+    of CPUs.
+    :param int chunk_size: Number of characters read at a time.
+    """
+    worker = functools.partial(count_file_words,
+                               unicode_letters=provider.unicode_letters,
+                               chunk_size=chunk_size,
+                               bigrams=provider.bigrams is not None)
+    _train_from_pool(provider, worker, paths, processes)
+
+
+def _train_from_pool(provider, worker, tasks, processes):
+    """Maps worker over tasks in a process pool, sums the returned Counters
+    and memorizes the total in provider.
+    """
+    word_counts = collections.Counter()
+    pair_counts = None
+    if provider.bigrams is not None:
+        pair_counts = collections.Counter()
+    pool = multiprocessing.Pool(processes)
+    try:
+        for partial_counts in pool.imap_unordered(worker, tasks):
+            if pair_counts is None:
+                word_counts.update(partial_counts)
+            else:
+                word_counts.update(partial_counts[0])
+                pair_counts.update(partial_counts[1])
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    provider._learn(word_counts, pair_counts)
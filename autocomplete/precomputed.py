@@ -0,0 +1,124 @@
+"""Contains the TopKLists class, which keeps the k most confident words of
+every prefix so AutocompleteProvider.getWords can answer top-k queries
+without searching below the fragment.
+
+A list is kept for every prefix of every memorized word, up to max_depth
+letters. Entries are (-confidence, word) tuples in ascending order, which is
+the order of getWords: by confidence and then alphabetically. Training only
+raises confidences, so when a word is memorized its new confidence can only
+move it up the lists of its prefixes, and the lists stay exact without
+looking at any other word. Merging, decaying and pruning can lower or remove
+confidences, so they rebuild the lists from every word.
+"""
+
+import bisect
+import sys
+
+
+class TopKLists:
+    """Maps each prefix of up to max_depth letters to the k most confident
+    words starting with it.
+    """
+
+    def __init__(self, k, max_depth=None):
+        """Initalizes TopKLists object.
+
+        :param int k: Number of words kept per prefix.
+        :param int max_depth: Length of the longest prefix with a list, or
+        None for every prefix.
+        """
+        if k < 1:
+            raise ValueError('k must be at least 1')
+        self.k = k
+        self.max_depth = max_depth
+        self.lists = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """Returns the number of prefixes with a list.
+        """
+        return len(self.lists)
+
+    def update(self, word, confidence):
+        """Moves a word up the lists of its prefixes after its confidence
+        rose.
+
+        :param str word: Normalized word.
+        :param int confidence: The new confidence of the word.
+        """
+        k = self.k
+        lists = self.lists
+        entry = (-confidence, word)
+        depth = len(word)
+        if self.max_depth is not None and self.max_depth < depth:
+            depth = self.max_depth
+        for length in range(1, depth + 1):
+            prefix = word[:length]
+            entries = lists.get(prefix)
+            if entries is None:
+                lists[prefix] = [entry]
+                continue
+            if len(entries) == k and entries[-1] < entry:
+                continue  # not in the list before and still not good enough
+            for index, (_, other) in enumerate(entries):
+                if other == word:
+                    del entries[index]
+                    break
+            bisect.insort(entries, entry)
+            del entries[k:]
+
+    def rebuild(self, word_counts):
+        """Replaces every list with the lists of word_counts.
+
+        :param word_counts: Iterable of (word, confidence) pairs.
+        """
+        self.lists = {}
+        for word, confidence in word_counts:
+            self.update(word, confidence)
+
+    def get(self, fragment, k):
+        """Returns (word, confidence) pairs for the k most confident words
+        starting with fragment, or None when fragment or k are out of range
+        and the memory must be searched. There are no words when k is below
+        one.
+
+        :param str fragment: Normalized, non-empty word fragment.
+        :param int k: Maximum number of words to return.
+        """
+        if (k > self.k or not fragment or
+                (self.max_depth is not None and
+                 len(fragment) > self.max_depth)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        if k < 1:
+            return []
+        return [(word, -negative) for negative, word
+                in self.lists.get(fragment, ())[:k]]
+
+    def stats(self):
+        """Returns a dictionary with the list length and depth, the number of
+        lists and entries, the approximate number of bytes they use and the
+        number of queries answered from the lists (hits) or not (misses).
+        Counts may miss a few queries made at the same time by several
+        threads.
+        """
+        getsizeof = sys.getsizeof
+        entries = 0
+        size = getsizeof(self.lists)
+        words = set()
+        for prefix, prefix_entries in self.lists.items():
+            entries += len(prefix_entries)
+            size += getsizeof(prefix) + getsizeof(prefix_entries)
+            for entry in prefix_entries:
+                size += getsizeof(entry) + getsizeof(entry[0])
+                words.add(entry[1])
+        size += sum(getsizeof(word) for word in words)
+        return {'k': self.k,
+                'max_depth': self.max_depth,
+                'lists': len(self.lists),
+                'entries': entries,
+                'bytes': size,
+                'hits': self.hits,
+                'misses': self.misses}
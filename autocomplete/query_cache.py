@@ -0,0 +1,130 @@
+"""Contains the QueryCache class, a bounded least-recently-used cache of
+getWords results.
+"""
+
+import collections
+import threading
+
+
+class QueryCache:
+    """Stores getWords results keyed by normalized fragment and k. When the
+    cache is full the least recently used result is evicted. Results are
+    invalidated precisely: memorizing a word drops only the results of
+    fragments that are prefixes of that word.
+
+    With thread_safe, get and put may be called from several threads at the
+    same time. invalidate and clear must still be called by one thread at a
+    time while no other thread uses the cache.
+    """
+
+    def __init__(self, max_size, thread_safe=False):
+        """Initalizes QueryCache object.
+
+        :param int max_size: Maximum number of results kept.
+        :param bool thread_safe: Guard get and put with a mutex.
+        """
+        self.max_size = max_size
+        self.mutex = threading.Lock() if thread_safe else None
+        self.entries = collections.OrderedDict()  # oldest first
+        self.keys_by_fragment = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, fragment, k):
+        """Returns the cached result for fragment and k, or None.
+
+        :param str fragment: Normalized word fragment.
+        :param int k: Maximum number of candidates, or None for all.
+        """
+        if self.mutex is not None:
+            with self.mutex:
+                return self._get(fragment, k)
+        return self._get(fragment, k)
+
+    def _get(self, fragment, k):
+        """Implements get without locking.
+        """
+        key = (fragment, k)
+        result = self.entries.pop(key, None)
+        if result is None:
+            self.misses += 1
+            return None
+        self.entries[key] = result  # now the most recently used
+        self.hits += 1
+        return result
+
+    def put(self, fragment, k, result):
+        """Stores the result for fragment and k, evicting the least recently
+        used result if the cache is full.
+
+        :param str fragment: Normalized word fragment.
+        :param int k: Maximum number of candidates, or None for all.
+        :param list result: The candidate list returned by getWords.
+        """
+        if self.mutex is not None:
+            with self.mutex:
+                return self._put(fragment, k, result)
+        return self._put(fragment, k, result)
+
+    def _put(self, fragment, k, result):
+        """Implements put without locking.
+        """
+        if self.max_size <= 0:
+            return
+        key = (fragment, k)
+        if key not in self.entries:
+            if len(self.entries) >= self.max_size:
+                old_key, _ = self.entries.popitem(last=False)
+                self._unindex(old_key)
+                self.evictions += 1
+            self.keys_by_fragment.setdefault(fragment, set()).add(k)
+        self.entries[key] = result
+
+    def invalidate(self, word):
+        """Drops the results of every fragment that is a prefix of word, since
+        memorizing word may change them.
+
+        :param str word: The memorized word.
+        """
+        if not self.entries:
+            return
+        keys_by_fragment = self.keys_by_fragment
+        for end in range(1, len(word) + 1):
+            fragment = word[:end]
+            ks = keys_by_fragment.pop(fragment, None)
+            if ks:
+                for k in ks:
+                    del self.entries[(fragment, k)]
+                self.invalidations += len(ks)
+
+    def clear(self):
+        """Drops every cached result.
+        """
+        self.invalidations += len(self.entries)
+        self.entries.clear()
+        self.keys_by_fragment.clear()
+
+    def stats(self):
+        """Returns a dictionary with the hit, miss, eviction and invalidation
+        counters and the current and maximum size.
+        """
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self.entries),
+                'max_size': self.max_size}
+
+    def _unindex(self, key):
+        """Removes an evicted key from keys_by_fragment.
+        """
+        fragment, k = key
+        ks = self.keys_by_fragment[fragment]
+        ks.discard(k)
+        if not ks:
+            del self.keys_by_fragment[fragment]
@@ -0,0 +1,293 @@
+"""Contains the RadixAutocompleteProvider class and helper functions. The
+provider stores words in a path-compressed (radix) trie where each edge holds
+a string segment instead of a single letter.
+"""
+
+import heapq
+from autocomplete import autocomplete_provider as auto
+
+
+class RadixAutocompleteProvider(auto.AutocompleteProvider):
+    """AutocompleteProvider whose memory is a radix trie of RadixNode objects.
+    Chains of single-child letters are merged into one node, so a long word
+    costs one node and one dictionary lookup per branching point instead of
+    one per letter.
+    """
+
+    def _create_memory(self):
+        """Creates the empty storage engine.
+        """
+        self.root = RadixNode('', {}, 0)
+
+    def node_count(self):
+        """Returns the number of nodes in memory, not counting the root.
+        """
+        count = 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            count += len(node.memory)
+            stack.extend(node.memory.values())
+        return count
+
+    def iter_words(self):
+        """Generates a (word, confidence) pair for every memorized word.
+        """
+        stack = [('', self.root)]
+        while stack:
+            word, node = stack.pop()
+            if node.confidence > 0:
+                yield word, node.confidence
+            for child in node.memory.values():
+                stack.append((word + child.segment, child))
+
+    def _memorize(self, word, count=1):
+        """Adds a single preprocessed word to the radix trie.
+
+        :param str word: The word to be added.
+        :param int count: Number of occurrences of the word.
+        """
+        memorize_radix(self.root, word, count)
+
+    def _root_node(self):
+        """Returns the root for walking the memory letter by letter. A node
+        is a (RadixNode, letters of its segment walked) pair, so a walk can
+        stop part way through a segment.
+        """
+        return self.root, 0
+
+    def _child_nodes(self, node):
+        """Returns (letter, child node) pairs for the children of a node.
+
+        :param tuple node: A (RadixNode, letters walked) pair.
+        """
+        radix_node, walked = node
+        segment = radix_node.segment
+        if walked < len(segment):
+            return [(segment[walked], (radix_node, walked + 1))]
+        return [(child.segment[0], (child, 1))
+                for child in radix_node.memory.values()]
+
+    def _node_counts(self, node):
+        """Returns the confidence of the word ending at a node and the highest
+        confidence at or below it.
+
+        :param tuple node: A (RadixNode, letters walked) pair.
+        """
+        radix_node, walked = node
+        if walked < len(radix_node.segment):
+            return 0, radix_node.max_confidence
+        return radix_node.confidence, radix_node.max_confidence
+
+    def _child_node(self, node, letter):
+        """Returns the child of a node reached by letter, or None.
+
+        :param tuple node: A (RadixNode, letters walked) pair.
+        :param str letter: The next letter.
+        """
+        radix_node, walked = node
+        segment = radix_node.segment
+        if walked < len(segment):
+            if segment[walked] != letter:
+                return None
+            return radix_node, walked + 1
+        child = radix_node.memory.get(letter)
+        if child is None:
+            return None
+        return child, 1
+
+    def _word_counts(self, fragment, trace=None):
+        """Returns a (word, confidence) pair for every word starting with
+        fragment.
+
+        :param str fragment: Normalized word fragment.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        memory_node, prefix = get_bottom_radix_node(fragment, self.root)
+        if memory_node is None:
+            return []
+        return self._radix_word_counts(memory_node, prefix, trace)
+
+    def _word_counts_at(self, node, fragment, trace=None):
+        """Returns _word_counts(fragment) given the node fragment leads to.
+
+        :param tuple node: A (RadixNode, letters walked) pair from
+        _child_node.
+        :param str fragment: Normalized, non-empty word fragment.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        radix_node, walked = node
+        return self._radix_word_counts(
+            radix_node, fragment + radix_node.segment[walked:], trace)
+
+    def _radix_word_counts(self, memory_node, prefix, trace=None):
+        """Returns a (word, confidence) pair for every word at or below
+        memory_node, whose path spells prefix.
+        """
+        visited = 0
+        word_counts = []
+        stack = [(prefix, memory_node)]
+        while stack:
+            word, node = stack.pop()
+            visited += 1
+            if node.confidence > 0:
+                word_counts.append((word, node.confidence))
+            for child in node.memory.values():
+                stack.append((word + child.segment, child))
+        if trace is not None:
+            trace.record(visited, len(word_counts))
+        return word_counts
+
+    def _top_word_counts(self, fragment, k, trace=None):
+        """Returns (word, confidence) pairs for the k most confident words
+        starting with fragment, using the same best-first search as
+        get_top_word_counts.
+
+        :param str fragment: Normalized word fragment.
+        :param int k: Maximum number of words to return.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        memory_node, prefix = get_bottom_radix_node(fragment, self.root)
+        if memory_node is None:
+            return []
+        return self._radix_top_word_counts(memory_node, prefix, k, trace)
+
+    def _top_word_counts_at(self, node, fragment, k, trace=None):
+        """Returns _top_word_counts(fragment, k) given the node fragment leads
+        to.
+
+        :param tuple node: A (RadixNode, letters walked) pair from
+        _child_node.
+        :param str fragment: Normalized, non-empty word fragment.
+        :param int k: Maximum number of words to return.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        radix_node, walked = node
+        return self._radix_top_word_counts(
+            radix_node, fragment + radix_node.segment[walked:], k, trace)
+
+    def _radix_top_word_counts(self, memory_node, prefix, k, trace=None):
+        """Returns (word, confidence) pairs for the k most confident words at
+        or below memory_node, whose path spells prefix.
+        """
+        visited = generated = 0
+        word_counts = []
+        heap = [(-memory_node.max_confidence, prefix, False, memory_node)]
+        while heap and len(word_counts) < k:
+            priority, word, is_word, node = heapq.heappop(heap)
+            if is_word:
+                word_counts.append((word, -priority))
+                continue
+            visited += 1
+            if node.confidence > 0:
+                generated += 1
+                heapq.heappush(heap, (-node.confidence, word, True, None))
+            for child in node.memory.values():
+                if child.max_confidence > 0:
+                    heapq.heappush(heap, (-child.max_confidence,
+                                          word + child.segment, False, child))
+        if trace is not None:
+            trace.record(visited, generated)
+        return word_counts
+
+
+class RadixNode(object):
+    """Used by RadixAutocompleteProvider to store the string segment on the
+    edge leading to the node, the confidence of the word ending at the node,
+    the highest confidence at or below the node and the child nodes keyed by
+    the first letter of their segment.
+    """
+
+    __slots__ = ('segment', 'memory', 'confidence', 'max_confidence')
+
+    def __init__(self, segment='', memory=None, confidence=0):
+        """Initalizes RadixNode object.
+        """
+        self.segment = segment
+        self.memory = memory if memory is not None else {}
+        self.confidence = confidence
+        self.max_confidence = confidence
+        for node in self.memory.values():
+            if node.max_confidence > self.max_confidence:
+                self.max_confidence = node.max_confidence
+
+    def __eq__(self, other):
+        """Determines if two instances are equal. Overrides the default
+        implementation.
+        """
+        if isinstance(self, other.__class__):
+            return (self.segment == other.segment and
+                    self.confidence == other.confidence and
+                    self.max_confidence == other.max_confidence and
+                    self.memory == other.memory)
+        return False
+
+    def __ne__(self, other):
+        return not self == other
+
+
+def memorize_radix(root, word, count=1):
+    """Adds a single word below root, splitting an edge when the word leaves
+    it part way through its segment.
+
+    :param RadixNode root: The root of the radix trie.
+    :param str word: The word to be added.
+    :param int count: Number of occurrences of the word.
+    """
+    path = [root]
+    node = root
+    position = 0
+    length = len(word)
+    while position < length:
+        child = node.memory.get(word[position])
+        if child is None:
+            child = RadixNode(word[position:], {}, 0)
+            node.memory[word[position]] = child
+            path.append(child)
+            node = child
+            break
+        segment = child.segment
+        if not word.startswith(segment, position):
+            shared = 1  # the first letter always matches the dictionary key
+            limit = min(len(segment), length - position)
+            while (shared < limit and
+                   segment[shared] == word[position + shared]):
+                shared += 1
+            split = RadixNode(segment[:shared], {segment[shared]: child}, 0)
+            child.segment = segment[shared:]
+            node.memory[word[position]] = split
+            child = split
+        position += len(child.segment)
+        path.append(child)
+        node = child
+    node.confidence += count
+    confidence = node.confidence
+    for node in path:
+        if node.max_confidence < confidence:
+            node.max_confidence = confidence
+    return root
+
+
+def get_bottom_radix_node(fragment, root):
+    """Follows fragment down the radix trie. Returns the first node whose path
+    covers the whole fragment together with the word spelled by that path,
+    which may extend past the fragment when it ends inside a segment. Returns
+    (None, None) if fragment is not recognized in the memory.
+
+    :param str fragment: word fragment that specifies the path.
+    :param RadixNode root: The root of the radix trie.
+    """
+    node = root
+    position = 0
+    length = len(fragment)
+    if not length:
+        return None, None
+    while position < length:
+        node = node.memory.get(fragment[position])
+        if node is None:
+            return None, None
+        segment = node.segment
+        if not segment.startswith(fragment[position:position + len(segment)]):
+            return None, None
+        position += len(segment)
+    return node, fragment[:position - len(segment)] + segment
@@ -0,0 +1,126 @@
+"""Contains the RetentionPolicy class, which decays confidences and keeps the
+memory of a long-running AutocompleteProvider within a budget while it is
+trained online.
+"""
+
+import time
+
+
+class RetentionPolicy:
+    """Decays the confidences of a provider every decay_tokens trained words
+    and/or every decay_seconds, and prunes the least confident words whenever
+    the memory holds more than max_words words or max_nodes nodes. Without
+    it, typos and one-off words are never forgotten and memory and query
+    cost grow for as long as the provider is trained.
+
+    The policy is applied by the provider around every training batch and
+    merge, under the write lock. Decay is applied lazily: elapsed time is only
+    noticed when the provider is next trained. Counting words and nodes walks
+    the memory, so the budget is checked at most every check_tokens trained
+    words.
+    """
+
+    def __init__(self, decay_factor=0.5, decay_tokens=None, decay_seconds=None,
+                 max_words=None, max_nodes=None, headroom=0.9,
+                 check_tokens=100000, clock=time.time):
+        """Initalizes RetentionPolicy object.
+
+        :param float decay_factor: Factor between 0 and 1 that confidences are
+        multiplied by, rounding down, at each decay.
+        :param int decay_tokens: Decay once per this many trained words.
+        :param float decay_seconds: Decay once per this many seconds.
+        :param int max_words: Maximum number of words kept in memory.
+        :param int max_nodes: Maximum number of nodes kept in memory, as
+        counted by node_count.
+        :param float headroom: Fraction of the budget that pruning brings the
+        memory down to, so that it is not pruned again after every batch.
+        :param int check_tokens: Number of trained words between two checks
+        of the budget.
+        :param clock: Function returning the current time in seconds.
+        """
+        if not 0 <= decay_factor <= 1:
+            raise ValueError('decay factor must be between 0 and 1')
+        self.decay_factor = decay_factor
+        self.decay_tokens = decay_tokens
+        self.decay_seconds = decay_seconds
+        self.max_words = max_words
+        self.max_nodes = max_nodes
+        self.headroom = headroom
+        self.check_tokens = check_tokens
+        self.clock = clock
+        self.tokens_since_decay = 0
+        self.tokens_since_check = 0
+        self.last_decay = clock()
+        self.decays = 0
+        self.words_forgotten = 0
+
+    def before_learning(self, provider, tokens):
+        """Decays the memory of provider if a decay is due, before a batch of
+        tokens words is memorized, so the new batch is not decayed. Called by
+        the provider with its write lock held.
+
+        :param AutocompleteProvider provider: The provider to be maintained.
+        :param int tokens: Number of words in the batch.
+        """
+        periods = 0
+        if self.decay_tokens:
+            self.tokens_since_decay += tokens
+            periods += self.tokens_since_decay // self.decay_tokens
+            self.tokens_since_decay %= self.decay_tokens
+        if self.decay_seconds:
+            now = self.clock()
+            elapsed_periods = int((now - self.last_decay) //
+                                  self.decay_seconds)
+            if elapsed_periods > 0:
+                periods += elapsed_periods
+                self.last_decay += elapsed_periods * self.decay_seconds
+        if periods:
+            self.decays += periods
+            self.words_forgotten += provider._decay_unlocked(
+                self.decay_factor ** periods)
+
+    def after_learning(self, provider, tokens, check_budget=False):
+        """Prunes provider if a budget check is due after a batch of tokens
+        words was memorized. Called by the provider with its write lock held.
+
+        :param AutocompleteProvider provider: The provider to be maintained.
+        :param int tokens: Number of words in the batch.
+        :param bool check_budget: Check the budget even if fewer than
+        check_tokens words were trained since the last check.
+        """
+        if self.max_words is None and self.max_nodes is None:
+            return
+        self.tokens_since_check += tokens
+        if check_budget or self.tokens_since_check >= self.check_tokens:
+            self.tokens_since_check = 0
+            self.enforce_budget(provider)
+
+    def enforce_budget(self, provider):
+        """Prunes the least confident words of provider until it is within
+        max_words and max_nodes, leaving headroom below the budget.
+
+        :param AutocompleteProvider provider: The provider to be pruned.
+        """
+        word_count = sum(1 for _ in provider.iter_words())
+        if self.max_words is not None and word_count > self.max_words:
+            target = int(self.max_words * self.headroom)
+            self.words_forgotten += provider._prune_unlocked(1, target)
+            word_count = target
+        if self.max_nodes is None:
+            return
+        node_count = provider.node_count()
+        while node_count > self.max_nodes and word_count:
+            # Removing a word frees its unshared letters, so drop words in
+            # proportion to the excess and repeat until within the budget.
+            target = min(word_count - 1, int(
+                word_count * self.max_nodes * self.headroom / node_count))
+            self.words_forgotten += provider._prune_unlocked(1, target)
+            word_count = target
+            node_count = provider.node_count()
+
+    def stats(self):
+        """Returns a dictionary with the number of decays applied and words
+        forgotten.
+        """
+        return {'decays': self.decays,
+                'words_forgotten': self.words_forgotten}
@@ -0,0 +1,78 @@
+"""Contains the ReadWriteLock class.
+"""
+
+import contextlib
+import threading
+
+
+class ReadWriteLock:
+    """Lock that lets any number of readers hold it at the same time, or a
+    single writer. Waiting writers take precedence over new readers, so a
+    steady stream of queries cannot starve training. The lock is not
+    reentrant.
+    """
+
+    def __init__(self):
+        """Initalizes ReadWriteLock object.
+        """
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        """Blocks until no writer holds or waits for the lock, then acquires
+        it for reading.
+        """
+        with self._condition:
+            while self._writing or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+
+    def release_read(self):
+        """Releases the lock acquired for reading.
+        """
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        """Blocks until no reader or writer holds the lock, then acquires it
+        for writing.
+        """
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writing or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writing = True
+
+    def release_write(self):
+        """Releases the lock acquired for writing.
+        """
+        with self._condition:
+            self._writing = False
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def reading(self):
+        """Context manager that holds the lock for reading.
+        """
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextlib.contextmanager
+    def writing(self):
+        """Context manager that holds the lock for writing.
+        """
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
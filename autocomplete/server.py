@@ -0,0 +1,274 @@
+"""Contains the AutocompleteServer class, an asyncio service that answers
+getWords queries and accepts training passages over a socket. Requires
+Python 3.7 or newer.
+
+Run with `python -m autocomplete.server --port 8765`.
+
+The protocol is one JSON object per line in each direction. Requests carry an
+optional "id" that is copied into the response, since responses to pipelined
+requests may arrive out of order:
+
+    {"id": 1, "op": "getWords", "fragment": "th", "k": 3}
+    {"id": 1, "words": [["the", 3], ["this", 1], ["thing", 1]]}
+
+    {"id": 2, "op": "train", "passage": "The third thing"}
+    {"id": 2, "queued": 1}
+
+Queries for the same normalized fragment and k that arrive within
+batch_window seconds are answered by a single lookup. Training passages are
+queued and memorized in batches by a background task, off the request path.
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+from autocomplete import autocomplete_provider as auto
+from autocomplete import training_log
+
+
+class AutocompleteServer:
+    """Serves an AutocompleteProvider over a line-delimited JSON protocol.
+    """
+
+    def __init__(self, provider, batch_window=0.002, train_interval=0.05):
+        """Initalizes AutocompleteServer object.
+
+        :param AutocompleteProvider provider: The provider to serve. It should
+        be created with thread_safe, since queries and training run in
+        separate threads.
+        :param float batch_window: Seconds to wait for more queries before a
+        batch of queries is looked up.
+        :param float train_interval: Seconds between training batches.
+        """
+        self.provider = provider
+        self.batch_window = batch_window
+        self.train_interval = train_interval
+        self.pending_queries = {}
+        self.pending_passages = []
+        self.query_executor = concurrent.futures.ThreadPoolExecutor(1)
+        self.train_executor = concurrent.futures.ThreadPoolExecutor(1)
+        self.query_count = 0
+        self.lookup_count = 0
+        self.trained_passages = 0
+        self._flush_scheduled = False
+        self._train_task = None
+
+    async def start(self, host='127.0.0.1', port=8765, path=None):
+        """Starts listening on a TCP port, or on a Unix socket when path is
+        given, and starts the training task. Returns the asyncio server.
+
+        :param str host: Interface to listen on.
+        :param int port: TCP port to listen on; 0 picks a free port.
+        :param str path: Path of a Unix socket to listen on instead.
+        """
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle_client, path)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+        self._train_task = asyncio.ensure_future(self._train_loop())
+        return server
+
+    async def close(self):
+        """Stops the training task after memorizing the queued passages and
+        shuts down the worker threads.
+        """
+        if self._train_task is not None:
+            self._train_task.cancel()
+            try:
+                await self._train_task
+            except asyncio.CancelledError:
+                pass
+            self._train_task = None
+        await self._train_pending()
+        self.query_executor.shutdown()
+        self.train_executor.shutdown()
+
+    async def handle_client(self, reader, writer):
+        """Reads requests from one connection until it is closed and writes
+        a response for each of them.
+        """
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    async def get_words(self, fragment, k=None):
+        """Returns the candidates for fragment as a list of [word, confidence]
+        pairs. Concurrent calls for the same normalized fragment and k share
+        one lookup. Throws TypeError or ValueError before queuing the query if
+        fragment is not a string or k is not a positive integer or None, so a
+        bad query cannot fail the lookups it would be batched with.
+
+        :param str fragment: The word fragment to be autocompleted.
+        :param int k: Maximum number of candidates to return.
+        """
+        if not isinstance(fragment, str):
+            raise TypeError('fragment must be a string')
+        if k is not None:
+            if not isinstance(k, int) or isinstance(k, bool):
+                raise TypeError('k must be an integer')
+            if k < 1:
+                raise ValueError('k must be at least 1')
+        self.query_count += 1
+        key = (auto.normalize(fragment, self.provider.unicode_letters), k)
+        future = self.pending_queries.get(key)
+        if future is None:
+            future = asyncio.get_event_loop().create_future()
+            self.pending_queries[key] = future
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                asyncio.ensure_future(self._flush_queries())
+        return await future
+
+    def train(self, passage):
+        """Queues a passage for the next training batch. Returns the number
+        of queued passages.
+
+        :param str passage: Contains words that the autocomplete algorithm will
+        use to train.
+        """
+        self.pending_passages.append(passage)
+        return len(self.pending_passages)
+
+    async def _respond(self, line, writer):
+        """Answers a single request line.
+        """
+        request_id = None
+        try:
+            request = json.loads(line.decode('utf-8'))
+            request_id = request.get('id')
+            operation = request.get('op')
+            if operation == 'getWords':
+                response = {'words': await self.get_words(request['fragment'],
+                                                          request.get('k'))}
+            elif operation == 'train':
+                response = {'queued': self.train(request['passage'])}
+            else:
+                response = {'error': 'unknown op %r' % operation}
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            response = {'error': '%s: %s' % (type(error).__name__, error)}
+        response['id'] = request_id
+        writer.write(json.dumps(response).encode('utf-8') + b'\n')
+        await writer.drain()
+
+    async def _flush_queries(self):
+        """Waits batch_window seconds, then looks up every distinct pending
+        query in the query thread and resolves the waiting calls.
+        """
+        await asyncio.sleep(self.batch_window)
+        batch = self.pending_queries
+        self.pending_queries = {}
+        self._flush_scheduled = False
+        self.lookup_count += len(batch)
+        loop = asyncio.get_event_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.query_executor, self._lookup, list(batch))
+        except Exception as error:
+            for future in batch.values():
+                future.set_exception(error)
+            return
+        for key, future in batch.items():
+            if isinstance(results[key], Exception):
+                future.set_exception(results[key])
+            else:
+                future.set_result(results[key])
+
+    def _lookup(self, keys):
+        """Returns a dictionary of results for (fragment, k) keys, holding
+        the exception raised instead when a lookup fails, so that it only
+        fails the calls waiting for that key. Runs in the query thread.
+        """
+        provider = self.provider
+        results = {}
+        for fragment, k in keys:
+            try:
+                results[(fragment, k)] = [
+                    [candidate.getWord(), candidate.getConfidence()]
+                    for candidate in provider.getWords(fragment, k)]
+            except Exception as error:
+                results[(fragment, k)] = error
+        return results
+
+    async def _train_loop(self):
+        """Memorizes the queued passages every train_interval seconds.
+        """
+        while True:
+            await asyncio.sleep(self.train_interval)
+            await self._train_pending()
+
+    async def _train_pending(self):
+        """Memorizes the queued passages in the training thread.
+        """
+        if not self.pending_passages:
+            return
+        batch = self.pending_passages
+        self.pending_passages = []
+        await asyncio.get_event_loop().run_in_executor(
+            self.train_executor, self.provider.train_many, batch)
+        self.trained_passages += len(batch)
+
+
+async def serve(provider, host, port, path=None, **options):
+    """Serves provider until the task is cancelled.
+    """
+    autocomplete_server = AutocompleteServer(provider, **options)
+    server = await autocomplete_server.start(host, port, path)
+    try:
+        await server.serve_forever()
+    finally:
+        server.close()
+        await autocomplete_server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serves autocomplete '
+                                     'suggestions over line-delimited JSON.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='listen on this Unix socket instead')
+    parser.add_argument('--snapshot', help='load this snapshot at startup')
+    parser.add_argument('--training-log', metavar='DIRECTORY',
+                        help='recover from and log training to this '
+                        'directory')
+    parser.add_argument('--cache-size', type=int, default=0)
+    parser.add_argument('--batch-window', type=float, default=0.002)
+    parser.add_argument('--train-interval', type=float, default=0.05)
+    args = parser.parse_args()
+    log = None
+    if args.training_log:
+        if args.snapshot:
+            parser.error('--snapshot and --training-log cannot be combined')
+        log = training_log.TrainingLog(args.training_log)
+        provider = auto.AutocompleteProvider(cache_size=args.cache_size,
+                                             thread_safe=True,
+                                             training_log=log)
+    elif args.snapshot:
+        provider = auto.AutocompleteProvider.load(
+            args.snapshot, cache_size=args.cache_size, thread_safe=True)
+    else:
+        provider = auto.AutocompleteProvider(cache_size=args.cache_size,
+                                             thread_safe=True)
+    try:
+        asyncio.run(serve(provider, args.host, args.port, args.unix,
+                          batch_window=args.batch_window,
+                          train_interval=args.train_interval))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if log is not None:
+            log.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,390 @@
+"""Contains functions to save an AutocompleteProvider to a compact binary
+snapshot and load it again, and the MappedAutocompleteProvider class that
+serves getWords straight from a memory-mapped snapshot.
+
+A snapshot is a header followed by one fixed-size record per trie node in
+breadth-first order, so the children of every node are contiguous and sorted
+by label. The root is record 0.
+
+Header: magic (4 bytes), format version (uint16), flags (uint16), number of
+records (uint32).
+Record: label code point (uint32), confidence (uint64), highest confidence at
+or below the node (uint64), index of the first child (uint32), number of
+children (uint32).
+All integers are little-endian.
+
+Only words and their confidences are saved. Bigram counts are not, so a
+provider loaded with bigrams starts counting them afresh.
+"""
+
+import collections
+import heapq
+import mmap as mmap_module
+import struct
+from autocomplete import autocomplete_provider as auto
+from autocomplete.array_autocomplete_provider import label_char
+
+MAGIC = b'ACTS'
+VERSION = 1
+UNICODE_LETTERS_FLAG = 1
+HEADER = struct.Struct('<4sHHI')
+NODE = struct.Struct('<IQQII')
+
+
+def save(provider, path):
+    """Writes the memory of provider to a snapshot file. Bigram counts are
+    not saved.
+
+    :param AutocompleteProvider provider: The provider to be saved.
+    :param str path: Path of the snapshot file.
+    """
+    root = [0, {}]  # [confidence, children by letter]
+    for word, confidence in provider.iter_words():
+        node = root
+        for letter in word:
+            children = node[1]
+            child = children.get(letter)
+            if child is None:
+                child = children[letter] = [0, {}]
+            node = child
+        node[0] += confidence
+    labels = [0]
+    nodes = [root]
+    parents = [-1]
+    first_children = []
+    child_counts = []
+    index = 0
+    while index < len(nodes):
+        children = sorted(nodes[index][1].items())
+        first_children.append(len(nodes))
+        child_counts.append(len(children))
+        for letter, child in children:
+            labels.append(ord(letter))
+            nodes.append(child)
+            parents.append(index)
+        index += 1
+    confidences = [node[0] for node in nodes]
+    max_confidences = list(confidences)
+    for index in range(len(nodes) - 1, 0, -1):  # children come after parents
+        parent = parents[index]
+        if max_confidences[parent] < max_confidences[index]:
+            max_confidences[parent] = max_confidences[index]
+    flags = UNICODE_LETTERS_FLAG if provider.unicode_letters else 0
+    data = bytearray(HEADER.size + NODE.size * len(nodes))
+    HEADER.pack_into(data, 0, MAGIC, VERSION, flags, len(nodes))
+    offset = HEADER.size
+    for index in range(len(nodes)):
+        NODE.pack_into(data, offset, labels[index], confidences[index],
+                       max_confidences[index], first_children[index],
+                       child_counts[index])
+        offset += NODE.size
+    with open(path, 'wb') as snapshot_file:
+        snapshot_file.write(data)
+
+
+def load(path, mmap=False, provider_class=auto.AutocompleteProvider,
+         **options):
+    """Loads a snapshot file. By default the snapshot is read into a new
+    provider of provider_class that can be trained further. With mmap the file
+    is memory-mapped and served read-only by a MappedAutocompleteProvider,
+    which starts instantly and shares its pages with every other process that
+    maps the same file.
+
+    :param str path: Path of the snapshot file.
+    :param bool mmap: Serve the snapshot from a memory-mapped file.
+    :param provider_class: AutocompleteProvider class to load into.
+    :param options: Other keyword arguments of the provider constructor,
+    such as cache_size. The loaded words are neither written to a
+    training_log nor kept for export_delta, as loading the snapshot again
+    restores them.
+    """
+    if mmap or issubclass(provider_class, MappedAutocompleteProvider):
+        return MappedAutocompleteProvider.open(path, **options)
+    with open(path, 'rb') as snapshot_file:
+        snapshot = MappedAutocompleteProvider(snapshot_file.read())
+    provider = provider_class(unicode_letters=snapshot.unicode_letters,
+                              **options)
+    training_log = provider.training_log
+    deltas = provider.deltas
+    provider.training_log = provider.deltas = None
+    try:
+        provider._learn_unlocked(
+            collections.OrderedDict(snapshot.iter_words()))
+    finally:
+        provider.training_log = training_log
+        if deltas is not None:
+            # Deltas start after the snapshot, like after recovery.
+            from autocomplete import delta
+            provider.deltas = delta.DeltaHistory(deltas.max_words,
+                                                 provider.version)
+    return provider
+
+
+class MappedAutocompleteProvider(auto.AutocompleteProvider):
+    """Read-only AutocompleteProvider that reads its memory from the records of
+    a snapshot held in a buffer, usually a memory-mapped file. No Python
+    objects are built for the trie; every lookup unpacks the records it needs.
+    """
+
+    def __init__(self, buffer, **options):
+        """Initalizes MappedAutocompleteProvider object. Throws ValueError if
+        the buffer does not hold a snapshot.
+
+        :param buffer: bytes, bytearray or mmap holding a snapshot.
+        :param options: Other keyword arguments of the AutocompleteProvider
+        constructor, such as cache_size.
+        """
+        if len(buffer) < HEADER.size:
+            raise ValueError('not an autocomplete snapshot')
+        magic, version, flags, node_count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('not an autocomplete snapshot')
+        if len(buffer) < HEADER.size + NODE.size * node_count:
+            raise ValueError('truncated autocomplete snapshot')
+        self.buffer = buffer
+        self.record_count = node_count
+        self._file = None
+        auto.AutocompleteProvider.__init__(
+            self, bool(flags & UNICODE_LETTERS_FLAG), **options)
+
+    @classmethod
+    def open(cls, path, **options):
+        """Returns a MappedAutocompleteProvider serving a memory-mapped
+        snapshot file.
+
+        :param str path: Path of the snapshot file.
+        :param options: Other keyword arguments of the AutocompleteProvider
+        constructor, such as cache_size.
+        """
+        snapshot_file = open(path, 'rb')
+        try:
+            buffer = mmap_module.mmap(snapshot_file.fileno(), 0,
+                                      access=mmap_module.ACCESS_READ)
+            provider = cls(buffer, **options)
+        except Exception:
+            snapshot_file.close()
+            raise
+        provider._file = snapshot_file
+        return provider
+
+    def close(self):
+        """Releases the memory map and the snapshot file.
+        """
+        if self._file is not None:
+            self.buffer.close()
+            self._file.close()
+            self._file = None
+
+    def node_count(self):
+        """Returns the number of letter nodes in memory.
+        """
+        return self.record_count - 1
+
+    def iter_words(self):
+        """Generates a (word, confidence) pair for every memorized word in
+        alphabetical order. Records are read once each, in file order, which
+        is faster than searching the trie depth-first when every word is
+        wanted, as by load.
+        """
+        buffer = self.buffer
+        unpack_from = NODE.unpack_from
+        prefixes = [''] * self.record_count  # words of the parents of nodes
+        word_counts = []
+        for index in range(self.record_count):
+            label, confidence, _, first_child, child_count = unpack_from(
+                buffer, HEADER.size + NODE.size * index)
+            word = prefixes[index]
+            if index:
+                word += label_char(label)
+                prefixes[index] = None
+            if confidence > 0:
+                word_counts.append((word, confidence))
+            for child in range(first_child, first_child + child_count):
+                prefixes[child] = word
+        word_counts.sort()
+        return iter(word_counts)
+
+    def _create_memory(self):
+        """The memory is the snapshot buffer, so there is nothing to create.
+        """
+
+    def _record(self, index):
+        """Returns the (label, confidence, max_confidence, first_child,
+        child_count) record of a node.
+
+        :param int index: Index of the node.
+        """
+        return NODE.unpack_from(self.buffer, HEADER.size + NODE.size * index)
+
+    def _memorize(self, word, count=1):
+        """Snapshots are read-only. Throws TypeError.
+        """
+        raise TypeError('a memory-mapped snapshot cannot be trained')
+
+    def _rescale(self, factor=1, min_confidence=1, forget=frozenset()):
+        """Snapshots are read-only. Throws TypeError.
+        """
+        raise TypeError('a memory-mapped snapshot cannot be decayed or pruned')
+
+    def _bottom_node(self, fragment):
+        """Returns the index of the node at the end of the fragment path, or
+        None if the fragment has never been seen. Children are found by binary
+        search over their sorted labels.
+
+        :param str fragment: Normalized word fragment.
+        """
+        buffer = self.buffer
+        unpack_from = NODE.unpack_from
+        first_child, child_count = self._record(0)[3:]
+        node = 0
+        for letter in fragment:
+            code = ord(letter)
+            low = first_child
+            high = first_child + child_count
+            while low < high:
+                middle = (low + high) // 2
+                record = unpack_from(buffer, HEADER.size + NODE.size * middle)
+                if record[0] < code:
+                    low = middle + 1
+                elif record[0] > code:
+                    high = middle
+                else:
+                    break
+            else:
+                return None
+            node = middle
+            first_child, child_count = record[3:]
+        return node
+
+    def _root_node(self):
+        """Returns the index of the root record for walking the memory letter
+        by letter.
+        """
+        return 0
+
+    def _child_nodes(self, node):
+        """Returns (letter, child index) pairs for the children of a node, in
+        alphabetical order.
+
+        :param int node: Index of the node.
+        """
+        record = self._record
+        first_child, child_count = record(node)[3:]
+        return [(label_char(record(child)[0]), child)
+                for child in range(first_child, first_child + child_count)]
+
+    def _node_counts(self, node):
+        """Returns the confidence of the word ending at a node and the highest
+        confidence at or below it.
+
+        :param int node: Index of the node.
+        """
+        return self._record(node)[1:3]
+
+    def _child_node(self, node, letter):
+        """Returns the index of the child of a node reached by letter, or
+        None. Children are found by binary search over their sorted labels.
+
+        :param int node: Index of the node.
+        :param str letter: The next letter.
+        """
+        code = ord(letter)
+        record = self._record
+        low, high = record(node)[3:]
+        high += low
+        while low < high:
+            middle = (low + high) // 2
+            label = record(middle)[0]
+            if label < code:
+                low = middle + 1
+            elif label > code:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def _word_counts(self, fragment, trace=None):
+        """Returns a (word, confidence) pair for every word starting with
+        fragment, in alphabetical order.
+
+        :param str fragment: Normalized word fragment.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        node = self._bottom_node(fragment)
+        if not node:
+            return []
+        return self._subtree_word_counts(node, fragment, trace)
+
+    def _subtree_word_counts(self, node, fragment, trace=None):
+        """Returns a (word, confidence) pair for every word at or below node,
+        in alphabetical order.
+
+        :param int node: Index of the node reached by fragment.
+        :param str fragment: The word spelled by the path to node.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        record = self._record
+        visited = 0
+        word_counts = []
+        stack = [(node, fragment)]
+        while stack:
+            node, word = stack.pop()
+            visited += 1
+            label, confidence, _, first_child, child_count = record(node)
+            if confidence > 0:
+                word_counts.append((word, confidence))
+            for child in range(first_child + child_count - 1, first_child - 1,
+                               -1):
+                stack.append((child, word + label_char(record(child)[0])))
+        if trace is not None:
+            trace.record(visited, len(word_counts))
+        return word_counts
+
+    _word_counts_at = _subtree_word_counts
+
+    def _top_word_counts(self, fragment, k, trace=None):
+        """Returns (word, confidence) pairs for the k most confident words
+        starting with fragment, using the same best-first search as
+        get_top_word_counts.
+
+        :param str fragment: Normalized word fragment.
+        :param int k: Maximum number of words to return.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        node = self._bottom_node(fragment)
+        if not node:
+            return []
+        return self._top_word_counts_at(node, fragment, k, trace)
+
+    def _top_word_counts_at(self, node, fragment, k, trace=None):
+        """Returns _top_word_counts(fragment, k) given the index of the node
+        fragment leads to.
+
+        :param int node: Index of the node reached by fragment.
+        :param str fragment: Normalized, non-empty word fragment.
+        :param int k: Maximum number of words to return.
+        :param QueryTrace trace: Collects the work done, when instrumented.
+        """
+        record = self._record
+        visited = generated = 0
+        word_counts = []
+        heap = [(-record(node)[2], fragment, False, node)]
+        while heap and len(word_counts) < k:
+            priority, word, is_word, node = heapq.heappop(heap)
+            if is_word:
+                word_counts.append((word, -priority))
+                continue
+            visited += 1
+            _, confidence, _, first_child, child_count = record(node)
+            if confidence > 0:
+                generated += 1
+                heapq.heappush(heap, (-confidence, word, True, node))
+            for child in range(first_child, first_child + child_count):
+                label, _, max_confidence, _, _ = record(child)
+                if max_confidence > 0:
+                    heapq.heappush(heap, (-max_confidence,
+                                          word + label_char(label), False,
+                                          child))
+        if trace is not None:
+            trace.record(visited, generated)
+        return word_counts
@@ -0,0 +1,135 @@
+"""Contains unit tests for the ArrayAutocompleteProvider class.
+"""
+
+import unittest
+from autocomplete import candidate as cand
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete.tests import autocomplete_provider_test as provider_test
+from autocomplete.tests.helpers import ranked
+
+
+class TestArrayAutocompleteProviderTrain(unittest.TestCase):
+    """Tests the train method of the ArrayAutocompleteProvider class.
+    """
+
+    def test_train_shares_prefixes(self):
+        """Words with a common prefix share nodes.
+        """
+        alg = array_auto.ArrayAutocompleteProvider()
+        alg.train('ab abc abd')
+        self.assertEqual(alg.node_count(), 4)
+
+    def test_train_counts(self):
+        """Confidences and max confidences are counted per node.
+        """
+        alg = array_auto.ArrayAutocompleteProvider()
+        alg.train('Abc abc ab')
+        node = alg._bottom_node('abc')
+        self.assertEqual(alg.confidences[node], 2)
+        self.assertEqual(alg.max_confidences[alg._bottom_node('a')], 2)
+        self.assertEqual(alg.confidences[alg._bottom_node('ab')], 1)
+
+    def test_train_counts_precomputed(self):
+        """Precomputed counts are added in one step.
+        """
+        alg = array_auto.ArrayAutocompleteProvider()
+        alg.train_counts({'abc': 5, 'ab': 2})
+        alg.train_many(['abc', 'ab ab'])
+        self.assertEqual(alg.confidences[alg._bottom_node('abc')], 6)
+        self.assertEqual(alg.confidences[alg._bottom_node('ab')], 4)
+        self.assertEqual(alg.max_confidences[alg._bottom_node('a')], 6)
+
+    def test_train_children_sorted(self):
+        """Children are linked in alphabetical order regardless of training
+        order.
+        """
+        alg = array_auto.ArrayAutocompleteProvider()
+        alg.train('ad ac ab ae')
+        node = alg.first_child[alg._bottom_node('a')]
+        letters = []
+        while node != array_auto.NO_NODE:
+            letters.append(array_auto.label_char(alg.labels[node]))
+            node = alg.next_sibling[node]
+        self.assertEqual(letters, ['b', 'c', 'd', 'e'])
+
+
+class TestArrayAutocompleteProviderGetWords(unittest.TestCase):
+    """Tests the getWords method of the ArrayAutocompleteProvider class.
+    """
+
+    def setUp(self):
+        self.passage = 'The third thing that I need to tell you is that this \
+        thing does not think thoroughly.'
+        self.alg = array_auto.ArrayAutocompleteProvider()
+        self.alg.train(self.passage)
+
+    def test_getWords_example(self):
+        """Candidates are ordered by confidence, then alphabetically.
+        """
+        correct_answer = [cand.Candidate('thing', 2),
+                          cand.Candidate('think', 1),
+                          cand.Candidate('third', 1),
+                          cand.Candidate('this', 1)]
+        output = self.alg.getWords('thi')
+        self.assertEqual(output, correct_answer)
+
+    def test_getWords_unseen_fragment(self):
+        """Fragments that have never been seen have no candidates.
+        """
+        self.assertEqual(self.alg.getWords('xyz'), [])
+        self.assertEqual(self.alg.getWords('thix', k=3), [])
+
+    def test_getWords_top_k(self):
+        """Top-k results are the head of the full result list.
+        """
+        full = self.alg.getWords('th')
+        for k in range(len(full) + 1):
+            self.assertEqual(self.alg.getWords('th', k=k), full[:k])
+
+    def test_getWords_matches_dictionary_engine(self):
+        """Both engines return the same candidates after the same training.
+        """
+        dict_alg = auto.AutocompleteProvider()
+        dict_alg.train(self.passage)
+        for fragment in ['t', 'th', 'thi', 'Nee', 'does', 'z']:
+            self.assertEqual(ranked(self.alg.getWords(fragment)),
+                             ranked(dict_alg.getWords(fragment)))
+
+
+class TestArrayAutocompleteProviderSharedTrain(
+        provider_test.TestAutocompleteProviderTrain):
+    """Runs the train tests of AutocompleteProvider on the array engine.
+    """
+
+    provider_class = array_auto.ArrayAutocompleteProvider
+
+
+class TestArrayAutocompleteProviderSharedPrune(
+        provider_test.TestAutocompleteProviderPrune):
+    """Runs the decay and prune tests of AutocompleteProvider on the array
+    engine.
+    """
+
+    provider_class = array_auto.ArrayAutocompleteProvider
+
+
+class TestArrayAutocompleteProviderSharedGetWords(
+        provider_test.TestAutocompleteProviderGetWords):
+    """Runs the getWords tests of AutocompleteProvider on the array engine.
+    """
+
+    provider_class = array_auto.ArrayAutocompleteProvider
+
+
+class TestArrayAutocompleteProviderSharedIntegration(
+        provider_test.TestAutocompleteProviderIntegrationTests):
+    """Runs the integration tests of AutocompleteProvider on the array
+    engine.
+    """
+
+    provider_class = array_auto.ArrayAutocompleteProvider
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,26 @@
 """Contains unit tests for the AutocompleteProvider class.
 """
 
+import os
+import shutil
+import sys
+import tempfile
 import unittest
 from autocomplete import candidate as cand
 from autocomplete import autocomplete_provider as auto
+from autocomplete import instrumentation
+
+def provider_with_memory(provider_class, memory):
+    """Returns a provider of provider_class that memorized the words of a
+    memory dictionary. Dict engines are given the dictionary itself.
+    """
+    provider = provider_class()
+    if provider_class is auto.AutocompleteProvider:
+        provider.memory = memory
+    else:
+        provider.train_counts(dict(auto.iter_word_counts('', memory)))
+    return provider
+
 
 class TestPreprocess(unittest.TestCase):
     """Test the preprocess function.
@@ -38,6 +55,58 @@ class TestPreprocess(unittest.TestCase):
         output = auto.preprocess(passage)
 
 
+class TestStreamPreprocess(unittest.TestCase):
+    """Tests the stream_preprocess and read_chunks functions.
+    """
+
+    def test_stream_preprocess_split_word(self):
+        """Words split across chunks are joined back together.
+        """
+        chunks = ['The thi', 'rd th', 'ing. ', 'Ne', 'ed', ' to']
+        output = [word for word_list in auto.stream_preprocess(chunks)
+                  for word in word_list]
+        self.assertEqual(output, ['the', 'third', 'thing', 'need', 'to'])
+
+    def test_stream_preprocess_lines(self):
+        """Lines of a file produce the same words as the whole passage.
+        """
+        passage = 'Str#ing h1As,\n12capitalS!!!\n0123\n'
+        chunks = passage.splitlines(True)
+        output = [word for word_list in auto.stream_preprocess(chunks)
+                  for word in word_list]
+        self.assertEqual(output, auto.preprocess(passage))
+
+    def test_stream_preprocess_long_word(self):
+        """Chunks without whitespace are joined once, and a word longer than
+        max_word_length is cut after the chunk that exceeds it.
+        """
+        chunks = ['a'] * 10000 + [' b\n', 'c', 'd e ']
+        output = [word for word_list in auto.stream_preprocess(chunks)
+                  for word in word_list]
+        self.assertEqual(output, ['a' * 10000, 'b', 'cd', 'e'])
+        output = list(auto.stream_preprocess([u'ab', u'c\u3000d']))
+        self.assertEqual(output, [[u'abc'], [u'd']])
+        output = list(auto.stream_preprocess(['ab'] * 5 + [' c'],
+                                             max_word_length=4))
+        self.assertEqual(output, [['ababab'], ['abab'], ['c']])
+        output = list(auto.stream_preprocess([b'ab c', b'', b'd\te ', b' f']))
+        self.assertEqual(output, [[b'ab'], [b'cd', b'e'], [], [b'f']])
+
+    def test_read_chunks(self):
+        """Chunks are read until the end of the file.
+        """
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'passage.txt')
+            with open(path, 'w') as passage_file:
+                passage_file.write('abcdefg')
+            with open(path) as passage_file:
+                output = list(auto.read_chunks(passage_file, 3))
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(output, ['abc', 'def', 'g'])
+
+
 class TestMemorize(unittest.TestCase):
     """Tests the memorize function.
     """
@@ -78,6 +147,17 @@ class TestMemorize(unittest.TestCase):
         output = auto.memorize(self.abc_memory, word)
         self.assertEqual(output, correct_answer)
 
+    def test_memorize_count(self):
+        """Tests memorize function when a word is added several times at once.
+        """
+        word = 'ab'
+        correct_answer = {'a': auto.MemoryNode({'b': 
+                               auto.MemoryNode({'c': 
+                               auto.MemoryNode({}, 1)}, 3)}, 0)}
+        output = auto.memorize(self.abc_memory, word, 3)
+        self.assertEqual(output, correct_answer)
+        self.assertEqual(output['a'].max_confidence, 3)
+
     def test_memorize_same_prefix(self):
         """Tests memorize function when a word is passed that is a prefix of a 
         word already in the memory.
@@ -90,6 +170,139 @@ class TestMemorize(unittest.TestCase):
         self.assertEqual(output, correct_answer)
 
 
+class TestMemoryNodeMaxConfidence(unittest.TestCase):
+    """Tests the max_confidence annotation of the MemoryNode class.
+    """
+
+    def test_max_confidence_leaf(self):
+        """A node without children uses its own confidence.
+        """
+        node = auto.MemoryNode({}, 3)
+        self.assertEqual(node.max_confidence, 3)
+
+    def test_max_confidence_from_children(self):
+        """A node takes the highest confidence found below it.
+        """
+        node = auto.MemoryNode({'b': auto.MemoryNode({}, 2),
+                                'c': auto.MemoryNode({'d':
+                                     auto.MemoryNode({}, 5)}, 0)}, 1)
+        self.assertEqual(node.max_confidence, 5)
+
+    def test_max_confidence_updated_by_memorize(self):
+        """Memorizing a word raises max_confidence along the word's path.
+        """
+        memory = {}
+        for word in ['abc', 'abd', 'abd']:
+            memory = auto.memorize(memory, word)
+        self.assertEqual(memory['a'].max_confidence, 2)
+        self.assertEqual(memory['a'].memory['b'].memory['c'].max_confidence, 1)
+
+    def test_slots(self):
+        """Nodes have slots instead of a per-instance dictionary.
+        """
+        node = auto.MemoryNode({}, 1)
+        self.assertFalse(hasattr(node, '__dict__'))
+        self.assertRaises(AttributeError, setattr, node, 'extra', 1)
+
+    def test_equality(self):
+        """Nodes are equal when their memories and confidences are equal.
+        """
+        self.assertEqual(auto.MemoryNode({'a': auto.MemoryNode({}, 1)}, 0),
+                         auto.MemoryNode({'a': auto.MemoryNode({}, 1)}, 0))
+        self.assertNotEqual(auto.MemoryNode({'a': auto.MemoryNode({}, 1)}, 0),
+                            auto.MemoryNode({'a': auto.MemoryNode({}, 2)}, 0))
+        self.assertNotEqual(auto.MemoryNode({}, 1), None)
+
+
+class TestLongWords(unittest.TestCase):
+    """Tests words longer than the recursion limit.
+    """
+
+    def test_memorize_and_get_candidates_long_word(self):
+        """Memorizing and retrieving a very long word does not recurse.
+        """
+        word = 'x' * (2 * sys.getrecursionlimit())
+        memory = auto.memorize({}, word)
+        memory = auto.memorize(memory, 'xy')
+        correct_answer = [cand.Candidate('xy', 1), cand.Candidate(word, 1)]
+        output = sorted(auto.get_candidates('', memory),
+                        key=lambda x: len(x.getWord()))
+        self.assertEqual(output, correct_answer)
+
+
+class TestMergeMemory(unittest.TestCase):
+    """Tests the merge_memory function.
+    """
+
+    def test_merge_memory(self):
+        """Confidences of shared nodes are summed and missing nodes are added.
+        """
+        memory = {'a': auto.MemoryNode({'b': 
+                       auto.MemoryNode({'c': 
+                       auto.MemoryNode({}, 1)}, 0)}, 0)}
+        other_memory = {'a': auto.MemoryNode({
+                             'b': auto.MemoryNode({}, 2),
+                             'd': auto.MemoryNode({}, 1)}, 0),
+                        'e': auto.MemoryNode({}, 1)}
+        correct_answer = {'a': auto.MemoryNode({
+                               'b': auto.MemoryNode({'c': 
+                                    auto.MemoryNode({}, 1)}, 2),
+                               'd': auto.MemoryNode({}, 1)}, 0),
+                          'e': auto.MemoryNode({}, 1)}
+        output = auto.merge_memory(memory, other_memory)
+        self.assertEqual(output, correct_answer)
+        self.assertEqual(output['a'].max_confidence, 2)
+
+    def test_merge_memory_sums_max_confidence(self):
+        """max_confidence reflects summed confidences, not either input.
+        """
+        memory = auto.memorize({}, 'ab', 2)
+        memory = auto.memorize(memory, 'ac', 3)
+        other_memory = auto.memorize({}, 'ab', 2)
+        output = auto.merge_memory(memory, other_memory)
+        self.assertEqual(output['a'].max_confidence, 4)
+        self.assertEqual(other_memory['a'].memory['b'].confidence, 2)
+
+
+class TestRescaleMemory(unittest.TestCase):
+    """Tests the rescale_memory function.
+    """
+
+    def test_rescale_memory_decays(self):
+        """Confidences are multiplied and rounded down, and words that reach
+        zero are removed with their dead branches.
+        """
+        memory = auto.memorize({}, 'ab', 5)
+        memory = auto.memorize(memory, 'acd', 1)
+        removed = auto.rescale_memory(memory, 0.5)
+        correct_answer = {'a': auto.MemoryNode({
+                               'b': auto.MemoryNode({}, 2)}, 0)}
+        self.assertEqual(removed, 1)
+        self.assertEqual(memory, correct_answer)
+        self.assertEqual(memory['a'].max_confidence, 2)
+
+    def test_rescale_memory_keeps_prefix_words(self):
+        """A word is removed without removing the longer words below it.
+        """
+        memory = auto.memorize({}, 'ab', 1)
+        memory = auto.memorize(memory, 'abc', 3)
+        removed = auto.rescale_memory(memory, min_confidence=2)
+        self.assertEqual(removed, 1)
+        self.assertEqual(memory['a'].memory['b'].confidence, 0)
+        self.assertEqual(memory['a'].memory['b'].max_confidence, 3)
+        self.assertEqual(memory['a'].memory['b'].memory['c'].confidence, 3)
+
+    def test_rescale_memory_forget(self):
+        """Words in forget are removed regardless of confidence.
+        """
+        memory = auto.memorize({}, 'ab', 4)
+        memory = auto.memorize(memory, 'ac', 1)
+        removed = auto.rescale_memory(memory, forget=frozenset(['ab']))
+        self.assertEqual(removed, 1)
+        self.assertEqual(list(memory['a'].memory), ['c'])
+        self.assertEqual(memory['a'].max_confidence, 1)
+
+
 class TestGetBottomNode(unittest.TestCase):
     """Tests the get_bottom_node function.
     """
@@ -193,10 +406,102 @@ class TestGetCandidates(unittest.TestCase):
         self.assertEqual(output, correct_answer)
 
 
+class TestGetTopCandidates(unittest.TestCase):
+    """Tests the get_top_candidates function.
+    """
+
+    def setUp(self):
+        self.memory = {'a': auto.MemoryNode({
+                            'b': auto.MemoryNode({'c':
+                                 auto.MemoryNode({}, 1)}, 4),
+                            'd': auto.MemoryNode({'e':
+                                 auto.MemoryNode({}, 3)}, 1)}, 2)}
+
+    def test_get_top_candidates_order(self):
+        """Candidates are returned in decreasing confidence.
+        """
+        correct_answer = [cand.Candidate('ab', 4), cand.Candidate('ade', 3),
+                          cand.Candidate('a', 2)]
+        output = auto.get_top_candidates('a', self.memory['a'], 3)
+        self.assertEqual(output, correct_answer)
+
+    def test_get_top_candidates_ties_alphabetical(self):
+        """Candidates with equal confidence are ordered alphabetically.
+        """
+        correct_answer = [cand.Candidate('ab', 4), cand.Candidate('ade', 3),
+                          cand.Candidate('a', 2), cand.Candidate('abc', 1),
+                          cand.Candidate('ad', 1)]
+        output = auto.get_top_candidates('a', self.memory['a'], 10)
+        self.assertEqual(output, correct_answer)
+
+    def test_get_top_candidates_zero(self):
+        """Asking for zero candidates returns an empty list.
+        """
+        output = auto.get_top_candidates('a', self.memory['a'], 0)
+        self.assertEqual(output, [])
+
+
+class TestIterCandidates(unittest.TestCase):
+    """Tests the iter_candidates function.
+    """
+
+    def test_iter_candidates_matches_get_candidates(self):
+        """The generator yields the same candidates in the same order as
+        get_candidates.
+        """
+        memory = {}
+        for word in ['abc', 'ab', 'abd', 'b', 'bcd', 'a']:
+            memory = auto.memorize(memory, word)
+        output = auto.iter_candidates('', memory)
+        self.assertFalse(isinstance(output, list))
+        self.assertEqual(list(output), auto.get_candidates('', memory))
+        self.assertEqual(len(auto.get_candidates('', memory)), 6)
+
+    def test_iter_word_counts_matches_iter_candidates(self):
+        """The (word, confidence) pairs follow the same order as the
+        candidates.
+        """
+        memory = {}
+        for word in ['abc', 'ab', 'abd', 'b', 'bcd', 'a', 'ab']:
+            memory = auto.memorize(memory, word)
+        output = list(auto.iter_word_counts('', memory))
+        self.assertEqual(output, [(c.getWord(), c.getConfidence())
+                                  for c in auto.iter_candidates('', memory)])
+        self.assertIn(('ab', 2), output)
+
+    def test_get_candidates_trace(self):
+        """get_candidates records the same work as the generators.
+        """
+        memory = {}
+        for word in ['abc', 'ab', 'abd', 'b', 'bcd', 'a', 'abcdef']:
+            memory = auto.memorize(memory, word)
+        traces = [instrumentation.QueryTrace(), instrumentation.QueryTrace()]
+        auto.get_candidates('', memory, traces[0])
+        list(auto.iter_word_counts('', memory, traces[1]))
+        self.assertEqual([(trace.nodes_visited, trace.candidates_generated)
+                          for trace in traces], [(10, 7), (10, 7)])
+
+
 class TestAutocompleteProviderTrain(unittest.TestCase):
     """Tests train method of the AutocompleteProvider class.
     """
 
+    provider_class = auto.AutocompleteProvider
+
+    def assertMemoryEqual(self, algorithm, correct_answer):
+        """Asserts that algorithm memorized the same words as correct_answer,
+        a memory dictionary or a provider. The memories of dict engines are
+        compared node by node.
+        """
+        if isinstance(correct_answer, dict):
+            expected = sorted(auto.iter_word_counts('', correct_answer))
+        else:
+            expected = sorted(correct_answer.iter_words())
+            correct_answer = getattr(correct_answer, 'memory', None)
+        if self.provider_class is auto.AutocompleteProvider:
+            self.assertEqual(algorithm.memory, correct_answer)
+        self.assertEqual(sorted(algorithm.iter_words()), expected)
+
     def test_train_no_memory(self):
         """Tests the train method when there are no previous memories.
         """
@@ -207,9 +512,9 @@ class TestAutocompleteProviderTrain(unittest.TestCase):
                           'd': auto.MemoryNode({'e':
                                auto.MemoryNode({'f': 
                                auto.MemoryNode({}, 1)}, 0)}, 0)}
-        algorithm = auto.AutocompleteProvider()
+        algorithm = self.provider_class()
         algorithm.train(passage)
-        self.assertEqual(algorithm.memory, correct_answer)
+        self.assertMemoryEqual(algorithm, correct_answer)
 
     def test_train_has_memory(self):
         """Test the train method when there are previous memories.
@@ -222,16 +527,153 @@ class TestAutocompleteProviderTrain(unittest.TestCase):
                                auto.MemoryNode({'c': auto.MemoryNode({}, 2),
                                                 'd': auto.MemoryNode({}, 1)}, 
                                                 1)}, 0)}
-        algorithm = auto.AutocompleteProvider()
-        algorithm.memory = memory
+        algorithm = provider_with_memory(self.provider_class, memory)
         algorithm.train(passage)
-        self.assertEqual(algorithm.memory, correct_answer)
+        self.assertMemoryEqual(algorithm, correct_answer)
+
+    def test_train_many(self):
+        """Tests that train_many gives the same memory as training on each
+        passage in turn.
+        """
+        passages = ['ab abc abd', 'Abc, d-ef!', 'ab']
+        correct_answer = self.provider_class()
+        for passage in passages:
+            correct_answer.train(passage)
+        algorithm = self.provider_class()
+        algorithm.train_many(passages)
+        self.assertMemoryEqual(algorithm, correct_answer)
+
+    def test_train_counts(self):
+        """Tests that train_counts normalizes words, adds counts of words that
+        normalize to the same word, splits keys holding several words and
+        ignores counts below one.
+        """
+        word_counts = {'Abc': 2, 'abc!': 1, 'ab': 1, 'abd': 0, '...': 4,
+                       ' a\tab\n': 2, 'abd abd': -1}
+        correct_answer = {'a': auto.MemoryNode({'b': 
+                               auto.MemoryNode({'c': 
+                               auto.MemoryNode({}, 3)}, 3)}, 2)}
+        algorithm = self.provider_class()
+        algorithm.train_counts(word_counts)
+        self.assertMemoryEqual(algorithm, correct_answer)
+
+    def test_train_stream(self):
+        """Tests that train_stream gives the same memory as train, also when
+        counts are memorized in several small batches.
+        """
+        passage = 'ab abc abd, Abc d-ef abd ab ab'
+        correct_answer = self.provider_class()
+        correct_answer.train(passage)
+        chunks = [passage[i:i + 4] for i in range(0, len(passage), 4)]
+        for batch_size in [1, 2, 100]:
+            algorithm = self.provider_class()
+            algorithm.train_stream(iter(chunks), batch_size=batch_size)
+            self.assertMemoryEqual(algorithm, correct_answer)
+
+    def test_train_file(self):
+        """Tests that train_file gives the same memory as train.
+        """
+        passage = 'The third thing that I need to tell you is that this\n' \
+                  'thing does not think thoroughly.\n'
+        correct_answer = self.provider_class()
+        correct_answer.train(passage)
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'passage.txt')
+            with open(path, 'w') as passage_file:
+                passage_file.write(passage)
+            algorithm = self.provider_class()
+            algorithm.train_file(path, chunk_size=5)
+        finally:
+            shutil.rmtree(directory)
+        self.assertMemoryEqual(algorithm, correct_answer)
+
+    def test_merge(self):
+        """Tests that merging providers gives the same memory as training one
+        provider on both passages, and leaves the other provider unchanged.
+        """
+        correct_answer = self.provider_class()
+        correct_answer.train_many(['ab abc abd', 'abc d-ef'])
+        algorithm = self.provider_class()
+        algorithm.train('ab abc abd')
+        other = self.provider_class()
+        other.train('abc d-ef')
+        algorithm.merge(other)
+        self.assertMemoryEqual(algorithm, correct_answer)
+        self.assertEqual(sorted(other.iter_words()), [('abc', 1), ('def', 1)])
+
+    def test_merge_other_engine(self):
+        """Tests merging a provider that uses a different engine.
+        """
+        from autocomplete import array_autocomplete_provider as array_auto
+        correct_answer = self.provider_class()
+        correct_answer.train_many(['ab abc abd', 'abc d-ef'])
+        algorithm = self.provider_class(cache_size=4)
+        algorithm.train('ab abc abd')
+        algorithm.getWords('a')
+        other = array_auto.ArrayAutocompleteProvider()
+        other.train('abc d-ef')
+        algorithm.merge(other)
+        self.assertMemoryEqual(algorithm, correct_answer)
+        self.assertEqual(algorithm.getWords('abc'), [cand.Candidate('abc', 2)])
+
+    def test_train_node_count(self):
+        """Tests that node_count counts one node per distinct prefix.
+        """
+        algorithm = self.provider_class()
+        algorithm.train('ab abc abd b')
+        self.assertEqual(algorithm.node_count(), 5)
+
+
+class TestAutocompleteProviderPrune(unittest.TestCase):
+    """Tests the decay and prune methods of the AutocompleteProvider class.
+    """
+
+    provider_class = auto.AutocompleteProvider
+
+    def setUp(self):
+        self.alg = self.provider_class(cache_size=8)
+        self.alg.train('the the the the thing thing this t')
+
+    def test_decay(self):
+        """Decay halves confidences and forgets words that reach zero.
+        """
+        self.alg.getWords('th')
+        self.assertEqual(self.alg.decay(0.5), 2)
+        self.assertEqual(self.alg.getWords('th'), [cand.Candidate('the', 2),
+                                                   cand.Candidate('thing', 1)])
+        self.assertEqual(self.alg.getWords('t', k=1),
+                         [cand.Candidate('the', 2)])
+        self.assertEqual(self.alg.node_count(), 6)
+
+    def test_decay_invalid_factor(self):
+        """Decay factors outside 0 to 1 are rejected.
+        """
+        self.assertRaises(ValueError, self.alg.decay, 1.5)
+
+    def test_prune_min_confidence(self):
+        """Words below min_confidence are forgotten.
+        """
+        self.assertEqual(self.alg.prune(min_confidence=2), 2)
+        self.assertEqual(sorted(self.alg.iter_words()),
+                         [('the', 4), ('thing', 2)])
+
+    def test_prune_max_words(self):
+        """Only the most confident words are kept, ties alphabetically.
+        """
+        self.assertEqual(self.alg.prune(max_words=3), 1)
+        self.assertEqual(sorted(self.alg.iter_words()),
+                         [('t', 1), ('the', 4), ('thing', 2)])
+        self.assertEqual(self.alg.getWords('thi'),
+                         [cand.Candidate('thing', 2)])
 
 
 class TestAutocompleteProviderGetWords(unittest.TestCase):
     """Tests getWords method of the AutocompleteProvider class.
     """
 
+    provider_class = auto.AutocompleteProvider
+
     def test_getWords_no_candidates(self):
         """No good candidates in memory for passed fragment.
         """
@@ -240,8 +682,7 @@ class TestAutocompleteProviderGetWords(unittest.TestCase):
                        auto.MemoryNode({}, 1)}, 0)}, 0)}
         fragment = 'ad'
         correct_answer = []
-        alg = auto.AutocompleteProvider()
-        alg.memory = memory
+        alg = provider_with_memory(self.provider_class, memory)
         output = alg.getWords(fragment)
         self.assertEqual(output, correct_answer)
 
@@ -255,8 +696,7 @@ class TestAutocompleteProviderGetWords(unittest.TestCase):
                         0)}, 0)}, 0),}
         fragment = 'a'
         correct_answer = [cand.Candidate('adef', 2), cand.Candidate('abc', 1)]
-        alg = auto.AutocompleteProvider()
-        alg.memory = memory
+        alg = provider_with_memory(self.provider_class, memory)
         output = alg.getWords(fragment)
         self.assertEqual(output, correct_answer)
 
@@ -269,38 +709,54 @@ class TestAutocompleteProviderGetWords(unittest.TestCase):
                        auto.MemoryNode({}, 1)}, 0)}, 1)}
         fragment = 'aB'  # contains uppercase
         correct_answer = [cand.Candidate('abc', 1)]
-        alg = auto.AutocompleteProvider()
-        alg.memory = memory
+        alg = provider_with_memory(self.provider_class, memory)
         output = alg.getWords(fragment)
         self.assertEqual(output, correct_answer)
 
 
+    def test_getWords_top_k(self):
+        """Only the k most confident candidates are returned.
+        """
+        memory = {'a': auto.MemoryNode({
+                        'b': auto.MemoryNode({'c': auto.MemoryNode({}, 1)}, 0),
+                        'd': auto.MemoryNode({'e':
+                                auto.MemoryNode({'f': auto.MemoryNode({}, 2)},
+                        0)}, 0)}, 0),}
+        fragment = 'A'
+        correct_answer = [cand.Candidate('adef', 2)]
+        alg = provider_with_memory(self.provider_class, memory)
+        output = alg.getWords(fragment, k=1)
+        self.assertEqual(output, correct_answer)
+
+
 class TestAutocompleteProviderIntegrationTests(unittest.TestCase):
     """Tests AutocompleteProvider methods when used together.
     """
 
+    provider_class = auto.AutocompleteProvider
+
     def test_getWords_example(self):
         """Tests AutocompleteProvider on the given example.
         """
         passage = 'The third thing that I need to tell you is that this thing \
         does not think thoroughly.'
-        alg = auto.AutocompleteProvider()
+        alg = self.provider_class()
         alg.train(passage)
         fragment1 = 'thi'
         correct_answer1 = [cand.Candidate('thing', 2),
-                           cand.Candidate('this', 1),
+                           cand.Candidate('think', 1),
                            cand.Candidate('third', 1),
-                           cand.Candidate('think', 1)]
+                           cand.Candidate('this', 1)]
         fragment2 = 'nee'     
         correct_answer2 = [cand.Candidate('need', 1)]
         fragment3 = 'th'
-        correct_answer3 = [cand.Candidate('thing', 2),
-                           cand.Candidate('that', 2),
-                           cand.Candidate('this', 1),
-                           cand.Candidate('third', 1),
-                           cand.Candidate('think', 1),
+        correct_answer3 = [cand.Candidate('that', 2),
+                           cand.Candidate('thing', 2),
                            cand.Candidate('the', 1),
-                           cand.Candidate('thoroughly', 1)]    
+                           cand.Candidate('think', 1),
+                           cand.Candidate('third', 1),
+                           cand.Candidate('this', 1),
+                           cand.Candidate('thoroughly', 1)]
         output1 = alg.getWords(fragment1)
         output2 = alg.getWords(fragment2)
         output3 = alg.getWords(fragment3)
@@ -313,16 +769,16 @@ class TestAutocompleteProviderIntegrationTests(unittest.TestCase):
         """
         passage1 = 'This is the fIrst passage.'
         passage2 = 'here is the second passage that works. The thing pass!!!'
-        alg = auto.AutocompleteProvider()
+        alg = self.provider_class()
         alg.train(passage1)
         alg.train(passage2)
         fragment1 = 'i'
         correct_answer1 = [cand.Candidate('is', 2)]
         fragment2 = 'th'
         correct_answer2 = [cand.Candidate('the', 3),
-                           cand.Candidate('this', 1),
+                           cand.Candidate('that', 1),
                            cand.Candidate('thing', 1),
-                           cand.Candidate('that', 1)]
+                           cand.Candidate('this', 1)]
         fragment3 = 'FIRST'
         correct_answer3 = [cand.Candidate('first', 1)]   
         fragment4 = 'pass'                       
@@ -337,6 +793,19 @@ class TestAutocompleteProviderIntegrationTests(unittest.TestCase):
         self.assertEqual(output3, correct_answer3)
         self.assertEqual(output4, correct_answer4)
 
+    def test_getWords_top_k_matches_full_list(self):
+        """The top k candidates are the first k candidates of the full list,
+        ties included.
+        """
+        passage = 'The third thing that I need to tell you is that this thing \
+        does not think thoroughly.'
+        alg = self.provider_class()
+        alg.train(passage)
+        full = alg.getWords('th')
+        for k in range(len(full) + 2):
+            output = alg.getWords('th', k=k)
+            self.assertEqual(output, full[:k])
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""Contains unit tests for AutocompleteProvider.getWordsBatch.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import frozen_autocomplete_provider as frozen
+from autocomplete import overlay_autocomplete_provider as overlay
+from autocomplete import radix_autocomplete_provider as radix
+from autocomplete import snapshot
+from autocomplete.tests.helpers import pairs
+
+
+class TestGetWordsBatch(unittest.TestCase):
+    """Tests AutocompleteProvider.getWordsBatch.
+    """
+
+    def setUp(self):
+        random.seed(7)
+        words = [''.join(random.choice('abcd') for _ in
+                         range(random.randint(1, 6))) for _ in range(400)]
+        self.passage = ' '.join(words)
+        self.fragments = [word[:random.randint(1, len(word))]
+                          for word in random.sample(words, 60)]
+        self.fragments += ['A', 'ab', 'ab', 'abcdx', 'x', 'dddddd', 'b!']
+        self.alg = auto.AutocompleteProvider()
+        self.alg.train(self.passage)
+
+    def assertBatchMatches(self, provider, fragments):
+        """Asserts that the batch results equal the getWords results.
+        """
+        for k in [None, 1, 3, 10, 1000]:
+            expected = [pairs(provider.getWords(fragment, k))
+                        for fragment in fragments]
+            output = [pairs(candidate_list) for candidate_list
+                      in provider.getWordsBatch(fragments, k)]
+            self.assertEqual(output, expected)
+
+    def test_getWordsBatch_example(self):
+        """Results are returned in the order of the fragments.
+        """
+        alg = auto.AutocompleteProvider()
+        alg.train('The third thing that I need to tell you is that this \
+        thing does not think thoroughly.')
+        output = alg.getWordsBatch(['thi', 'x', 'Thin'], 2)
+        self.assertEqual([pairs(result) for result in output],
+                         [[('thing', 2), ('think', 1)], [],
+                          [('thing', 2), ('think', 1)]])
+        self.assertEqual(alg.getWordsBatch([]), [])
+        self.assertEqual([pairs(result) for result
+                          in alg.getWordsBatch(['', 'thi'], 1)],
+                         [[], [('thing', 2)]])
+
+    def test_getWordsBatch_engines(self):
+        """Every engine returns exactly what getWords returns.
+        """
+        providers = [self.alg,
+                     frozen.FrozenAutocompleteProvider.from_provider(self.alg)]
+        for provider_class in [array_auto.ArrayAutocompleteProvider,
+                               radix.RadixAutocompleteProvider]:
+            providers.append(provider_class())
+            providers[-1].train(self.passage)
+        providers.append(overlay.OverlayAutocompleteProvider(self.alg))
+        providers[-1].train('abcab dab d')
+        for provider in providers:
+            self.assertBatchMatches(provider, self.fragments + ['', '!'])
+
+    def test_getWordsBatch_snapshot(self):
+        """Memory-mapped snapshots are searched too.
+        """
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'model.snapshot')
+        try:
+            self.alg.save(path)
+            mapped = snapshot.MappedAutocompleteProvider.open(path)
+            try:
+                self.assertBatchMatches(mapped, self.fragments)
+            finally:
+                mapped.close()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_getWordsBatch_cache(self):
+        """Batch results fill the cache and are not shared between fragments.
+        """
+        alg = auto.AutocompleteProvider(cache_size=100, thread_safe=True)
+        alg.train(self.passage)
+        first = alg.getWordsBatch(self.fragments, 5)
+        self.assertTrue(alg.cache_stats()['size'] > 0)
+        first[0].append(None)
+        second = alg.getWordsBatch(self.fragments, 5)
+        self.assertEqual([pairs(result) for result in second],
+                         [pairs(alg.getWords(fragment, 5))
+                          for fragment in self.fragments])
+        self.assertFalse(second[0] is second[1])
+
+    def test_getWordsBatch_instrumented(self):
+        """Instrumented providers report every fragment.
+        """
+        reports = []
+        self.alg.instrument(reports.append)
+        self.alg.getWordsBatch(['a', 'b', 'a'], 2)
+        self.assertEqual(len(reports), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Contains unit tests for the benchmark suite and its Zipf corpus.
+"""
+
+import collections
+import json
+import unittest
+from autocomplete.benchmarks import corpus
+from autocomplete.benchmarks import suite
+
+
+class TestZipfPassages(unittest.TestCase):
+    """Tests the zipf_passages function.
+    """
+
+    def test_zipf_passages_size(self):
+        """The corpus has the requested number of words split into passages.
+        """
+        passages = corpus.zipf_passages(250, 100, words_per_passage=100)
+        self.assertEqual(len(passages), 3)
+        self.assertEqual(sum(len(p.split()) for p in passages), 250)
+
+    def test_zipf_passages_reproducible(self):
+        """The same seed gives the same corpus.
+        """
+        self.assertEqual(corpus.zipf_passages(500, 100, seed=3),
+                         corpus.zipf_passages(500, 100, seed=3))
+
+    def test_zipf_passages_skewed(self):
+        """The most frequent word is much more frequent than the median word.
+        """
+        words = ' '.join(corpus.zipf_passages(20000, 1000)).split()
+        counts = sorted(collections.Counter(words).values(), reverse=True)
+        self.assertGreater(counts[0], 20 * counts[len(counts) // 2])
+
+
+class TestSuite(unittest.TestCase):
+    """Runs the benchmark suite on a small corpus.
+    """
+
+    def setUp(self):
+        self.results = suite.run(token_count=2000, vocabulary_size=300,
+                                 query_count=10, max_prefix_length=3,
+                                 engines=['dict', 'array'], repeat=1)
+
+    def test_results_json(self):
+        """Results survive a round trip through JSON.
+        """
+        self.assertEqual(json.loads(json.dumps(self.results)), self.results)
+
+    def test_results_reported(self):
+        """Throughput, memory and latency percentiles are reported per engine.
+        """
+        for name in ['dict', 'array']:
+            engine = self.results['engines'][name]
+            self.assertGreater(engine['train_tokens_per_second'], 0)
+            self.assertGreater(engine['bytes_per_word'], 0)
+            by_length = engine['getWords_us']['by_prefix_length']
+            self.assertEqual(sorted(by_length), ['1', '2', '3'])
+            self.assertEqual(by_length['1']['count'], 10)
+            self.assertLessEqual(by_length['1']['p50'], by_length['1']['p99'])
+            by_size = engine['top_k_getWords_us']['by_result_size']
+            self.assertEqual(sum(s['count'] for s in by_size.values()), 30)
+
+    def test_compare(self):
+        """A run compared with itself has ratios of one.
+        """
+        rows = suite.compare(self.results, self.results)
+        self.assertTrue(rows)
+        self.assertTrue(all(row[4] in (1.0, None) for row in rows))
+
+    def test_size_label(self):
+        """Result-set sizes are grouped into buckets.
+        """
+        self.assertEqual([suite.size_label(n) for n in [1, 5, 100, 5000]],
+                         ['1', '2-10', '11-100', '1001+'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""Contains unit tests for the bigram module and the bigram layer of
+AutocompleteProvider.
+"""
+
+import collections
+import unittest
+from autocomplete import autocomplete_provider as auto
+from autocomplete import bigram
+from autocomplete import parallel
+from autocomplete.tests.helpers import pairs
+
+
+class TestBigramModel(unittest.TestCase):
+    """Tests the BigramModel class.
+    """
+
+    def setUp(self):
+        self.model = bigram.BigramModel()
+        self.model.add(bigram.count_pairs(
+            'new york new york new year new yorker old york'.split()))
+
+    def test_count_pairs(self):
+        """Consecutive words are counted in order.
+        """
+        self.assertEqual(bigram.count_pairs(['a', 'b', 'a', 'b']),
+                         collections.Counter({('a', 'b'): 2, ('b', 'a'): 1}))
+        self.assertEqual(bigram.count_pairs(['a']), collections.Counter())
+
+    def test_word_ids(self):
+        """Pairs are stored as integer ids, one per distinct word.
+        """
+        self.assertEqual(sorted(self.model.words),
+                         ['new', 'old', 'year', 'york', 'yorker'])
+        self.assertEqual(self.model.stats(), {'words': 5, 'pairs': 7})
+        new_id = self.model.word_ids['new']
+        york_id = self.model.word_ids['york']
+        self.assertEqual(self.model.followers[new_id][york_id], 2)
+
+    def test_top_following(self):
+        """Followers are ordered by count and then alphabetically.
+        """
+        self.assertEqual(self.model.top_following('new'),
+                         [('york', 2), ('year', 1), ('yorker', 1)])
+        self.assertEqual(self.model.top_following('new', 2, 'yo'),
+                         [('york', 2), ('yorker', 1)])
+        self.assertEqual(self.model.top_following('missing'), [])
+
+    def test_rescale(self):
+        """Counts are decayed and pairs with forgotten words dropped.
+        """
+        self.model.rescale(0.5)
+        self.assertEqual(dict(self.model.iter_pairs()),
+                         {('new', 'york'): 1, ('york', 'new'): 1})
+        self.model.add({('old', 'york'): 3, ('new', 'yorker'): 2})
+        self.model.rescale(1, frozenset(['new', 'york', 'old']))
+        self.assertEqual(dict(self.model.iter_pairs()),
+                         {('new', 'york'): 1, ('york', 'new'): 1,
+                          ('old', 'york'): 3})
+        self.assertEqual(sorted(self.model.words), ['new', 'old', 'york'])
+
+    def test_merge(self):
+        """Merging sums the counts of both models.
+        """
+        other = bigram.BigramModel()
+        other.add({('new', 'year'): 2, ('happy', 'new'): 1})
+        self.model.merge(other)
+        self.assertEqual(self.model.top_following('new', 1), [('year', 3)])
+        self.assertEqual(self.model.top_following('happy'), [('new', 1)])
+
+
+class TestAutocompleteProviderBigrams(unittest.TestCase):
+    """Tests getWords with previous and nextWords.
+    """
+
+    def setUp(self):
+        self.passage = 'I live in New York. The new year starts in York, \
+        new yoghurt is good, New York is big, you know the new yoghurt.'
+        self.alg = auto.AutocompleteProvider(bigrams=True)
+        self.alg.train(self.passage)
+
+    def test_getWords_previous(self):
+        """Words that followed the previous word come first.
+        """
+        self.assertEqual(pairs(self.alg.getWords('y', 3)),
+                         [('york', 3), ('yoghurt', 2), ('year', 1)])
+        self.assertEqual(pairs(self.alg.getWords('y', 3, previous='New')),
+                         [('yoghurt', 2), ('york', 2), ('year', 1)])
+        self.assertEqual(pairs(self.alg.getWords('yo', previous='in')),
+                         [('york', 1), ('yoghurt', 2), ('you', 1)])
+
+    def test_getWords_previous_unknown(self):
+        """An unseen previous word gives the usual candidates.
+        """
+        self.assertEqual(pairs(self.alg.getWords('y', 3, previous='zebra')),
+                         pairs(self.alg.getWords('y', 3)))
+        alg = auto.AutocompleteProvider()
+        alg.train(self.passage)
+        self.assertEqual(pairs(alg.getWords('y', 3, previous='new')),
+                         pairs(alg.getWords('y', 3)))
+
+    def test_nextWords(self):
+        """The next word is predicted before any letter is typed.
+        """
+        self.assertEqual(pairs(self.alg.nextWords('new')),
+                         [('yoghurt', 2), ('york', 2), ('year', 1)])
+        self.assertEqual(pairs(self.alg.nextWords('NEW', 1)),
+                         [('yoghurt', 2)])
+        self.assertEqual(auto.AutocompleteProvider().nextWords('new'), [])
+
+    def test_pairs_within_passages(self):
+        """Pairs do not span passages, but do span stream chunks.
+        """
+        alg = auto.AutocompleteProvider(bigrams=True)
+        alg.train_many(['a b', 'c d'])
+        self.assertEqual(pairs(alg.nextWords('b')), [])
+        alg.train_stream(['a b', ' c d'])
+        self.assertEqual(pairs(alg.nextWords('b')), [('c', 1)])
+
+    def test_decay_and_prune(self):
+        """Decay and pruning forget pairs together with their words.
+        """
+        self.alg.decay(0.5)
+        self.assertEqual(pairs(self.alg.nextWords('new')),
+                         [('yoghurt', 1), ('york', 1)])
+        self.assertEqual(pairs(self.alg.nextWords('the')), [('new', 1)])
+        self.alg.prune(max_words=3)  # keeps new, in and is
+        self.assertEqual(self.alg.nextWords('new'), [])
+        self.assertEqual(self.alg.nextWords('the'), [])
+
+    def test_merge(self):
+        """Merged providers sum their pairs.
+        """
+        other = auto.AutocompleteProvider(bigrams=True)
+        other.train('new year new year')
+        self.alg.merge(other)
+        self.assertEqual(pairs(self.alg.nextWords('new', 1)), [('year', 3)])
+
+    def test_parallel_pairs(self):
+        """Workers count pairs for providers with bigrams.
+        """
+        word_counts, pair_counts = parallel.count_words(['a b a'],
+                                                        bigrams=True)
+        self.assertEqual(word_counts, collections.Counter({'a': 2, 'b': 1}))
+        self.assertEqual(pair_counts, collections.Counter(
+            {('a', 'b'): 1, ('b', 'a'): 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -110,5 +110,25 @@ class TestCandidateWordAndConfidence(unittest.TestCase):
         self.assertEqual(output, correct_answer)
 
 
+class TestCandidateEquality(unittest.TestCase):
+    """Tests the equality and memory layout of the Candidate class.
+    """
+
+    def test_candidate_equality(self):
+        """Candidates are equal when both word and confidence are equal.
+        """
+        self.assertEqual(cand.Candidate('abc', 1), cand.Candidate('abc', 1))
+        self.assertNotEqual(cand.Candidate('abc', 1), cand.Candidate('abc', 2))
+        self.assertNotEqual(cand.Candidate('abc', 1), cand.Candidate('abd', 1))
+        self.assertFalse(cand.Candidate('abc', 1) != cand.Candidate('abc', 1))
+
+    def test_candidate_slots(self):
+        """Candidates have slots instead of a per-instance dictionary.
+        """
+        candidate = cand.Candidate('abc', 1)
+        self.assertFalse(hasattr(candidate, '__dict__'))
+        self.assertRaises(AttributeError, setattr, candidate, 'extra', 1)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
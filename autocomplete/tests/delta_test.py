@@ -0,0 +1,161 @@
+"""Contains unit tests for the delta module and the export_delta and
+apply_delta methods of AutocompleteProvider.
+"""
+
+import collections
+import shutil
+import tempfile
+import unittest
+import zlib
+from autocomplete import autocomplete_provider as auto
+from autocomplete import delta
+from autocomplete import training_log
+from autocomplete.benchmarks import replica_benchmark
+
+
+class TestDeltaHistory(unittest.TestCase):
+    """Tests the DeltaHistory class.
+    """
+
+    def test_counts_since(self):
+        """Batches after a version are summed, and dropped batches cannot be
+        exported.
+        """
+        history = delta.DeltaHistory(4)
+        history.record(1, {'the': 1, 'this': 1})
+        history.record(3, {'the': 2})
+        history.record(4, {'thing': 1})
+        self.assertEqual(history.counts_since(1, 4), {'the': 2, 'thing': 1})
+        self.assertEqual(history.counts_since(4, 4), {})
+        history.record(5, {'think': 1, 'the': 1})
+        self.assertEqual(history.stats(), {'batches': 3, 'words': 4,
+                                           'epoch': history.epoch,
+                                           'start_version': 0,
+                                           'oldest_version': 1})
+        self.assertEqual(history.counts_since(1, 5),
+                         {'the': 3, 'thing': 1, 'think': 1})
+        self.assertRaises(ValueError, history.counts_since, 0, 5)
+        self.assertRaises(ValueError, history.counts_since, 6, 5)
+        self.assertRaises(ValueError, delta.DeltaHistory, 0)
+
+
+class TestDeltaProvider(unittest.TestCase):
+    """Tests exchanging deltas between providers.
+    """
+
+    def test_export_apply(self):
+        """A delta carries the training of its sender since a version, and
+        applied deltas are not exported again.
+        """
+        sender = auto.AutocompleteProvider(delta_history=100)
+        receiver = auto.AutocompleteProvider(delta_history=100)
+        sender.train('The third thing')
+        first = sender.export_delta()
+        version = delta.decode(first)[3]
+        sender.train('the thing that I need')
+        blob = sender.export_delta(version)
+        self.assertEqual(delta.decode(blob),
+                         (sender.deltas.epoch, 0, 1, 2,
+                          {'the': 1, 'thing': 1, 'that': 1, 'i': 1,
+                           'need': 1}))
+        receiver.train('this')
+        self.assertEqual(receiver.apply_delta(first), 3)
+        self.assertEqual(receiver.apply_delta(blob), 5)
+        self.assertEqual(sorted(receiver.iter_words()),
+                         sorted(sender.iter_words()) + [('this', 1)])
+        self.assertEqual(delta.decode(receiver.export_delta())[4],
+                         {'this': 1})
+        self.assertRaises(ValueError, receiver.apply_delta, b'ACTS')
+        self.assertRaises(ValueError, auto.AutocompleteProvider().export_delta)
+
+    def test_sender_epochs(self):
+        """Deltas must follow on from the last one applied from the same
+        epoch, so repeated deltas and deltas computed from the version a
+        sender had before it restarted are rejected.
+        """
+        sender = auto.AutocompleteProvider(delta_history=100)
+        receiver = auto.AutocompleteProvider()
+        sender.train('the thing')
+        blob = sender.export_delta()
+        receiver.apply_delta(blob)
+        self.assertRaises(ValueError, receiver.apply_delta, blob)
+        sender.train('this')
+        sender.train('that')
+        self.assertRaises(ValueError, receiver.apply_delta,
+                          sender.export_delta(2))
+        receiver.apply_delta(sender.export_delta(1))
+        restarted = auto.AutocompleteProvider(delta_history=100)
+        for passage in ['the', 'thing', 'then', 'there']:
+            restarted.train(passage)
+        self.assertRaises(ValueError, receiver.apply_delta,
+                          restarted.export_delta(3))
+        self.assertEqual(receiver.apply_delta(restarted.export_delta()), 4)
+        self.assertEqual(sorted(receiver.iter_words()),
+                         [('that', 1), ('the', 2), ('then', 1), ('there', 1),
+                          ('thing', 2), ('this', 1)])
+
+    def test_merge_and_unicode(self):
+        """Merges are exported, and Unicode words survive the trip.
+        """
+        sender = auto.AutocompleteProvider(unicode_letters=True,
+                                           delta_history=100)
+        other = auto.AutocompleteProvider(unicode_letters=True)
+        other.train(u'caf\xe9 caf\xe9')
+        sender.merge(other)
+        sender.train(u'\xfcber')
+        receiver = auto.AutocompleteProvider(unicode_letters=True)
+        receiver.apply_delta(sender.export_delta())
+        self.assertEqual(sorted(receiver.iter_words()),
+                         [(u'caf\xe9', 2), (u'\xfcber', 1)])
+
+    def test_whitespace_words(self):
+        """Words holding whitespace survive the trip, and malformed counts
+        are rejected.
+        """
+        word_counts = collections.OrderedDict(
+            [('new york', 3), ('apple', 5), ('zed', 1)])
+        self.assertEqual(delta.decode(delta.encode(7, 1, 2, 5, word_counts)),
+                         (7, 1, 2, 5, word_counts))
+        receiver = auto.AutocompleteProvider()
+        receiver.apply_delta(delta.encode(7, 0, 0, 1, word_counts))
+        self.assertEqual(sorted(receiver.iter_words()), sorted(
+            word_counts.items()))
+        blob = delta.encode(7, 0, 0, 1, {})[:delta.HEADER.size] + \
+            zlib.compress(b'8 5\n3\nnew yorkapple')
+        self.assertRaises(ValueError, delta.decode, blob)
+
+    def test_training_log(self):
+        """Applied deltas are logged, and recovered training is not exported
+        again.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        sender = auto.AutocompleteProvider(delta_history=100)
+        sender.train('the thing')
+        log = training_log.TrainingLog(directory)
+        self.addCleanup(log.close)
+        alg = auto.AutocompleteProvider(delta_history=100, training_log=log)
+        alg.apply_delta(sender.export_delta())
+        alg.train('this')
+        log = training_log.TrainingLog(directory)
+        self.addCleanup(log.close)
+        recovered = auto.AutocompleteProvider(delta_history=100,
+                                              training_log=log)
+        self.assertEqual(sorted(recovered.iter_words()),
+                         [('the', 1), ('thing', 1), ('this', 1)])
+        self.assertEqual(delta.decode(recovered.export_delta())[2:],
+                         (recovered.version, recovered.version, {}))
+        self.assertRaises(ValueError, recovered.export_delta, 0)
+
+    def test_replicas_converge(self):
+        """Replica processes exchanging deltas converge on the whole corpus.
+        """
+        result = replica_benchmark.run(replica_count=3, token_count=3000,
+                                       vocabulary_size=300, round_count=2)
+        self.assertTrue(result['converged'])
+        self.assertTrue(result['delta_bytes_per_round'] <
+                        result['snapshot_bytes'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+"""Contains unit tests for the FrozenAutocompleteProvider class.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from autocomplete import candidate as cand
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import frozen_autocomplete_provider as frozen
+from autocomplete.tests.helpers import pairs, ranked
+
+
+class TestBuildAutomaton(unittest.TestCase):
+    """Tests the build_automaton function.
+    """
+
+    def test_build_automaton_shares_suffixes(self):
+        """Words with a common ending share its states.
+        """
+        finals, first_edge, labels, targets, offsets = frozen.build_automaton(
+            ['testing', 'training'])
+        # "test" and "train" lead to one state that spells "ing".
+        self.assertEqual(len(finals) - 1, 10)
+        self.assertEqual(len(labels), 11)
+        self.assertEqual(sum(finals), 1)
+
+    def test_build_automaton_offsets(self):
+        """Edge offsets number the words of a state alphabetically.
+        """
+        finals, first_edge, labels, targets, offsets = frozen.build_automaton(
+            ['a', 'ab', 'b'])
+        root = len(finals) - 1
+        edges = range(first_edge[root], first_edge[root + 1])
+        self.assertEqual([chr(labels[edge]) for edge in edges], ['a', 'b'])
+        self.assertEqual([offsets[edge] for edge in edges], [0, 2])
+
+    def test_build_automaton_unsorted(self):
+        """Unsorted or repeated words are rejected.
+        """
+        self.assertRaises(ValueError, frozen.build_automaton, ['b', 'a'])
+        self.assertRaises(ValueError, frozen.build_automaton, ['a', 'a'])
+
+
+class TestFrozenAutocompleteProvider(unittest.TestCase):
+    """Tests the FrozenAutocompleteProvider class.
+    """
+
+    def setUp(self):
+        self.passage = 'The third thing that I need to tell you is that this \
+        thing does not think thoroughly. AutocompleteProvider autocomplete'
+        self.trained = auto.AutocompleteProvider()
+        self.trained.train(self.passage)
+        self.alg = frozen.FrozenAutocompleteProvider.from_provider(
+            self.trained)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_getWords_example(self):
+        """Candidates are ordered by confidence.
+        """
+        output = self.alg.getWords('thi')
+        self.assertEqual(output[0], cand.Candidate('thing', 2))
+        self.assertEqual(ranked(output), [('thing', 2), ('think', 1),
+                                          ('third', 1), ('this', 1)])
+
+    def test_getWords_matches_dictionary_engine(self):
+        """Both engines return the same candidates after the same training.
+        """
+        for fragment in ['t', 'th', 'thi', 'Nee', 'does', 'a', 'z']:
+            self.assertEqual(ranked(self.alg.getWords(fragment)),
+                             ranked(self.trained.getWords(fragment)))
+
+    def test_getWords_top_k(self):
+        """Top-k results are the head of the alphabetically ranked list.
+        """
+        full = ranked(self.alg.getWords('t'))
+        for k in range(len(full) + 1):
+            self.assertEqual(pairs(self.alg.getWords('t', k=k)), full[:k])
+
+    def test_getWords_top_k_shared_suffixes(self):
+        """Top-k results stay exact when states are shared by words of very
+        different confidence.
+        """
+        random.seed(3)
+        counts = {}
+        for _ in range(2000):
+            word = ''.join(random.choice('abcd') for _ in
+                           range(random.randint(1, 6)))
+            counts[word] = random.randint(1, 50)
+        alg = frozen.FrozenAutocompleteProvider(counts)
+        array_alg = array_auto.ArrayAutocompleteProvider()
+        array_alg.train_counts(counts)
+        self.assertLess(alg.node_count(), array_alg.node_count())
+        for fragment in ['a', 'bc', 'dda', 'abcd']:
+            for k in [1, 3, 10]:
+                self.assertEqual(pairs(alg.getWords(fragment, k)),
+                                 pairs(array_alg.getWords(fragment, k)))
+
+    def test_iter_words(self):
+        """Every word is generated once with its confidence.
+        """
+        self.assertEqual(sorted(self.alg.iter_words()),
+                         sorted(self.trained.iter_words()))
+
+    def test_from_file(self):
+        """Word counts are read from a file and normalized.
+        """
+        path = os.path.join(self.directory, 'counts.txt')
+        with open(path, 'w') as count_file:
+            count_file.write('the 3\nThe 2\n\nthey 4\n')
+        alg = frozen.FrozenAutocompleteProvider.from_file(path)
+        self.assertEqual(ranked(alg.getWords('th')), [('the', 5), ('they', 4)])
+        with open(path, 'w') as count_file:
+            count_file.write('the\n')
+        self.assertRaises(ValueError,
+                          frozen.FrozenAutocompleteProvider.from_file, path)
+
+    def test_save_load_round_trip(self):
+        """A saved automaton is loaded without rebuilding it.
+        """
+        path = os.path.join(self.directory, 'model.frozen')
+        self.alg.save(path)
+        output = frozen.FrozenAutocompleteProvider.load(path, cache_size=4)
+        self.assertEqual(list(output.iter_words()),
+                         list(self.alg.iter_words()))
+        self.assertEqual(ranked(output.getWords('th', 3)),
+                         ranked(self.alg.getWords('th', 3)))
+        self.assertEqual(output.cache.max_size, 4)
+
+    def test_load_snapshot(self):
+        """A snapshot of a trained provider is compiled when loaded.
+        """
+        path = os.path.join(self.directory, 'model.snapshot')
+        self.trained.save(path)
+        output = frozen.FrozenAutocompleteProvider.load(path)
+        self.assertEqual(list(output.iter_words()),
+                         list(self.alg.iter_words()))
+
+    def test_read_only(self):
+        """Training, decaying or pruning a frozen automaton fails.
+        """
+        self.assertRaises(TypeError, self.alg.train, 'the')
+        self.assertRaises(TypeError, self.alg.decay, 0.5)
+        self.assertRaises(TypeError, self.alg.prune, 2)
+
+    def test_empty(self):
+        """An automaton without words completes nothing.
+        """
+        alg = frozen.FrozenAutocompleteProvider()
+        self.assertEqual(alg.getWords('a'), [])
+        self.assertEqual(alg.getWords('a', 3), [])
+        self.assertEqual(alg.node_count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
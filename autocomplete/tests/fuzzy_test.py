@@ -0,0 +1,198 @@
+"""Contains unit tests for the fuzzy module and
+AutocompleteProvider.getFuzzyWords.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import frozen_autocomplete_provider as frozen
+from autocomplete import fuzzy
+from autocomplete import instrumentation
+from autocomplete import radix_autocomplete_provider as radix
+from autocomplete import snapshot
+
+
+def edit_distance(source, target):
+    """Returns the number of insertions, deletions, substitutions and
+    transpositions of adjacent letters turning source into target.
+    """
+    rows = [list(range(len(target) + 1))]
+    for i in range(1, len(source) + 1):
+        row = [i]
+        for j in range(1, len(target) + 1):
+            cost = min(rows[i - 1][j] + 1, row[j - 1] + 1,
+                       rows[i - 1][j - 1] + (source[i - 1] != target[j - 1]))
+            if (i > 1 and j > 1 and source[i - 1] == target[j - 2] and
+                    source[i - 2] == target[j - 1]):
+                cost = min(cost, rows[i - 2][j - 2] + 1)
+            row.append(cost)
+        rows.append(row)
+    return rows[-1][-1]
+
+
+def brute_force(word_counts, fragment, max_edits):
+    """Returns the (word, confidence, cost) triples of every word with a
+    prefix within max_edits of fragment, in the order of top_word_costs.
+    """
+    matches = []
+    for word, confidence in word_counts:
+        cost = min(edit_distance(word[:length], fragment)
+                   for length in range(len(word) + 1))
+        if cost <= max_edits:
+            matches.append((word, confidence, cost))
+    return sorted(matches, key=lambda match: (
+        -match[1] * fuzzy.EDIT_PENALTY ** match[2], match[0]))
+
+
+class TestKeyboardNeighbours(unittest.TestCase):
+    """Tests the keyboard_neighbours function.
+    """
+
+    def test_keyboard_neighbours(self):
+        """Keys touch their row neighbours and two keys above and below.
+        """
+        self.assertEqual(fuzzy.QWERTY['s'], 'adewxz')
+        self.assertEqual(fuzzy.QWERTY['q'], 'aw')
+        self.assertEqual(fuzzy.QWERTY['p'], 'lo')
+
+
+class TestNextRow(unittest.TestCase):
+    """Tests the next_row function.
+    """
+
+    def rows(self, fragment, path, keyboard=None):
+        """Returns the last row after walking path.
+        """
+        row = list(range(len(fragment) + 1))
+        previous_row = previous_letter = None
+        for letter in path:
+            row, previous_row = fuzzy.next_row(
+                row, previous_row, fragment, letter, previous_letter,
+                keyboard), row
+            previous_letter = letter
+        return row
+
+    def test_next_row_edits(self):
+        """The last entry is the edit distance of path and fragment.
+        """
+        self.assertEqual(self.rows('that', 'that')[-1], 0)
+        self.assertEqual(self.rows('that', 'tht')[-1], 1)
+        self.assertEqual(self.rows('that', 'thaat')[-1], 1)
+        self.assertEqual(self.rows('that', 'thet')[-1], 1)
+        self.assertEqual(self.rows('that', 'htat')[-1], 1)
+        self.assertEqual(self.rows('that', 'this')[-1], 2)
+
+    def test_next_row_keyboard(self):
+        """Neighbouring keys cost half an edit.
+        """
+        self.assertEqual(self.rows('thst', 'that', fuzzy.QWERTY)[-1], 0.5)
+        self.assertEqual(self.rows('thpt', 'that', fuzzy.QWERTY)[-1], 1)
+
+
+class TestGetFuzzyWords(unittest.TestCase):
+    """Tests AutocompleteProvider.getFuzzyWords.
+    """
+
+    def setUp(self):
+        self.passage = 'The third thing that I need to tell you is that this \
+        thing does not think thoroughly.'
+        self.alg = auto.AutocompleteProvider()
+        self.alg.train(self.passage)
+
+    def words(self, candidate_list):
+        """Returns the words of candidates.
+        """
+        return [candidate.getWord() for candidate in candidate_list]
+
+    def test_getFuzzyWords_typo(self):
+        """A mistyped fragment still gets suggestions.
+        """
+        self.assertEqual(self.alg.getWords('thst'), [])
+        self.assertEqual(self.words(self.alg.getFuzzyWords('thst')),
+                         ['that'])
+
+    def test_getFuzzyWords_exact_first(self):
+        """Exact completions rank above equally common typo matches.
+        """
+        self.assertEqual(self.words(self.alg.getFuzzyWords('thi', 5)),
+                         ['thing', 'think', 'third', 'this', 'that'])
+
+    def test_getFuzzyWords_keyboard(self):
+        """Neighbouring keys make a closer match.
+        """
+        self.alg.train('then')
+        self.assertEqual(self.words(self.alg.getFuzzyWords('thwn', 1)),
+                         ['thing'])
+        output = self.alg.getFuzzyWords('thwn', 2, keyboard=fuzzy.QWERTY)
+        self.assertEqual(self.words(output), ['then', 'thing'])
+
+    def test_getFuzzyWords_max_edits(self):
+        """No word is further than max_edits from the fragment.
+        """
+        self.assertEqual(self.alg.getFuzzyWords('xyz', None), [])
+        self.assertEqual(self.words(self.alg.getFuzzyWords('tiht', None, 0)),
+                         [])
+        self.assertEqual(self.words(self.alg.getFuzzyWords('tiht', 2, 2)),
+                         ['that', 'thing'])
+
+    def test_getFuzzyWords_matches_brute_force(self):
+        """Every engine returns the words a brute-force scan ranks first.
+        """
+        random.seed(5)
+        words = [''.join(random.choice('abcde') for _ in
+                         range(random.randint(1, 7))) for _ in range(300)]
+        self.alg = auto.AutocompleteProvider()
+        self.alg.train(' '.join(words))
+        word_counts = list(self.alg.iter_words())
+        providers = [self.alg,
+                     frozen.FrozenAutocompleteProvider.from_provider(self.alg)]
+        for provider_class in [array_auto.ArrayAutocompleteProvider,
+                               radix.RadixAutocompleteProvider]:
+            providers.append(provider_class())
+            providers[-1].train(' '.join(words))
+        for fragment in ['abc', 'edca', 'bb', 'a', 'ceadb']:
+            for max_edits in [0, 1, 2]:
+                expected = brute_force(word_counts, fragment, max_edits)
+                for provider in providers:
+                    self.assertEqual(
+                        fuzzy.top_word_costs(provider, fragment, 10, max_edits,
+                                             max_nodes=10 ** 6),
+                        expected[:10])
+                    self.assertEqual(
+                        fuzzy.top_word_costs(provider, fragment, None,
+                                             max_edits, max_nodes=10 ** 6),
+                        expected)
+
+    def test_getFuzzyWords_snapshot(self):
+        """Memory-mapped snapshots are searched too.
+        """
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'model.snapshot')
+        try:
+            self.alg.save(path)
+            mapped = snapshot.MappedAutocompleteProvider.open(path)
+            try:
+                self.assertEqual(self.words(mapped.getFuzzyWords('thst')),
+                                 ['that'])
+            finally:
+                mapped.close()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_getFuzzyWords_budget(self):
+        """The search stops after max_nodes nodes.
+        """
+        trace = instrumentation.QueryTrace()
+        fuzzy.top_word_costs(self.alg, 'thst', 10, 2, max_nodes=5,
+                             trace=trace)
+        self.assertEqual(trace.nodes_visited, 5)
+        output = self.alg.getFuzzyWords('thst', 10, 2, max_nodes=5)
+        self.assertTrue(len(output) <= 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
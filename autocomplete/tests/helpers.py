@@ -0,0 +1,28 @@
+"""Contains helper functions shared by the unit tests.
+"""
+
+from autocomplete import autocomplete_provider as auto
+
+
+def pairs(candidate_list):
+    """Returns candidates as (word, confidence) pairs in their order.
+    """
+    return [(c.getWord(), c.getConfidence()) for c in candidate_list]
+
+
+def ranked(candidate_list):
+    """Returns candidates as (word, confidence) pairs ordered by confidence and
+    then alphabetically, so results from different engines can be compared.
+    """
+    return auto.rank_word_counts(pairs(candidate_list))
+
+
+def random_passage(rng, count, letters='abcd'):
+    """Returns a passage of count random words over a small alphabet.
+
+    :param random.Random rng: Random number generator.
+    :param int count: Number of words.
+    :param str letters: Letters the words are made of.
+    """
+    return ' '.join(''.join(rng.choice(letters) for _ in
+                            range(rng.randint(1, 5))) for _ in range(count))
@@ -0,0 +1,166 @@
+"""Contains unit tests for the instrumentation module and the instrument and
+stats methods of AutocompleteProvider.
+"""
+
+import unittest
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import instrumentation
+
+
+class TestHistogram(unittest.TestCase):
+    """Tests the Histogram class.
+    """
+
+    def test_histogram_buckets(self):
+        """Latencies are counted in power-of-two microsecond buckets.
+        """
+        histogram = instrumentation.Histogram()
+        for seconds in [0.000003, 0.000003, 0.000003, 0.0001]:
+            histogram.add(seconds)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 4)
+        self.assertEqual(summary['buckets_us'], {4: 3, 128: 1})
+        self.assertEqual(summary['p50_us'], 4)
+        self.assertEqual(summary['p99_us'], 128)
+
+    def test_histogram_empty(self):
+        """An empty histogram reports zeros.
+        """
+        summary = instrumentation.Histogram().summary()
+        self.assertEqual(summary['p99_us'], 0)
+        self.assertEqual(summary['mean_us'], 0)
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Tests the instrumentation of AutocompleteProvider.
+    """
+
+    def setUp(self):
+        self.passage = 'The third thing that I need to tell you is that this \
+        thing does not think thoroughly.'
+        self.alg = auto.AutocompleteProvider()
+        self.alg.train(self.passage)
+
+    def test_disabled_by_default(self):
+        """Providers are not instrumented unless asked to be.
+        """
+        self.assertIsNone(self.alg.instrumentation)
+        self.assertIsNone(self.alg.stats()['calls'])
+
+    def test_stats_memory(self):
+        """stats describes the words, nodes and depth of the memory.
+        """
+        stats = self.alg.stats()
+        self.assertEqual(stats['words'], 15)
+        self.assertEqual(stats['nodes'], self.alg.node_count())
+        self.assertEqual(stats['depth'], len('thoroughly'))
+        self.assertIsNone(stats['cache'])
+
+    def test_query_counters(self):
+        """Queries record latency, nodes visited and candidates generated and
+        returned, without changing the results.
+        """
+        expected = self.alg.getWords('th', k=2)
+        self.alg.instrument()
+        self.assertEqual(self.alg.getWords('th', k=2), expected)
+        self.alg.getWords('th')
+        calls = self.alg.stats()['calls']
+        self.assertEqual(calls['queries'], 2)
+        self.assertEqual(calls['query_latency']['count'], 2)
+        self.assertEqual(calls['candidates_returned'], 2 + 7)
+        self.assertGreaterEqual(calls['candidates_generated'], 2 + 7)
+        self.assertGreater(calls['nodes_visited'], 0)
+
+    def test_nodes_visited_match_between_engines(self):
+        """The letter-per-node engines visit the same nodes for a full search.
+        """
+        array_alg = array_auto.ArrayAutocompleteProvider()
+        array_alg.train(self.passage)
+        visits = []
+        for alg in [self.alg, array_alg]:
+            events = []
+            alg.instrument(callback=events.append)
+            alg.getWords('th')
+            visits.append(events[0]['nodes_visited'])
+        self.assertEqual(visits[0], visits[1])
+
+    def test_top_k_visits_fewer_nodes(self):
+        """The top-k search visits fewer nodes than the full search.
+        """
+        events = []
+        self.alg.instrument(callback=events.append)
+        self.alg.getWords('t')
+        self.alg.getWords('t', k=1)
+        self.assertLess(events[1]['nodes_visited'],
+                        events[0]['nodes_visited'])
+
+    def test_cache_hits(self):
+        """Queries answered from the cache are counted as cache hits.
+        """
+        alg = auto.AutocompleteProvider(cache_size=4)
+        alg.train(self.passage)
+        events = []
+        alg.instrument(callback=events.append)
+        alg.getWords('th')
+        alg.getWords('th')
+        self.assertEqual([event['cache_hit'] for event in events],
+                         [False, True])
+        self.assertEqual(events[1]['nodes_visited'], 0)
+        self.assertEqual(alg.stats()['calls']['cache_hits'], 1)
+
+    def test_training_counters(self):
+        """Training records calls, distinct words and tokens.
+        """
+        self.alg.instrument()
+        self.alg.train('a b a')
+        self.alg.train_counts({'c': 4})
+        calls = self.alg.stats()['calls']
+        self.assertEqual(calls['train_calls'], 2)
+        self.assertEqual(calls['words_trained'], 3)
+        self.assertEqual(calls['tokens_trained'], 7)
+        self.assertGreater(calls['train_tokens_per_second'], 0)
+
+    def test_callback(self):
+        """The callback receives an event for every call.
+        """
+        events = []
+        self.alg.instrument(callback=events.append)
+        self.alg.train('zebra')
+        self.alg.getWords('Zeb', k=3)
+        self.assertEqual([event['op'] for event in events],
+                         ['train', 'getWords'])
+        self.assertEqual(events[1]['fragment'], 'zeb')
+        self.assertEqual(events[1]['k'], 3)
+        self.assertEqual(events[1]['candidates_returned'], 1)
+
+    def test_profile(self):
+        """With profile, calls are run under cProfile.
+        """
+        instrumented = self.alg.instrument(profile=True)
+        self.alg.getWords('th', k=3)
+        functions = [function[2] for function
+                     in instrumented.profile_stats().stats]
+        self.assertIn('get_top_word_counts', functions)
+
+    def test_stop_instrumenting(self):
+        """Instrumentation can be switched off again.
+        """
+        self.alg.instrument()
+        self.alg.stop_instrumenting()
+        self.alg.getWords('th')
+        self.assertIsNone(self.alg.stats()['calls'])
+
+    def test_thread_safe(self):
+        """Instrumented thread-safe providers guard their counters.
+        """
+        alg = auto.AutocompleteProvider(thread_safe=True)
+        instrumented = alg.instrument()
+        alg.train(self.passage)
+        alg.getWords('th')
+        self.assertIsNotNone(instrumented.mutex)
+        self.assertEqual(alg.stats()['calls']['queries'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
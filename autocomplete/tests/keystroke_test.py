@@ -0,0 +1,120 @@
+"""Contains unit tests for the keystroke module and
+AutocompleteProvider.session.
+"""
+
+import random
+import unittest
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import frozen_autocomplete_provider as frozen
+from autocomplete import overlay_autocomplete_provider as overlay
+from autocomplete import radix_autocomplete_provider as radix
+from autocomplete.tests.helpers import pairs
+
+
+class TestKeystrokeSession(unittest.TestCase):
+    """Tests the KeystrokeSession class.
+    """
+
+    def setUp(self):
+        self.passage = 'The third thing that I need to tell you is that this \
+        thing does not think thoroughly.'
+        self.alg = auto.AutocompleteProvider()
+        self.alg.train(self.passage)
+
+    def assertSuggests(self, session, provider=None):
+        """Asserts that the session suggests what getWords returns.
+        """
+        provider = provider or session.provider
+        for k in [None, 1, 2, 10]:
+            self.assertEqual(pairs(session.suggestions(k)),
+                             pairs(provider.getWords(session.fragment, k)))
+
+    def test_session_example(self):
+        """Each keystroke narrows the suggestions.
+        """
+        session = self.alg.session()
+        session.push('t')
+        self.assertSuggests(session)
+        session.push('h')
+        session.push('i')
+        self.assertEqual(pairs(session.suggestions(2)),
+                         [('thing', 2), ('think', 1)])
+        session.push('N')
+        self.assertEqual(session.fragment, 'thin')
+        self.assertEqual(pairs(session.suggestions()),
+                         [('thing', 2), ('think', 1)])
+
+    def test_session_pop(self):
+        """Backspace removes the last character, punctuation included.
+        """
+        session = self.alg.session('thx')
+        self.assertEqual(session.suggestions(), [])
+        session.pop()
+        self.assertEqual(pairs(session.suggestions(1)), [('that', 2)])
+        session.push("'")
+        self.assertEqual((session.fragment, len(session)), ('th', 3))
+        session.pop()
+        session.pop()
+        self.assertEqual(session.fragment, 't')
+        self.assertSuggests(session)
+        session.clear()
+        self.assertEqual(session.suggestions(), [])
+        self.assertSuggests(session)
+        self.assertRaises(IndexError, session.pop)
+        session.push('to')
+        self.assertEqual(pairs(session.suggestions()), [('to', 1)])
+
+    def test_session_training(self):
+        """Training between keystrokes is seen by the next suggestions.
+        """
+        session = self.alg.session('thr')
+        self.assertSuggests(session)
+        self.alg.train('three threads throw')
+        self.assertSuggests(session)
+        session.push('e')
+        self.assertSuggests(session)
+        self.alg.prune(max_words=3)
+        self.assertSuggests(session)
+
+    def test_session_engines(self):
+        """Every engine suggests what getWords returns while typing at
+        random.
+        """
+        random.seed(3)
+        words = [''.join(random.choice('abc') for _ in
+                         range(random.randint(1, 6))) for _ in range(300)]
+        providers = []
+        for provider_class in [auto.AutocompleteProvider,
+                               array_auto.ArrayAutocompleteProvider,
+                               radix.RadixAutocompleteProvider]:
+            providers.append(provider_class(thread_safe=True))
+            providers[-1].train(' '.join(words))
+        providers.append(
+            frozen.FrozenAutocompleteProvider.from_provider(providers[0]))
+        providers.append(overlay.OverlayAutocompleteProvider(providers[3]))
+        providers[-1].train('abd dca')
+        for provider in providers:
+            session = provider.session()
+            for step in range(200):
+                if len(session) and random.random() < 0.3:
+                    session.pop()
+                else:
+                    session.push(random.choice('abcd'))
+                if step == 100 and not isinstance(
+                        provider, frozen.FrozenAutocompleteProvider):
+                    provider.train('abcabc ab bca')  # splits radix segments
+                self.assertSuggests(session)
+
+    def test_session_instrumented(self):
+        """Instrumented providers report every suggestion.
+        """
+        reports = []
+        self.alg.instrument(reports.append)
+        session = self.alg.session('th')
+        session.suggestions()
+        self.assertEqual(len(reports), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
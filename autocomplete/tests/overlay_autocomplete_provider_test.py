@@ -0,0 +1,141 @@
+"""Contains unit tests for the OverlayAutocompleteProvider class.
+"""
+
+import collections
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import frozen_autocomplete_provider as frozen
+from autocomplete import fuzzy
+from autocomplete import overlay_autocomplete_provider as overlay
+from autocomplete import radix_autocomplete_provider as radix
+from autocomplete import snapshot
+from autocomplete.tests.helpers import pairs, random_passage
+
+
+class TestOverlayAutocompleteProvider(unittest.TestCase):
+    """Tests the OverlayAutocompleteProvider class.
+    """
+
+    def setUp(self):
+        self.base = auto.AutocompleteProvider()
+        self.base.train('The third thing that I need to tell you is that this \
+        thing does not think thoroughly.')
+
+    def test_getWords_example(self):
+        """The user's words are added to the shared words.
+        """
+        alg = overlay.OverlayAutocompleteProvider(self.base)
+        alg.train('thimble thimble thimble think')
+        self.assertEqual(pairs(alg.getWords('thi', 3)),
+                         [('thimble', 3), ('thing', 2), ('think', 2)])
+        self.assertEqual(pairs(self.base.getWords('thi', 1)), [('thing', 2)])
+        self.assertEqual(alg.node_count(), 9)  # only thimble and think
+        self.assertEqual(sorted(alg.iter_own_words()),
+                         [('thimble', 3), ('think', 1)])
+
+    def test_weights(self):
+        """Weights scale the confidences of each side.
+        """
+        alg = overlay.OverlayAutocompleteProvider(self.base, weight=5,
+                                                  base_weight=2)
+        alg.train('think')
+        self.assertEqual(pairs(alg.getWords('thi')),
+                         [('think', 7), ('thing', 4), ('third', 2),
+                          ('this', 2)])
+        self.assertRaises(ValueError, overlay.OverlayAutocompleteProvider,
+                          self.base, weight=0)
+
+    def test_matches_flattened(self):
+        """Every base engine answers like a provider trained on the weighted
+        sum of both sides.
+        """
+        rng = random.Random(2)
+        shared = random_passage(rng, 400)
+        personal = random_passage(rng, 60, 'abcde')
+        dict_base = auto.AutocompleteProvider()
+        dict_base.train(shared)
+        bases = [dict_base,
+                 frozen.FrozenAutocompleteProvider.from_provider(dict_base)]
+        for provider_class in [array_auto.ArrayAutocompleteProvider,
+                               radix.RadixAutocompleteProvider]:
+            bases.append(provider_class())
+            bases[-1].train(shared)
+        user = auto.AutocompleteProvider()
+        user.train(personal)
+        counts = collections.Counter()
+        for word, confidence in dict_base.iter_words():
+            counts[word] += 2 * confidence
+        for word, confidence in user.iter_words():
+            counts[word] += 3 * confidence
+        flattened = auto.AutocompleteProvider()
+        flattened.train_counts(counts)
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'model.snapshot')
+            dict_base.save(path)
+            mapped = snapshot.MappedAutocompleteProvider.open(path)
+            bases.append(mapped)
+            for base in bases:
+                alg = overlay.OverlayAutocompleteProvider(base, weight=3,
+                                                          base_weight=2)
+                alg.train(personal)
+                self.assertEqual(sorted(alg.iter_words()),
+                                 sorted(flattened.iter_words()))
+                for fragment in ['a', 'e', 'ab', 'dea', 'bcd', 'x']:
+                    for k in [1, 3, 10]:
+                        self.assertEqual(
+                            pairs(alg.getWords(fragment, k)),
+                            pairs(flattened.getWords(fragment, k)))
+                    self.assertEqual(
+                        sorted(pairs(alg.getWords(fragment))),
+                        sorted(pairs(flattened.getWords(fragment))))
+                self.assertEqual(
+                    fuzzy.top_word_costs(alg, 'abx', 5, max_nodes=10 ** 6),
+                    fuzzy.top_word_costs(flattened, 'abx', 5,
+                                         max_nodes=10 ** 6))
+            mapped.close()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_decay_only_own(self):
+        """Decaying and pruning change only the user's counts.
+        """
+        alg = overlay.OverlayAutocompleteProvider(self.base)
+        alg.train('thimble thimble think')
+        self.assertEqual(alg.decay(0.5), 1)
+        self.assertEqual(pairs(alg.getWords('thi', 2)),
+                         [('thing', 2), ('thimble', 1)])
+        self.assertEqual(pairs(self.base.getWords('thi', 1)), [('thing', 2)])
+
+    def test_batch_and_session(self):
+        """Batches and keystroke sessions walk both memories.
+        """
+        alg = overlay.OverlayAutocompleteProvider(self.base, cache_size=10)
+        alg.train('thimble thimble thimble')
+        fragments = ['t', 'th', 'thi', 'thim', 'x']
+        self.assertEqual(
+            [pairs(result) for result in alg.getWordsBatch(fragments, 2)],
+            [pairs(alg.getWords(fragment, 2)) for fragment in fragments])
+        session = alg.session('thim')
+        self.assertEqual(pairs(session.suggestions()), [('thimble', 3)])
+
+    def test_empty_fragment(self):
+        """Fragments that normalize to nothing have no candidates, as on the
+        base provider.
+        """
+        alg = overlay.OverlayAutocompleteProvider(self.base)
+        alg.train('zebra thy')
+        for fragment in ['', '!!']:
+            for k in [None, 2]:
+                self.assertEqual(alg.getWords(fragment, k), [])
+                self.assertEqual(self.base.getWords(fragment, k), [])
+        self.assertEqual(alg.getWordsBatch(['', 'ze'], 2)[0], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Contains unit tests for the parallel module.
+"""
+
+import collections
+import os
+import shutil
+import tempfile
+import unittest
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import parallel
+
+
+class TestCountWords(unittest.TestCase):
+    """Tests the word counting workers.
+    """
+
+    def test_count_words(self):
+        """Words of all passages are counted after preprocessing.
+        """
+        output = parallel.count_words(['The thing', 'the THING. thin'])
+        self.assertEqual(output, collections.Counter({'the': 2, 'thing': 2,
+                                                      'thin': 1}))
+
+    def test_iter_batches(self):
+        """Items are split into consecutive batches.
+        """
+        output = list(parallel.iter_batches(range(5), 2))
+        self.assertEqual(output, [[0, 1], [2, 3], [4]])
+
+
+class TestTrainParallel(unittest.TestCase):
+    """Tests training with a process pool.
+    """
+
+    def setUp(self):
+        self.passages = ['The third thing that I need to tell you', 'is that',
+                         'this thing does not think thoroughly.'] * 5
+
+    def test_train_parallel(self):
+        """Training in worker processes gives the same memory as training in
+        the calling process.
+        """
+        correct_answer = auto.AutocompleteProvider()
+        correct_answer.train_many(self.passages)
+        alg = auto.AutocompleteProvider()
+        alg.train_parallel(self.passages, processes=2, chunk_size=4)
+        self.assertEqual(alg.memory, correct_answer.memory)
+
+    def test_train_files_parallel(self):
+        """Each file is counted by a worker process.
+        """
+        directory = tempfile.mkdtemp()
+        try:
+            paths = []
+            for i, passage in enumerate(self.passages[:3]):
+                paths.append(os.path.join(directory, '%d.txt' % i))
+                with open(paths[-1], 'w') as passage_file:
+                    passage_file.write(passage)
+            alg = array_auto.ArrayAutocompleteProvider()
+            parallel.train_files_parallel(alg, paths, processes=2,
+                                          chunk_size=7)
+        finally:
+            shutil.rmtree(directory)
+        correct_answer = auto.AutocompleteProvider()
+        correct_answer.train_many(self.passages[:3])
+        self.assertEqual(sorted(alg.iter_words()),
+                         sorted(correct_answer.iter_words()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+"""Contains unit tests for the precomputed module and the precomputed top-k
+lists of AutocompleteProvider.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import frozen_autocomplete_provider as frozen
+from autocomplete import precomputed
+from autocomplete import radix_autocomplete_provider as radix
+from autocomplete import snapshot
+from autocomplete.tests.helpers import pairs, random_passage
+
+
+class TestTopKLists(unittest.TestCase):
+    """Tests the TopKLists class.
+    """
+
+    def setUp(self):
+        self.lists = precomputed.TopKLists(2)
+        for word, confidence in [('then', 1), ('the', 3), ('that', 2),
+                                 ('this', 2)]:
+            self.lists.update(word, confidence)
+
+    def test_update(self):
+        """Each prefix keeps its k most confident words, ties alphabetically.
+        """
+        self.assertEqual(self.lists.get('th', 2), [('the', 3), ('that', 2)])
+        self.assertEqual(self.lists.get('the', 2), [('the', 3), ('then', 1)])
+        self.lists.update('then', 4)
+        self.assertEqual(self.lists.get('t', 2), [('then', 4), ('the', 3)])
+        self.assertEqual(self.lists.get('the', 1), [('then', 4)])
+        self.assertEqual(self.lists.get('x', 2), [])
+
+    def test_get_out_of_range(self):
+        """Fragments deeper than max_depth and k above the list length miss.
+        """
+        self.assertEqual(self.lists.get('t', 3), None)
+        self.assertEqual(self.lists.get('', 1), None)
+        self.assertEqual(self.lists.get('th', 0), [])
+        self.assertEqual(self.lists.get('th', -1), [])
+        lists = precomputed.TopKLists(2, max_depth=2)
+        lists.rebuild([('the', 3), ('this', 1)])
+        self.assertEqual(sorted(lists.lists), ['t', 'th'])
+        self.assertEqual(lists.get('thi', 1), None)
+        self.assertEqual(lists.get('th', 1), [('the', 3)])
+        self.assertRaises(ValueError, precomputed.TopKLists, 0)
+
+    def test_stats(self):
+        """Stats count the lists, their entries and their bytes.
+        """
+        stats = self.lists.stats()
+        self.assertEqual((stats['lists'], stats['entries']), (8, 11))
+        self.assertTrue(stats['bytes'] > 0)
+
+
+class TestPrecomputedProvider(unittest.TestCase):
+    """Tests AutocompleteProvider with precomputed_k.
+    """
+
+    def assertMatches(self, provider, plain, fragments, ks=(1, 2, 3)):
+        """Asserts that provider answers like plain for every fragment.
+        """
+        for fragment in fragments:
+            for k in ks:
+                self.assertEqual(pairs(provider.getWords(fragment, k)),
+                                 pairs(plain.getWords(fragment, k)))
+
+    def test_training(self):
+        """Lists stay exact while training, merging, decaying and pruning.
+        """
+        rng = random.Random(11)
+        fragments = ['a', 'b', 'ab', 'abc', 'dd', 'cab', 'x', 'abcda']
+        for provider_class in [auto.AutocompleteProvider,
+                               array_auto.ArrayAutocompleteProvider,
+                               radix.RadixAutocompleteProvider]:
+            alg = provider_class(precomputed_k=3)
+            plain = provider_class()
+            for _ in range(5):
+                passage = random_passage(rng, 50)
+                alg.train(passage)
+                plain.train(passage)
+                self.assertMatches(alg, plain, fragments,
+                                   (-1, 0, 1, 3, 4, None))
+            other = auto.AutocompleteProvider()
+            other.train(random_passage(rng, 50))
+            alg.merge(other)
+            plain.merge(other)
+            self.assertMatches(alg, plain, fragments)
+            alg.decay(0.5)
+            plain.decay(0.5)
+            self.assertMatches(alg, plain, fragments)
+            alg.prune(max_words=10)
+            plain.prune(max_words=10)
+            self.assertMatches(alg, plain, fragments)
+
+    def test_depth(self):
+        """Only prefixes up to precomputed_depth get lists.
+        """
+        alg = auto.AutocompleteProvider(precomputed_k=2, precomputed_depth=1,
+                                        cache_size=10)
+        alg.train('the that this then')
+        self.assertEqual(sorted(alg.top_lists.lists), ['t'])
+        self.assertEqual(pairs(alg.getWords('th', 2)),
+                         [('that', 1), ('the', 1)])
+        self.assertEqual(pairs(alg.getWords('t', 2)),
+                         [('that', 1), ('the', 1)])
+        self.assertEqual(alg.stats()['precomputed']['lists'], 1)
+        self.assertEqual(auto.AutocompleteProvider().stats()['precomputed'],
+                         None)
+
+    def test_read_only_engines(self):
+        """Frozen automata and snapshots build their lists when opened.
+        """
+        rng = random.Random(4)
+        plain = auto.AutocompleteProvider()
+        plain.train(random_passage(rng, 200))
+        fragments = ['a', 'bc', 'dab', 'x']
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'model')
+            automaton = frozen.FrozenAutocompleteProvider.from_provider(
+                plain, precomputed_k=3)
+            self.assertMatches(automaton, plain, fragments)
+            automaton.save(path)
+            loaded = frozen.FrozenAutocompleteProvider.load(path,
+                                                            precomputed_k=3)
+            self.assertEqual(len(loaded.top_lists), len(automaton.top_lists))
+            self.assertMatches(loaded, plain, fragments)
+            plain.save(path)
+            mapped = snapshot.MappedAutocompleteProvider.open(
+                path, precomputed_k=3)
+            try:
+                self.assertMatches(mapped, plain, fragments)
+            finally:
+                mapped.close()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_batch_and_session(self):
+        """Batches and keystroke sessions use the lists too.
+        """
+        rng = random.Random(9)
+        passage = random_passage(rng, 200)
+        alg = auto.AutocompleteProvider(precomputed_k=2, precomputed_depth=2)
+        alg.train(passage)
+        plain = auto.AutocompleteProvider()
+        plain.train(passage)
+        fragments = ['a', 'ab', 'abc', 'abcd', 'b', 'x']
+        self.assertEqual(
+            [pairs(result) for result in alg.getWordsBatch(fragments, 2)],
+            [pairs(plain.getWords(fragment, 2)) for fragment in fragments])
+        session = alg.session()
+        for letter in 'abcd':
+            session.push(letter)
+            self.assertEqual(pairs(session.suggestions(2)),
+                             pairs(plain.getWords(session.fragment, 2)))
+        self.assertTrue(alg.top_lists.stats()['hits'] > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
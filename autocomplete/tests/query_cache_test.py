@@ -0,0 +1,103 @@
+"""Contains unit tests for the QueryCache class and the getWords cache of the
+AutocompleteProvider class.
+"""
+
+import unittest
+from autocomplete import candidate as cand
+from autocomplete import autocomplete_provider as auto
+from autocomplete import query_cache
+
+
+class TestQueryCache(unittest.TestCase):
+    """Tests the QueryCache class.
+    """
+
+    def setUp(self):
+        self.cache = query_cache.QueryCache(2)
+
+    def test_get_miss_and_hit(self):
+        """Stored results are returned and counted as hits.
+        """
+        self.assertEqual(self.cache.get('ab', None), None)
+        self.cache.put('ab', None, ['result'])
+        self.assertEqual(self.cache.get('ab', None), ['result'])
+        self.assertEqual(self.cache.get('ab', 3), None)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_evicts_least_recently_used(self):
+        """The least recently used result is evicted when full.
+        """
+        self.cache.put('a', None, ['a'])
+        self.cache.put('b', None, ['b'])
+        self.cache.get('a', None)
+        self.cache.put('c', None, ['c'])
+        self.assertEqual(self.cache.get('b', None), None)
+        self.assertEqual(self.cache.get('a', None), ['a'])
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(sorted(self.cache.keys_by_fragment), ['a', 'c'])
+
+    def test_invalidate_prefixes_only(self):
+        """Only results of fragments that are prefixes of the word are
+        dropped.
+        """
+        cache = query_cache.QueryCache(10)
+        for fragment in ['t', 'th', 'the', 'thy', 'a']:
+            cache.put(fragment, None, [fragment])
+        cache.put('th', 1, ['th'])
+        cache.invalidate('then')
+        self.assertEqual(sorted(cache.entries), [('a', None), ('thy', None)])
+        self.assertEqual(cache.invalidations, 4)
+
+    def test_stats(self):
+        """The counters are reported together.
+        """
+        self.cache.put('a', None, ['a'])
+        self.cache.clear()
+        self.assertEqual(self.cache.stats(), {'hits': 0, 'misses': 0,
+                                              'evictions': 0,
+                                              'invalidations': 1,
+                                              'size': 0, 'max_size': 2})
+
+
+class TestAutocompleteProviderCache(unittest.TestCase):
+    """Tests getWords with the cache enabled.
+    """
+
+    def setUp(self):
+        self.alg = auto.AutocompleteProvider(cache_size=10)
+        self.alg.train('the thing that this')
+
+    def test_cached_results(self):
+        """Repeated queries hit the cache and return equal results.
+        """
+        first = self.alg.getWords('Th', k=2)
+        second = self.alg.getWords('th!', k=2)
+        self.assertEqual(first, second)
+        self.assertFalse(first is second)
+        self.assertEqual(self.alg.cache_stats()['hits'], 1)
+
+    def test_train_invalidates(self):
+        """Training updates the results of affected fragments and keeps the
+        others cached.
+        """
+        self.alg.getWords('th')
+        self.alg.getWords('thi')
+        self.alg.getWords('tha')
+        self.alg.train('thin thin')
+        self.assertEqual(self.alg.getWords('thi')[0],
+                         cand.Candidate('thin', 2))
+        self.assertEqual(self.alg.getWords('th')[0], cand.Candidate('thin', 2))
+        self.assertEqual(self.alg.getWords('tha'), [cand.Candidate('that', 1)])
+        self.assertEqual(self.alg.cache_stats()['hits'], 1)
+
+    def test_cache_disabled(self):
+        """No cache is kept by default.
+        """
+        alg = auto.AutocompleteProvider()
+        self.assertEqual(alg.cache, None)
+        self.assertEqual(alg.cache_stats(), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
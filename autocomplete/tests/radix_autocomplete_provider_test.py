@@ -0,0 +1,144 @@
+"""Contains unit tests for the RadixAutocompleteProvider class.
+"""
+
+import unittest
+from autocomplete import candidate as cand
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import radix_autocomplete_provider as radix
+from autocomplete.tests.helpers import pairs, ranked
+
+
+class TestMemorizeRadix(unittest.TestCase):
+    """Tests the memorize_radix function.
+    """
+
+    def test_memorize_radix_empty(self):
+        """A new word becomes a single node.
+        """
+        root = radix.memorize_radix(radix.RadixNode(), 'abc')
+        correct_answer = radix.RadixNode('', {'a':
+                              radix.RadixNode('abc', {}, 1)}, 0)
+        self.assertEqual(root, correct_answer)
+
+    def test_memorize_radix_split(self):
+        """A word that leaves a segment part way splits the edge.
+        """
+        root = radix.memorize_radix(radix.RadixNode(), 'abc')
+        root = radix.memorize_radix(root, 'abd')
+        correct_answer = radix.RadixNode('', {'a':
+                              radix.RadixNode('ab', {
+                                  'c': radix.RadixNode('c', {}, 1),
+                                  'd': radix.RadixNode('d', {}, 1)}, 0)}, 0)
+        self.assertEqual(root, correct_answer)
+
+    def test_memorize_radix_prefix(self):
+        """A word that ends inside a segment splits the edge at its end.
+        """
+        root = radix.memorize_radix(radix.RadixNode(), 'abc')
+        root = radix.memorize_radix(root, 'ab')
+        correct_answer = radix.RadixNode('', {'a':
+                              radix.RadixNode('ab', {
+                                  'c': radix.RadixNode('c', {}, 1)}, 1)}, 0)
+        self.assertEqual(root, correct_answer)
+
+    def test_memorize_radix_extension(self):
+        """A word that extends an existing word adds a child node.
+        """
+        root = radix.memorize_radix(radix.RadixNode(), 'ab')
+        root = radix.memorize_radix(root, 'abcd')
+        root = radix.memorize_radix(root, 'abcd')
+        correct_answer = radix.RadixNode('', {'a':
+                              radix.RadixNode('ab', {
+                                  'c': radix.RadixNode('cd', {}, 2)}, 1)}, 0)
+        self.assertEqual(root, correct_answer)
+        self.assertEqual(root.max_confidence, 2)
+
+
+class TestGetBottomRadixNode(unittest.TestCase):
+    """Tests the get_bottom_radix_node function.
+    """
+
+    def setUp(self):
+        self.root = radix.RadixNode('', {'a':
+                        radix.RadixNode('abc', {
+                            'd': radix.RadixNode('de', {}, 1)}, 2)}, 0)
+
+    def test_get_bottom_radix_node_inside_segment(self):
+        """A fragment ending inside a segment returns the spelled word.
+        """
+        node, word = radix.get_bottom_radix_node('ab', self.root)
+        self.assertEqual(word, 'abc')
+        self.assertEqual(node.confidence, 2)
+
+    def test_get_bottom_radix_node_end_of_segment(self):
+        """A fragment ending on a node returns that node.
+        """
+        node, word = radix.get_bottom_radix_node('abcde', self.root)
+        self.assertEqual(word, 'abcde')
+        self.assertEqual(node.confidence, 1)
+
+    def test_get_bottom_radix_node_mismatch(self):
+        """A fragment that leaves the trie returns no node.
+        """
+        self.assertEqual(radix.get_bottom_radix_node('abd', self.root),
+                         (None, None))
+        self.assertEqual(radix.get_bottom_radix_node('abcdef', self.root),
+                         (None, None))
+        self.assertEqual(radix.get_bottom_radix_node('b', self.root),
+                         (None, None))
+
+
+class TestRadixAutocompleteProvider(unittest.TestCase):
+    """Tests the RadixAutocompleteProvider class.
+    """
+
+    def setUp(self):
+        self.passage = 'The third thing that I need to tell you is that this \
+        thing does not think thoroughly. AutocompleteProvider autocomplete'
+        self.alg = radix.RadixAutocompleteProvider()
+        self.alg.train(self.passage)
+
+    def test_node_count_smaller(self):
+        """The radix trie needs fewer nodes than one node per letter.
+        """
+        array_alg = array_auto.ArrayAutocompleteProvider()
+        array_alg.train(self.passage)
+        self.assertLess(self.alg.node_count(), array_alg.node_count())
+
+    def test_getWords_example(self):
+        """Candidates are ordered by confidence.
+        """
+        output = self.alg.getWords('thi')
+        self.assertEqual(output[0], cand.Candidate('thing', 2))
+        self.assertEqual(ranked(output), [('thing', 2), ('think', 1),
+                                          ('third', 1), ('this', 1)])
+
+    def test_getWords_inside_segment(self):
+        """Fragments ending inside a segment are completed.
+        """
+        self.assertEqual(ranked(self.alg.getWords('autoc')),
+                         [('autocomplete', 1), ('autocompleteprovider', 1)])
+        self.assertEqual(self.alg.getWords('autox'), [])
+
+    def test_getWords_top_k(self):
+        """Top-k results are the head of the alphabetically ranked list.
+        """
+        full = ranked(self.alg.getWords('t'))
+        for k in range(len(full) + 1):
+            self.assertEqual(ranked(self.alg.getWords('t', k=k)), full[:k])
+            self.assertEqual(ranked(self.alg.getWords('t', k=k)),
+                             pairs(self.alg.getWords('t', k=k)))
+
+    def test_getWords_matches_dictionary_engine(self):
+        """Both engines return the same candidates after the same training.
+        """
+        dict_alg = auto.AutocompleteProvider()
+        dict_alg.train(self.passage)
+        for fragment in ['t', 'th', 'thi', 'Nee', 'does', 'a', 'z']:
+            self.assertEqual(ranked(self.alg.getWords(fragment)),
+                             ranked(dict_alg.getWords(fragment)))
+
+
+if __name__ == '__main__':
+    unittest.main()
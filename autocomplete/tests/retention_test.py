@@ -0,0 +1,95 @@
+"""Contains unit tests for the RetentionPolicy class.
+"""
+
+import unittest
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import radix_autocomplete_provider as radix
+from autocomplete import retention
+
+
+class FakeClock:
+    """Clock whose time is set by the test.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRetentionPolicy(unittest.TestCase):
+    """Tests decay and budgets applied automatically while training.
+    """
+
+    def test_decay_tokens(self):
+        """Earlier training is halved once per decay_tokens trained words,
+        while the new batch is memorized undecayed.
+        """
+        policy = retention.RetentionPolicy(0.5, decay_tokens=4)
+        alg = auto.AutocompleteProvider(retention=policy)
+        alg.train('a a a a a a a a')
+        self.assertEqual(sorted(alg.iter_words()), [('a', 8)])
+        alg.train('a b b b b b')
+        self.assertEqual(sorted(alg.iter_words()), [('a', 5), ('b', 5)])
+        self.assertEqual(policy.decays, 3)
+        self.assertEqual(policy.tokens_since_decay, 2)
+
+    def test_decay_seconds(self):
+        """Confidences are decayed once per elapsed decay_seconds, noticed on
+        the next training.
+        """
+        clock = FakeClock()
+        policy = retention.RetentionPolicy(0.5, decay_seconds=60, clock=clock)
+        alg = auto.AutocompleteProvider(retention=policy)
+        alg.train_counts({'old': 8, 'once': 1})
+        clock.now = 150
+        alg.train('new')
+        self.assertEqual(sorted(alg.iter_words()), [('new', 1), ('old', 2)])
+        self.assertEqual(policy.last_decay, 120)
+        self.assertEqual(alg.stats()['retention'],
+                         {'decays': 2, 'words_forgotten': 1})
+
+    def test_max_words(self):
+        """The least confident words are pruned to below max_words.
+        """
+        policy = retention.RetentionPolicy(max_words=10, headroom=0.5,
+                                           check_tokens=1)
+        alg = auto.AutocompleteProvider(retention=policy)
+        alg.train_counts(dict(('w%02d' % i, i + 1) for i in range(12)))
+        self.assertEqual(sorted(alg.iter_words()),
+                         [('w%02d' % i, i + 1) for i in range(7, 12)])
+
+    def test_max_nodes(self):
+        """Memory is pruned until it fits max_nodes, for every engine.
+        """
+        words = dict(('%s%s' % (a, b), 1 + i) for i, (a, b) in enumerate(
+            (a, b) for a in 'abcdefgh' for b in 'abcdefgh'))
+        for provider_class in [auto.AutocompleteProvider,
+                               array_auto.ArrayAutocompleteProvider,
+                               radix.RadixAutocompleteProvider]:
+            policy = retention.RetentionPolicy(max_nodes=30, check_tokens=1)
+            alg = provider_class(retention=policy)
+            alg.train_counts(words)
+            self.assertLessEqual(alg.node_count(), 30)
+            self.assertEqual(alg.getWords('h', k=1)[0].getWord(), 'hh')
+
+    def test_budget_checked_after_merge(self):
+        """Merging checks the budget regardless of check_tokens.
+        """
+        policy = retention.RetentionPolicy(max_words=2, headroom=1.0)
+        alg = auto.AutocompleteProvider(retention=policy)
+        other = auto.AutocompleteProvider()
+        other.train('a a b c c c')
+        alg.merge(other)
+        self.assertEqual(sorted(alg.iter_words()), [('a', 2), ('c', 3)])
+
+    def test_invalid_factor(self):
+        """Decay factors outside 0 to 1 are rejected.
+        """
+        self.assertRaises(ValueError, retention.RetentionPolicy, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""Contains unit tests for the ReadWriteLock class and a stress test of
+AutocompleteProvider under concurrent queries and training.
+"""
+
+import threading
+import time
+import unittest
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import rwlock
+
+
+class TestReadWriteLock(unittest.TestCase):
+    """Tests the ReadWriteLock class.
+    """
+
+    def setUp(self):
+        self.lock = rwlock.ReadWriteLock()
+
+    def test_readers_share(self):
+        """Several readers hold the lock at the same time.
+        """
+        self.lock.acquire_read()
+        acquired = []
+        reader = threading.Thread(
+            target=lambda: (self.lock.acquire_read(), acquired.append(True),
+                            self.lock.release_read()))
+        reader.start()
+        reader.join(5)
+        self.lock.release_read()
+        self.assertEqual(acquired, [True])
+
+    def test_writer_excludes_readers(self):
+        """A reader waits until the writer releases the lock.
+        """
+        events = []
+
+        def read():
+            with self.lock.reading():
+                events.append('read')
+
+        with self.lock.writing():
+            reader = threading.Thread(target=read)
+            reader.start()
+            time.sleep(0.05)
+            events.append('write')
+        reader.join(5)
+        self.assertEqual(events, ['write', 'read'])
+
+    def test_waiting_writer_blocks_new_readers(self):
+        """A waiting writer gets the lock before readers that arrive after it.
+        """
+        events = []
+
+        def write():
+            with self.lock.writing():
+                events.append('write')
+
+        def read():
+            with self.lock.reading():
+                events.append('read')
+
+        self.lock.acquire_read()
+        writer = threading.Thread(target=write)
+        writer.start()
+        time.sleep(0.05)
+        reader = threading.Thread(target=read)
+        reader.start()
+        time.sleep(0.05)
+        self.lock.release_read()
+        writer.join(5)
+        reader.join(5)
+        self.assertEqual(events, ['write', 'read'])
+
+
+class TestConcurrentTraining(unittest.TestCase):
+    """Stress tests providers created with thread_safe while reader threads
+    query and a writer thread trains.
+    """
+
+    def run_stress(self, provider):
+        """Runs four reader threads against one writer thread and checks that
+        no reader failed and every training passage was memorized.
+        """
+        passages = ['the%d then%d there%d them%d' % (i, i, i, i)
+                    for i in range(300)]
+        errors = []
+        done = threading.Event()
+
+        def read():
+            try:
+                while not done.is_set():
+                    for fragment in ['t', 'th', 'the', 'then1']:
+                        provider.getWords(fragment)
+                        provider.getWords(fragment, k=3)
+            except Exception as error:
+                errors.append(error)
+
+        def write():
+            try:
+                for passage in passages:
+                    provider.train(passage)
+            finally:
+                done.set()
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        writer = threading.Thread(target=write)
+        for thread in readers + [writer]:
+            thread.start()
+        for thread in readers + [writer]:
+            thread.join(60)
+        self.assertEqual(errors, [])
+        self.assertEqual(len(provider.getWords('t')), 4 * len(passages))
+        self.assertEqual(len(provider.getWords('then2', k=200)), 111)
+
+    def test_dictionary_engine(self):
+        """The dictionary engine with a cache stays consistent.
+        """
+        self.run_stress(auto.AutocompleteProvider(cache_size=8,
+                                                  thread_safe=True))
+
+    def test_array_engine(self):
+        """The array engine stays consistent.
+        """
+        self.run_stress(array_auto.ArrayAutocompleteProvider(thread_safe=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
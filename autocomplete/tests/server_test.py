@@ -0,0 +1,199 @@
+"""Contains unit tests for the AutocompleteServer class. The server needs
+asyncio, so these tests are skipped before Python 3.7. The server runs on an
+event loop in a background thread and the tests talk to it over sockets.
+"""
+
+import json
+import socket
+import sys
+import threading
+import time
+import unittest
+from autocomplete import autocomplete_provider as auto
+
+if sys.version_info >= (3, 7):
+    import asyncio
+    from autocomplete import server
+    from autocomplete.benchmarks import server_load
+
+TIMEOUT = 10  # seconds to wait for the server before a test fails
+
+
+class CountingProvider(auto.AutocompleteProvider):
+    """AutocompleteProvider that counts its getWords calls and fails those
+    for the fragment in failing.
+    """
+
+    def __init__(self, **options):
+        auto.AutocompleteProvider.__init__(self, **options)
+        self.lookups = 0
+        self.failing = None
+
+    def getWords(self, fragment, k=None):
+        self.lookups += 1
+        if fragment == self.failing:
+            raise RuntimeError('lookup failed')
+        return auto.AutocompleteProvider.getWords(self, fragment, k)
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'the server requires asyncio')
+class TestAutocompleteServer(unittest.TestCase):
+    """Tests the AutocompleteServer class over a local TCP connection.
+    """
+
+    def setUp(self):
+        self.provider = CountingProvider(thread_safe=True)
+        self.provider.train('The third thing that I need to tell you is that '
+                            'this thing does not think thoroughly.')
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        try:
+            if hasattr(self, 'listener'):
+                self.stop_server()
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+
+    def run_async(self, coroutine):
+        """Runs a coroutine on the server loop and returns its result.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(
+            TIMEOUT)
+
+    def start_server(self, **options):
+        """Starts a server on a free port and returns the port.
+        """
+        self.server = server.AutocompleteServer(self.provider, **options)
+        self.listener = self.run_async(self.server.start('127.0.0.1', 0))
+        return self.listener.sockets[0].getsockname()[1]
+
+    def stop_server(self):
+        """Stops listening and closes the server. The listener is closed on
+        the server loop, since asyncio servers are not thread safe.
+        """
+        listener = self.listener
+        del self.listener
+        self.loop.call_soon_threadsafe(listener.close)
+        self.run_async(self.server.close())
+
+    def request(self, port, lines, response_count):
+        """Sends request lines on one connection and returns the decoded
+        responses.
+        """
+        connection = socket.create_connection(('127.0.0.1', port), TIMEOUT)
+        try:
+            connection.sendall(b''.join(line + b'\n' for line in lines))
+            responses = connection.makefile('rb')
+            return [json.loads(responses.readline().decode('utf-8'))
+                    for _ in range(response_count)]
+        finally:
+            connection.close()
+
+    def test_getWords(self):
+        """Queries are answered with [word, confidence] pairs in the order of
+        getWords.
+        """
+        port = self.start_server()
+        output = self.request(port, [b'{"id": 7, "op": "getWords", '
+                                     b'"fragment": "Thi", "k": 2}'], 1)
+        self.assertEqual(output, [{'id': 7, 'words': [['thing', 2],
+                                                      ['think', 1]]}])
+
+    def test_errors(self):
+        """Malformed requests and unknown operations get an error response.
+        """
+        port = self.start_server()
+        output = self.request(port, [b'not json', b'{"id": 1, "op": "delete"}',
+                                     b'{"id": 2, "op": "getWords"}'], 3)
+        self.assertTrue(all('error' in response for response in output))
+        self.assertEqual(sorted(str(response['id']) for response in output),
+                         ['1', '2', 'None'])
+
+    def test_invalid_queries(self):
+        """Invalid fragments and k get an error response without failing the
+        queries batched with them.
+        """
+        port = self.start_server(batch_window=0.05)
+        output = self.request(port, [
+            b'{"id": 1, "op": "getWords", "fragment": "thi", "k": "2"}',
+            b'{"id": 2, "op": "getWords", "fragment": 5}',
+            b'{"id": 3, "op": "getWords", "fragment": "thi", "k": 0}',
+            b'{"id": 4, "op": "getWords", "fragment": "!!", "k": 2}',
+            b'{"id": 5, "op": "getWords", "fragment": "thi", "k": 2}'], 5)
+        responses = dict((response['id'], response) for response in output)
+        self.assertEqual(sorted(responses), [1, 2, 3, 4, 5])
+        for request_id in [1, 2, 3]:
+            self.assertTrue('error' in responses[request_id])
+        self.assertEqual(responses[4]['words'], [])
+        self.assertEqual(responses[5]['words'], [['thing', 2], ['think', 1]])
+
+    def test_failed_lookup_isolated(self):
+        """A lookup that fails only fails the queries for its key.
+        """
+        self.start_server(batch_window=0.05)
+        self.provider.failing = 'thx'
+        futures = [asyncio.run_coroutine_threadsafe(
+            self.server.get_words(fragment, 2), self.loop)
+            for fragment in ['thx', 'thi']]
+        self.assertRaises(RuntimeError, futures[0].result, TIMEOUT)
+        self.assertEqual(futures[1].result(TIMEOUT),
+                         [['thing', 2], ['think', 1]])
+
+    def test_concurrent_queries_coalesced(self):
+        """Concurrent queries for the same normalized fragment share one
+        lookup.
+        """
+        self.start_server(batch_window=0.01)
+        lookups = self.provider.lookups
+        futures = [asyncio.run_coroutine_threadsafe(
+            self.server.get_words(fragment, k), self.loop)
+            for fragment, k in [('thi', 3), ('THI', 3), ('th.i', 3),
+                                ('thi', None)]]
+        output = [future.result(TIMEOUT) for future in futures]
+        self.assertEqual(self.provider.lookups - lookups, 2)
+        self.assertEqual(output[0], output[1])
+        self.assertEqual(output[0], output[2])
+        self.assertEqual(len(output[3]), 4)
+
+    def test_train_batched(self):
+        """Training passages are queued and memorized by the training task.
+        """
+        port = self.start_server(train_interval=0.01)
+        output = self.request(port, [
+            b'{"id": 1, "op": "train", "passage": "zebra zebu"}',
+            b'{"id": 2, "op": "train", "passage": "zebra"}'], 2)
+        self.assertEqual(sorted(response['queued'] for response in output),
+                         [1, 2])
+        deadline = time.time() + 5
+        while self.server.trained_passages < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        output = self.request(port, [b'{"op": "getWords", "fragment": "ze"}'],
+                              1)
+        self.assertEqual(output[0]['words'], [['zebra', 2], ['zebu', 1]])
+
+    def test_close_trains_pending(self):
+        """Passages still queued when the server closes are memorized.
+        """
+        self.start_server(train_interval=60)
+        self.server.train('zebra')
+        self.stop_server()
+        self.assertEqual(self.provider.getWords('zeb')[0].getWord(), 'zebra')
+
+    def test_load_generator(self):
+        """The load generator reports latency percentiles and throughput.
+        """
+        port = self.start_server()
+        output = self.run_async(server_load.run_load(
+            '127.0.0.1', port, connections=2, duration=0.2, k=3, pipeline=2,
+            fragments=['th', 'ne']))
+        self.assertGreater(output['queries'], 0)
+        self.assertGreater(output['qps'], 0)
+        self.assertLessEqual(output['p50_ms'], output['p99_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""Contains unit tests for the snapshot module.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from autocomplete import candidate as cand
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import radix_autocomplete_provider as radix
+from autocomplete import delta
+from autocomplete import snapshot
+from autocomplete import training_log
+
+
+class TestSnapshot(unittest.TestCase):
+    """Tests saving and loading snapshots.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # Cleanups run last in first out, so logs are closed first.
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'model.snapshot')
+        self.passage = 'The third thing that I need to tell you is that this \
+        thing does not think thoroughly.'
+        self.alg = auto.AutocompleteProvider()
+        self.alg.train(self.passage)
+
+    def test_save_load_round_trip(self):
+        """Loading a saved provider gives the same memory.
+        """
+        self.alg.save(self.path)
+        output = auto.AutocompleteProvider.load(self.path)
+        self.assertTrue(isinstance(output, auto.AutocompleteProvider))
+        self.assertEqual(output.memory, self.alg.memory)
+
+    def test_load_other_engine(self):
+        """A snapshot can be loaded into any engine.
+        """
+        self.alg.save(self.path)
+        for provider_class in [array_auto.ArrayAutocompleteProvider,
+                               radix.RadixAutocompleteProvider]:
+            output = provider_class.load(self.path)
+            self.assertTrue(isinstance(output, provider_class))
+            self.assertEqual(sorted(output.iter_words()),
+                             sorted(self.alg.iter_words()))
+
+    def test_save_other_engine(self):
+        """Any engine can be saved.
+        """
+        alg = radix.RadixAutocompleteProvider()
+        alg.train(self.passage)
+        alg.save(self.path)
+        output = snapshot.load(self.path)
+        self.assertEqual(output.memory, self.alg.memory)
+
+    def test_load_mmap(self):
+        """A memory-mapped snapshot serves the same candidates.
+        """
+        self.alg.save(self.path)
+        output = auto.AutocompleteProvider.load(self.path, mmap=True)
+        try:
+            self.assertTrue(isinstance(output,
+                                       snapshot.MappedAutocompleteProvider))
+            self.assertEqual(output.getWords('thi'),
+                             [cand.Candidate('thing', 2),
+                              cand.Candidate('think', 1),
+                              cand.Candidate('third', 1),
+                              cand.Candidate('this', 1)])
+            for fragment in ['t', 'Th', 'nee', 'x', 'thinks']:
+                self.assertEqual(output.getWords(fragment, k=3),
+                                 self.alg.getWords(fragment, k=3))
+            self.assertEqual(output.node_count(), self.alg.node_count())
+        finally:
+            output.close()
+
+    def test_mmap_read_only(self):
+        """A memory-mapped snapshot cannot be trained.
+        """
+        self.alg.save(self.path)
+        output = snapshot.load(self.path, mmap=True)
+        try:
+            self.assertRaises(TypeError, output.train, 'more words')
+        finally:
+            output.close()
+
+    def test_unicode_letters_saved(self):
+        """The normalization mode is stored in the snapshot.
+        """
+        self.assertFalse(snapshot.MappedAutocompleteProvider(
+            self._save_default()).unicode_letters)
+        alg = auto.AutocompleteProvider(unicode_letters=True)
+        alg.save(self.path)
+        self.assertTrue(snapshot.load(self.path).unicode_letters)
+
+    def _save_default(self):
+        """Saves self.alg and returns the snapshot bytes.
+        """
+        self.alg.save(self.path)
+        with open(self.path, 'rb') as snapshot_file:
+            return snapshot_file.read()
+
+    def test_empty_provider(self):
+        """An empty provider round trips.
+        """
+        auto.AutocompleteProvider().save(self.path)
+        output = snapshot.load(self.path)
+        self.assertEqual(output.memory, {})
+        output = snapshot.load(self.path, mmap=True)
+        try:
+            self.assertEqual(output.getWords('a'), [])
+        finally:
+            output.close()
+
+    def test_load_not_logged(self):
+        """Loaded words are neither logged nor kept for deltas, so loading the
+        snapshot again after recovering the log does not count them twice.
+        """
+        self.alg.save(self.path)
+        log_directory = os.path.join(self.directory, 'log')
+        log = training_log.TrainingLog(log_directory)
+        self.addCleanup(log.close)
+        output = snapshot.load(self.path, training_log=log, delta_history=100)
+        self.assertEqual(output.memory, self.alg.memory)
+        self.assertEqual(output.training_log, log)
+        self.assertRaises(ValueError, output.export_delta, 0)
+        output.train('zebra')
+        self.assertEqual(delta.decode(output.export_delta(1))[4],
+                         {'zebra': 1})
+        log.close()
+        log = training_log.TrainingLog(log_directory)
+        self.addCleanup(log.close)
+        recovered = auto.AutocompleteProvider(training_log=log)
+        self.assertEqual(list(recovered.iter_words()), [('zebra', 1)])
+
+    def test_not_a_snapshot(self):
+        """Buffers that are not snapshots are rejected.
+        """
+        self.assertRaises(ValueError, snapshot.MappedAutocompleteProvider,
+                          b'not a snapshot')
+        self.assertRaises(ValueError, snapshot.MappedAutocompleteProvider,
+                          self._save_default()[:-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
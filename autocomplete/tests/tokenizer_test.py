@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Contains unit tests for the tokenizer module.
+"""
+
+import string
+import unittest
+from autocomplete import tokenizer
+
+
+class TestNormalize(unittest.TestCase):
+    """Tests the normalize function.
+    """
+
+    def test_normalize_native_string(self):
+        """Punctuation is removed and letters are lowercased.
+        """
+        output = tokenizer.normalize('Str#ing h1As, 12capitalS!!!')
+        self.assertEqual(output, 'string h1as 12capitals')
+
+    def test_normalize_bytes(self):
+        """Byte strings are normalized into byte strings.
+        """
+        output = tokenizer.normalize(b'D-ef, GHI!')
+        self.assertEqual(output, b'def ghi')
+        self.assertTrue(isinstance(output, bytes))
+
+    def test_normalize_text(self):
+        """Text strings are normalized into text strings, lowercasing
+        non-ASCII letters.
+        """
+        output = tokenizer.normalize(u'Caf\xc9, Z\xfcrich!')
+        self.assertEqual(output, u'caf\xe9 z\xfcrich')
+        self.assertTrue(isinstance(output, tokenizer.TEXT_TYPE))
+
+    def test_normalize_all_punctuation(self):
+        """Every ASCII punctuation character is removed.
+        """
+        self.assertEqual(tokenizer.normalize(string.punctuation), '')
+        self.assertEqual(tokenizer.normalize(u'a' + string.punctuation), u'a')
+
+    def test_normalize_unicode_letters(self):
+        """Unicode punctuation and symbols are removed only when asked for.
+        """
+        text = u'\xbfQu\xe9? “Na\xefve” €5'
+        self.assertEqual(tokenizer.normalize(text, unicode_letters=True),
+                         u'qu\xe9 na\xefve 5')
+        self.assertEqual(tokenizer.normalize(text),
+                         u'\xbfqu\xe9 “na\xefve” €5')
+
+
+class TestTokenize(unittest.TestCase):
+    """Tests the tokenize function.
+    """
+
+    def test_tokenize_native_string(self):
+        """Passage contains puntuation, capital letters, and numbers.
+        """
+        output = tokenizer.tokenize('Str#ing h1As, 12capitalS!!!, 0123')
+        self.assertEqual(output, ['string', 'h1as', '12capitals', '0123'])
+
+    def test_tokenize_bytes(self):
+        """Byte strings are split into byte string words.
+        """
+        output = tokenizer.tokenize(b'The  thIrd\nthing.')
+        self.assertEqual(output, [b'the', b'third', b'thing'])
+
+    def test_tokenize_unicode_letters(self):
+        """Words with non-ASCII letters are kept whole.
+        """
+        output = tokenizer.tokenize(u'\xc9T\xc9, \xe9t\xe9!', True)
+        self.assertEqual(output, [u'\xe9t\xe9', u'\xe9t\xe9'])
+
+
+if __name__ == '__main__':
+    unittest.main()
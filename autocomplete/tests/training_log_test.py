@@ -0,0 +1,224 @@
+"""Contains unit tests for the TrainingLog class.
+"""
+
+import collections
+import os
+import shutil
+import tempfile
+import unittest
+from autocomplete import autocomplete_provider as auto
+from autocomplete import array_autocomplete_provider as array_auto
+from autocomplete import radix_autocomplete_provider as radix
+from autocomplete import retention
+from autocomplete import training_log
+
+
+class FakeClock:
+    """Clock whose time is set by the test.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTrainingLog(unittest.TestCase):
+    """Tests logging the changes of a provider and recovering them.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # Cleanups run last in first out, so the logs are closed first.
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def open_log(self, directory=None, **options):
+        """Returns a TrainingLog that is closed when the test ends.
+
+        :param str directory: Directory of the log, self.directory by default.
+        :param options: Other keyword arguments of TrainingLog.
+        """
+        log = training_log.TrainingLog(directory or self.directory, **options)
+        self.addCleanup(log.close)
+        return log
+
+    def test_recover(self):
+        """Every engine recovers training, merges, decays and prunes made
+        before a crash.
+        """
+        for provider_class in [auto.AutocompleteProvider,
+                               array_auto.ArrayAutocompleteProvider,
+                               radix.RadixAutocompleteProvider]:
+            directory = os.path.join(self.directory, provider_class.__name__)
+            alg = provider_class(
+                training_log=self.open_log(directory))
+            alg.train('the third thing that I need to tell you is that this')
+            other = auto.AutocompleteProvider()
+            other.train('thing thing thoroughly')
+            alg.merge(other)
+            alg.decay(0.5)
+            alg.train_counts({'think': 3, 'tell': 2})
+            alg.prune(max_words=5)
+            # The log is not closed, as if the process crashed.
+            recovered = provider_class(
+                training_log=self.open_log(directory))
+            self.assertEqual(sorted(recovered.iter_words()),
+                             sorted(alg.iter_words()))
+            self.assertEqual(recovered.stats()['training_log']['replayed'], 5)
+
+    def test_retention(self):
+        """Decays and prunes applied by a retention policy are replayed, not
+        applied again.
+        """
+        policy = retention.RetentionPolicy(0.5, decay_tokens=4, max_words=2,
+                                           headroom=1, check_tokens=1)
+        alg = auto.AutocompleteProvider(
+            retention=policy,
+            training_log=self.open_log())
+        alg.train('a a a a b b b c c d')
+        alg.train('a e e')
+        recovered = auto.AutocompleteProvider(
+            retention=retention.RetentionPolicy(0.5, decay_tokens=4),
+            training_log=self.open_log())
+        self.assertEqual(sorted(recovered.iter_words()),
+                         sorted(alg.iter_words()))
+
+    def test_compaction(self):
+        """A log that outgrows compact_bytes is compacted into a snapshot,
+        and recovery only replays the records written after it.
+        """
+        log = self.open_log(compact_bytes=100)
+        alg = auto.AutocompleteProvider(training_log=log)
+        for index in range(20):
+            alg.train('word%d other%d' % (index, index))
+        self.assertTrue(log.compactions > 0)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['log.%d' % log.generation,
+                          'snapshot.%d' % log.generation])
+        alg.train('tail')
+        recovered = auto.AutocompleteProvider(
+            training_log=self.open_log())
+        self.assertEqual(sorted(recovered.iter_words()),
+                         sorted(alg.iter_words()))
+        self.assertTrue(recovered.training_log.replayed < 20)
+        log.compact(alg)
+        self.assertEqual(os.path.getsize(os.path.join(
+            self.directory, 'log.%d' % log.generation)),
+            training_log.HEADER.size)
+
+    def test_torn_record(self):
+        """Recovery stops at a record torn by a crash and truncates it, so
+        training continues after the last whole record.
+        """
+        log = self.open_log()
+        alg = auto.AutocompleteProvider(training_log=log)
+        alg.train('kept kept')
+        alg.train('torn')
+        log.close()
+        path = os.path.join(self.directory, 'log.0')
+        with open(path, 'rb+') as log_file:
+            log_file.truncate(os.path.getsize(path) - 2)
+        recovered = auto.AutocompleteProvider(
+            training_log=self.open_log())
+        self.assertEqual(sorted(recovered.iter_words()), [('kept', 2)])
+        recovered.train('after')
+        recovered.training_log.close()
+        recovered = auto.AutocompleteProvider(
+            training_log=self.open_log())
+        self.assertEqual(sorted(recovered.iter_words()),
+                         [('after', 1), ('kept', 2)])
+
+    def test_interrupted_compaction(self):
+        """An unfinished snapshot is ignored, and a snapshot whose log was not
+        created yet is recovered without replaying anything.
+        """
+        alg = auto.AutocompleteProvider(
+            training_log=self.open_log())
+        alg.train('the the this')
+        with open(os.path.join(self.directory, 'snapshot.1.tmp'),
+                  'wb') as snapshot_file:
+            snapshot_file.write(b'ACTS')
+        recovered = auto.AutocompleteProvider(
+            training_log=self.open_log())
+        self.assertEqual(sorted(recovered.iter_words()),
+                         [('the', 2), ('this', 1)])
+        self.assertFalse(os.path.exists(os.path.join(self.directory,
+                                                     'snapshot.1.tmp')))
+        alg.save(os.path.join(self.directory, 'snapshot.1'))
+        recovered = auto.AutocompleteProvider(
+            training_log=self.open_log())
+        self.assertEqual(sorted(recovered.iter_words()),
+                         [('the', 2), ('this', 1)])
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['log.1', 'snapshot.1'])
+
+    def test_batched_sync(self):
+        """fsync is called once per sync_records records or sync_seconds.
+        """
+        clock = FakeClock()
+        log = self.open_log(sync_records=3, sync_seconds=10,
+                            clock=clock)
+        alg = auto.AutocompleteProvider(training_log=log)
+        syncs = log.syncs
+        for word in ['a', 'b', 'c', 'd']:
+            alg.train(word)
+        self.assertEqual((log.syncs - syncs, log.unsynced), (1, 1))
+        clock.now = 10
+        alg.train('e')
+        self.assertEqual((log.syncs - syncs, log.unsynced), (2, 0))
+        self.assertRaises(ValueError, training_log.TrainingLog,
+                          self.directory, sync_records=0)
+
+    def test_unicode(self):
+        """Words outside ASCII are recovered intact.
+        """
+        alg = auto.AutocompleteProvider(
+            unicode_letters=True,
+            training_log=self.open_log())
+        alg.train(u'caf\xe9 \xfcber caf\xe9')
+        recovered = auto.AutocompleteProvider(
+            unicode_letters=True,
+            training_log=self.open_log())
+        self.assertEqual(sorted(recovered.iter_words()),
+                         [(u'caf\xe9', 2), (u'\xfcber', 1)])
+
+    def test_whitespace_words(self):
+        """Keys holding whitespace are recovered as the words they hold.
+        """
+        log = self.open_log()
+        alg = auto.AutocompleteProvider(training_log=log)
+        alg.train_counts(collections.OrderedDict(
+            [('new york', 3), ('apple', 5), ('zed', 1)]))
+        log.close()
+        recovered = auto.AutocompleteProvider(
+            training_log=self.open_log())
+        self.assertEqual(sorted(recovered.iter_words()),
+                         sorted(alg.iter_words()))
+        self.assertEqual(recovered.getWords('a')[0].getConfidence(), 5)
+
+
+class TestCounts(unittest.TestCase):
+    """Tests the encode_counts and parse_counts functions.
+    """
+
+    def test_round_trip(self):
+        """Words holding spaces or newlines are kept whole, in order.
+        """
+        word_counts = collections.OrderedDict(
+            [('new york', 3), ('apple', 5), ('a\nb', 2), ('', 4), ('zed', 1)])
+        self.assertEqual(training_log.parse_counts(
+            training_log.encode_counts(word_counts)), word_counts)
+        self.assertEqual(training_log.parse_counts(
+            training_log.encode_counts({})), {})
+
+    def test_malformed(self):
+        """Payloads whose lengths, counts and words disagree are rejected.
+        """
+        for payload in [b'3 5\n3\nnewapple', b'3\n3 5\nnew', b'3\n3\nne',
+                        b'3\n3', b'x\n3\nnew']:
+            self.assertRaises(ValueError, training_log.parse_counts, payload)
+
+
+if __name__ == '__main__':
+    unittest.main()
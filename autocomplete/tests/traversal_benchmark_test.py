@@ -0,0 +1,33 @@
+"""Contains unit tests for the micro-benchmark comparing the iterative
+memorize function and getWords traversal with their recursive predecessors.
+"""
+
+import unittest
+from autocomplete.benchmarks import traversal_benchmark as bench
+
+
+class TestTraversalBenchmark(unittest.TestCase):
+    """Runs the traversal micro-benchmark on a small vocabulary.
+    """
+
+    def setUp(self):
+        self.results = bench.compare(2000, repeat=1)
+
+    def test_same_memory(self):
+        """Both implementations build the same memory and answer the same
+        candidates.
+        """
+        self.assertTrue(self.results['same_memory'])
+        self.assertTrue(self.results['same_candidates'])
+
+    def test_timings_reported(self):
+        """Per-word and per-query timings are reported for both
+        implementations.
+        """
+        for name in ['recursive', 'iterative']:
+            self.assertGreater(self.results[name]['memorize_us_per_word'], 0)
+            self.assertGreater(self.results[name]['query_us'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Contains the tokenizer used to normalize fragments and split passages into
+words. Punctuation is removed and letters are lowercased by a single
+translate call with a precompiled table, instead of one pass to remove
+punctuation and another to lowercase.
+"""
+
+import string
+import sys
+import unicodedata
+
+try:
+    TEXT_TYPE = unicode
+    _unichr = unichr
+except NameError:  # Python 3
+    TEXT_TYPE = str
+    _unichr = chr
+
+if sys.version_info[0] == 2:
+    BYTES_TABLE = string.maketrans(string.ascii_uppercase,
+                                   string.ascii_lowercase)
+    BYTES_PUNCTUATION = string.punctuation
+else:
+    BYTES_TABLE = bytes.maketrans(string.ascii_uppercase.encode('ascii'),
+                                  string.ascii_lowercase.encode('ascii'))
+    BYTES_PUNCTUATION = string.punctuation.encode('ascii')
+
+TEXT_TABLE = dict((ord(char), None) for char in string.punctuation)
+TEXT_TABLE.update((ord(upper), ord(lower)) for upper, lower
+                  in zip(string.ascii_uppercase, string.ascii_lowercase))
+
+_is_ascii = getattr(TEXT_TYPE, 'isascii', lambda text: False)
+
+
+class UnicodeTable(dict):
+    """Translation table that deletes every Unicode punctuation and symbol
+    character and lowercases every letter. Entries are computed the first time
+    a character is looked up and cached, so the table only ever holds the
+    characters that have actually been seen.
+    """
+
+    def __missing__(self, code):
+        """Computes, caches and returns the translation of a character.
+        """
+        char = _unichr(code)
+        if unicodedata.category(char)[0] in 'PS':
+            translation = None
+        else:
+            translation = char.lower()
+        self[code] = translation
+        return translation
+
+
+UNICODE_TABLE = UnicodeTable()
+
+
+def normalize(text, unicode_letters=False):
+    """Returns text in lowercase without punctuation. Works on byte strings
+    and on text strings.
+
+    :param text: The text to be normalized (str, bytes or unicode).
+    :param bool unicode_letters: Remove all Unicode punctuation and symbols
+    instead of only ASCII punctuation. Has no effect on byte strings.
+    """
+    if isinstance(text, bytes):
+        return text.translate(BYTES_TABLE, BYTES_PUNCTUATION)
+    if unicode_letters:
+        return text.translate(UNICODE_TABLE)
+    text = text.translate(TEXT_TABLE)
+    if not _is_ascii(text):
+        text = text.lower()
+    return text
+
+
+def tokenize(text, unicode_letters=False):
+    """Returns the list of lowercase words in text without punctuation.
+
+    :param text: The text to be tokenized (str, bytes or unicode).
+    :param bool unicode_letters: Remove all Unicode punctuation and symbols
+    instead of only ASCII punctuation. Has no effect on byte strings.
+    """
+    return normalize(text, unicode_letters).split()
@@ -0,0 +1,365 @@
+"""Contains the TrainingLog class, a write-ahead log that lets a provider
+trained online recover everything it learned after a crash.
+
+Every change to the memory of a provider with a training log is appended to
+the log before it is applied: the word counts of each training batch or
+merge, and the arguments of each decay and prune, which replay exactly
+because they only depend on the memory they are applied to. Records are
+written straight to the file, so they survive the process; fsync, which
+makes them survive the machine, is only called once per sync_records
+records or sync_seconds seconds. Once the log grows beyond compact_bytes,
+the memory is saved to a snapshot and a new, empty log is started, so
+recovery never replays more than compact_bytes of records.
+
+The directory holds snapshot.<n> and log.<n> files. log.<n> holds the
+changes made after snapshot.<n> was saved, and generation 0 starts from an
+empty memory. A snapshot is written under a temporary name and renamed when
+complete, so the newest snapshot is always whole.
+
+Log: magic (4 bytes), format version (uint16), then records.
+Record: payload length (uint32), CRC-32 of the payload (uint32), kind (uint8),
+payload. Learn payloads are a line of the lengths of the words and a line of
+their counts, separated by spaces, followed by the words without separators,
+in UTF-8, so words may hold any character.
+Decay payloads are the factor (float64). Prune payloads are the minimum
+confidence (uint64) and the maximum number of words (int64, -1 for None).
+All integers are little-endian. Recovery stops at the first torn or corrupt
+record and truncates the log there.
+
+Bigram counts are not logged, as snapshots do not hold them either.
+"""
+
+import collections
+import io
+import os
+import re
+import struct
+import time
+import zlib
+from autocomplete import snapshot
+
+MAGIC = b'ACTL'
+VERSION = 2
+HEADER = struct.Struct('<4sH')
+RECORD = struct.Struct('<IIB')
+DECAY = struct.Struct('<d')
+PRUNE = struct.Struct('<Qq')
+LEARN_KIND = 1
+DECAY_KIND = 2
+PRUNE_KIND = 3
+FILE_NAME = re.compile(r'^(snapshot|log)\.(\d+)(\.tmp)?$')
+
+
+class TrainingLog:
+    """Write-ahead log of the changes made to the memory of one provider,
+    kept in a directory with the snapshots it is compacted into.
+
+    Pass it to the provider constructor, which recovers the memory from the
+    directory and then logs every change, under the write lock when the
+    provider is thread safe. A log serves a single provider.
+    """
+
+    def __init__(self, directory, sync_records=100, sync_seconds=1.0,
+                 compact_bytes=64 * 1024 * 1024, clock=time.time):
+        """Initalizes TrainingLog object. The directory is created if it does
+        not exist.
+
+        :param str directory: Directory of the log and snapshot files.
+        :param int sync_records: Call fsync once per this many records. Every
+        record is synced when 1.
+        :param float sync_seconds: Call fsync when a record is written this
+        many seconds after the last fsync.
+        :param int compact_bytes: Save a snapshot and start a new log once the
+        log is larger than this many bytes. Never compacts automatically when
+        None.
+        :param clock: Function returning the current time in seconds.
+        """
+        if sync_records < 1:
+            raise ValueError('sync_records must be at least 1')
+        self.directory = directory
+        self.sync_records = sync_records
+        self.sync_seconds = sync_seconds
+        self.compact_bytes = compact_bytes
+        self.clock = clock
+        self.generation = 0
+        self.log_file = None
+        self.log_bytes = 0
+        self.unsynced = 0
+        self.last_sync = clock()
+        self.records = 0
+        self.syncs = 0
+        self.compactions = 0
+        self.replayed = 0
+        self.recovery_seconds = 0.0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def recover(self, provider):
+        """Loads the newest snapshot into provider, which must be empty,
+        replays the log written after it and opens the log for appending.
+        Called by the provider constructor.
+
+        :param AutocompleteProvider provider: The provider to be restored.
+        """
+        start = self.clock()
+        generation = self._newest_generation()
+        retention = provider.retention
+        provider.retention = None  # recorded decays and prunes are replayed
+        try:
+            if generation:
+                with open(self._path('snapshot', generation),
+                          'rb') as snapshot_file:
+                    saved = snapshot.MappedAutocompleteProvider(
+                        snapshot_file.read())
+                provider._learn_unlocked(
+                    collections.OrderedDict(saved.iter_words()))
+            path = self._path('log', generation)
+            end = HEADER.size
+            if os.path.exists(path):
+                with open(path, 'rb') as log_file:
+                    data = log_file.read()
+                end = self._replay(provider, data)
+        finally:
+            provider.retention = retention
+        self._remove_older(generation)
+        self._open(generation, end)
+        self.recovery_seconds = self.clock() - start
+
+    def log_counts(self, word_counts):
+        """Appends the word counts of a training batch or merge, before they
+        are memorized.
+
+        :param word_counts: Mapping of normalized word (str) to its count.
+        """
+        if word_counts:
+            self._append(LEARN_KIND, encode_counts(word_counts))
+
+    def log_decay(self, factor):
+        """Appends a decay, before it is applied.
+
+        :param float factor: Decay factor between 0 and 1.
+        """
+        self._append(DECAY_KIND, DECAY.pack(factor))
+
+    def log_prune(self, min_confidence, max_words):
+        """Appends a prune, before it is applied.
+
+        :param int min_confidence: Lowest confidence of a word that is kept.
+        :param int max_words: Maximum number of words kept, or None.
+        """
+        self._append(PRUNE_KIND, PRUNE.pack(
+            min_confidence, -1 if max_words is None else max_words))
+
+    def after_change(self, provider):
+        """Compacts the log if it outgrew compact_bytes, once a logged change
+        has been applied to provider. Called with the write lock held.
+
+        :param AutocompleteProvider provider: The provider that changed.
+        """
+        if (self.compact_bytes is not None and
+                self.log_bytes > self.compact_bytes):
+            self._compact(provider)
+
+    def compact(self, provider):
+        """Saves the memory of provider to a new snapshot and starts a new,
+        empty log, so recovery does not replay the records written so far.
+
+        :param AutocompleteProvider provider: The provider being logged.
+        """
+        if provider.lock is None:
+            self._compact(provider)
+        else:
+            with provider.lock.writing():
+                self._compact(provider)
+
+    def sync(self):
+        """Flushes every record written so far to disk.
+        """
+        os.fsync(self.log_file.fileno())
+        self.unsynced = 0
+        self.last_sync = self.clock()
+        self.syncs += 1
+
+    def close(self):
+        """Syncs and closes the log. The provider must not be trained
+        afterwards.
+        """
+        if self.log_file is not None:
+            self.sync()
+            self.log_file.close()
+            self.log_file = None
+
+    def stats(self):
+        """Returns a dictionary with the current generation, the size of the
+        log, the numbers of records written, fsync calls, compactions and
+        records replayed, and the seconds recovery took.
+        """
+        return {'generation': self.generation,
+                'log_bytes': self.log_bytes,
+                'records': self.records,
+                'syncs': self.syncs,
+                'compactions': self.compactions,
+                'replayed': self.replayed,
+                'recovery_seconds': self.recovery_seconds}
+
+    def _append(self, kind, payload):
+        """Writes a record and syncs the log if a sync is due.
+        """
+        record = RECORD.pack(len(payload), zlib.crc32(payload) & 0xffffffff,
+                             kind) + payload
+        self.log_file.write(record)
+        self.log_bytes += len(record)
+        self.records += 1
+        self.unsynced += 1
+        if (self.unsynced >= self.sync_records or
+                self.clock() - self.last_sync >= self.sync_seconds):
+            self.sync()
+
+    def _replay(self, provider, data):
+        """Applies the records of a log to provider and returns the offset
+        after the last whole record. Consecutive learn records are summed and
+        memorized at once, as by train_many, which is exact because only
+        decays and prunes depend on the counts memorized before them.
+        """
+        if data[:HEADER.size] != HEADER.pack(MAGIC, VERSION):
+            raise ValueError('not a training log')
+        unicode_letters = provider.unicode_letters
+        word_counts = collections.Counter()
+        offset = HEADER.size
+        while offset + RECORD.size <= len(data):
+            length, checksum, kind = RECORD.unpack_from(data, offset)
+            start = offset + RECORD.size
+            payload = data[start:start + length]
+            if (len(payload) < length or
+                    zlib.crc32(payload) & 0xffffffff != checksum):
+                break  # torn by a crash while it was written
+            if kind == LEARN_KIND:
+                word_counts.update(parse_counts(payload, unicode_letters))
+            elif word_counts:
+                provider._learn_unlocked(word_counts)
+                word_counts = collections.Counter()
+            if kind == DECAY_KIND:
+                provider._decay_unlocked(DECAY.unpack(payload)[0])
+            elif kind == PRUNE_KIND:
+                min_confidence, max_words = PRUNE.unpack(payload)
+                provider._prune_unlocked(
+                    min_confidence, None if max_words < 0 else max_words)
+            offset = start + length
+            self.replayed += 1
+        if word_counts:
+            provider._learn_unlocked(word_counts)
+        return offset
+
+    def _compact(self, provider):
+        """Implements compact without locking.
+        """
+        generation = self.generation + 1
+        path = self._path('snapshot', generation)
+        snapshot.save(provider, path + '.tmp')
+        sync_file(path + '.tmp')
+        os.rename(path + '.tmp', path)
+        sync_file(self.directory)
+        self.log_file.close()
+        self._remove_older(generation)
+        self._open(generation, HEADER.size)
+        self.compactions += 1
+
+    def _open(self, generation, end):
+        """Opens the log of a generation for appending after its first end
+        bytes, creating it if needed.
+        """
+        path = self._path('log', generation)
+        if not os.path.exists(path):
+            with open(path, 'wb') as log_file:
+                log_file.write(HEADER.pack(MAGIC, VERSION))
+        elif os.path.getsize(path) > end:
+            with open(path, 'rb+') as log_file:
+                log_file.truncate(end)
+        # Unbuffered, so that every record reaches the operating system.
+        self.log_file = io.open(path, 'ab', buffering=0)
+        self.generation = generation
+        self.log_bytes = end
+        self.sync()
+
+    def _newest_generation(self):
+        """Returns the generation of the newest whole snapshot, or 0.
+        """
+        newest = 0
+        for name in os.listdir(self.directory):
+            match = FILE_NAME.match(name)
+            if match and match.group(1) == 'snapshot' and not match.group(3):
+                newest = max(newest, int(match.group(2)))
+        return newest
+
+    def _remove_older(self, generation):
+        """Deletes the files of generations before generation and unfinished
+        snapshots.
+        """
+        for name in os.listdir(self.directory):
+            match = FILE_NAME.match(name)
+            if match and (int(match.group(2)) < generation or match.group(3)):
+                os.remove(os.path.join(self.directory, name))
+
+    def _path(self, kind, generation):
+        """Returns the path of the snapshot or log file of a generation.
+        """
+        return os.path.join(self.directory, '%s.%d' % (kind, generation))
+
+
+def encode_counts(word_counts):
+    """Returns word counts as a line of the lengths of the words, a line of
+    their counts and the words without separators, in UTF-8. The lengths keep
+    words holding spaces or newlines whole. Joining the lines is faster than
+    formatting a line per word.
+
+    :param word_counts: Mapping of normalized word (str) to its count.
+    """
+    payload = '%s\n%s\n%s' % (' '.join(map(str, map(len, word_counts))),
+                               ' '.join(map(str, word_counts.values())),
+                               ''.join(word_counts))
+    if not isinstance(payload, bytes):
+        payload = payload.encode('utf-8')
+    return payload
+
+
+def parse_counts(payload, unicode_letters=False):
+    """Returns the word counts of a payload made by encode_counts. Throws
+    ValueError if the payload is malformed.
+
+    :param bytes payload: Lines of word lengths and counts, then the words.
+    :param bool unicode_letters: Whether the provider keeps Unicode words, so
+    Python 2 decodes them.
+    """
+    if str is not bytes or unicode_letters:
+        payload = payload.decode('utf-8')
+    try:
+        lengths, counts, text = payload.split('\n', 2)
+    except ValueError:
+        raise ValueError('malformed word counts')
+    lengths = [int(length) for length in lengths.split()]
+    counts = [int(count) for count in counts.split()]
+    if len(lengths) != len(counts) or sum(lengths) != len(text):
+        raise ValueError('malformed word counts')
+    word_counts = collections.OrderedDict()
+    offset = 0
+    for length, count in zip(lengths, counts):
+        word_counts[text[offset:offset + length]] = count
+        offset += length
+    return word_counts
+
+
+def sync_file(path):
+    """Flushes a file or, where the platform allows, a directory to disk.
+
+    :param str path: Path of the file or directory.
+    """
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # directories cannot be opened on Windows
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)